@@ -8,15 +8,26 @@ Contains:
 - /regulations/search - Search regulations by query (Phase 2)
 - /regulations/ingest - Ingest regulation documents (Phase 2)
 - /compliance/analyze - Placeholder for compliance analysis (stub)
+- /compliance/analyze/batch - Bulk analysis jobs (JSONL/CSV in, JSONL out)
+- /compliance/jobs - Async single analyses (poll or callback URL)
 - /chat - Placeholder for chatbot endpoint (stub)
+- /llm/stats - LLM call, coalescing and queue statistics
+- /metrics - LLM and vector query cache telemetry in Prometheus text format
+
+LLM-bound handlers run their blocking service calls in the threadpool so
+the LLM scheduler (not the event loop) decides which request runs next.
+When the LLM queue is saturated they return 503 with a Retry-After header.
 """
 
 from fastapi import APIRouter, HTTPException, Query, File, UploadFile, Form
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from datetime import datetime
 from typing import Optional
 from app.models.schemas import (
     ComplianceReport,
     IndustrialApplication,
+    AnalysisJobRequest,
     ChatRequest,
     ChatResponse,
     HealthResponse,
@@ -31,11 +42,32 @@ from app.services.chat_service import get_chat_service
 from app.services.embedding_service import get_embedding_service
 from app.services.vector_store_service import get_vector_store_service
 from app.services.regulation_ingestion_service import get_ingestion_service
+from app.services.batch_service import get_batch_service
+from app.services.analysis_job_service import get_analysis_job_service
+from app.services.llm_service import get_llm_service
+from app.services.llm_scheduler import LLMOverloadedError
 from app.core.config import settings
 
 router = APIRouter()
 
 
+def _overloaded(error: LLMOverloadedError) -> HTTPException:
+    """
+    Translate an LLM admission failure into a 503 response.
+    
+    Args:
+        error: Overload error raised by the LLM scheduler
+        
+    Returns:
+        HTTPException with a Retry-After header
+    """
+    return HTTPException(
+        status_code=503,
+        detail=f"LLM service busy: {str(error)}",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
 @router.get("/health", response_model=HealthResponse, tags=["System"])
 async def health_check():
     """
@@ -65,6 +97,33 @@ async def get_version():
     )
 
 
+@router.get("/llm/stats", tags=["System"])
+async def get_llm_stats():
+    """
+    Get LLM call statistics, including queue depth and wait times.
+    
+    Returns:
+        Dictionary of LLM service counters and scheduler metrics
+    """
+    return get_llm_service().get_stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, tags=["System"])
+async def get_metrics():
+    """
+    Prometheus scrape endpoint for LLM and retrieval telemetry.
+    
+    Returns:
+        Latency, time-to-first-token, token and throughput histograms,
+        call counters by outcome, scheduler/circuit/endpoint gauges, and
+        vector query cache lookups and hit ratio
+    """
+    return PlainTextResponse(
+        get_llm_service().render_metrics() + get_vector_store_service().render_metrics(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @router.get("/regulations/search", response_model=RegulationSearchResponse, tags=["Regulations"])
 async def search_regulations(
     query: str = Query(..., description="Search query text"),
@@ -122,7 +181,9 @@ async def search_regulations(
 
 
 @router.post("/regulations/ingest", response_model=IngestionResponse, tags=["Regulations"])
-async def ingest_regulations():
+async def ingest_regulations(
+    department: Optional[str] = Query(None, description="Re-ingest only data/regulations/<department>")
+):
     """
     Ingest all regulation documents from the data/regulations directory.
     
@@ -130,17 +191,22 @@ async def ingest_regulations():
     
     This endpoint scans the regulations directory, extracts text from supported
     formats (PDF, DOCX, TXT), chunks the text, generates embeddings, and stores
-    them in the vector database.
+    them in the vector database. With department set, only that department's
+    documents (its shard, when the store is sharded) are replaced.
+    
+    Args:
+        department: Optional department subdirectory to re-ingest
     
     Returns:
         IngestionResponse with ingestion statistics
         
     Raises:
-        HTTPException: If ingestion fails
+        HTTPException: 400 for an invalid department, 404 if its directory
+            does not exist, 500 if ingestion fails
     """
     try:
         ingestion_service = get_ingestion_service()
-        stats = ingestion_service.ingest_directory()
+        stats = ingestion_service.ingest_directory(department=department)
         
         return IngestionResponse(
             success=True,
@@ -150,6 +216,10 @@ async def ingest_regulations():
             failed=stats["failed"],
             total_chunks=stats["total_chunks"]
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Regulation ingestion failed: {str(e)}")
 
@@ -169,16 +239,142 @@ async def analyze_compliance(application: IndustrialApplication):
         ComplianceReport with analysis results
         
     Raises:
-        HTTPException: If analysis fails
+        HTTPException: If analysis fails (503 if the LLM queue is saturated)
     """
     try:
         compliance_service = get_compliance_service()
-        report = compliance_service.analyze_application(application.dict())
+        report = await run_in_threadpool(compliance_service.analyze_application, application.dict())
         return report
+    except LLMOverloadedError as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Compliance analysis failed: {str(e)}")
 
 
+@router.post("/compliance/analyze/batch", status_code=202, tags=["Compliance"])
+async def create_batch_analysis(file: UploadFile = File(...)):
+    """
+    Start a bulk compliance analysis job.
+    
+    Accepts JSONL (one IndustrialApplication object per line) or CSV (header
+    row with the IndustrialApplication field names). The job runs in the
+    background; poll its status and download results as JSONL.
+    
+    Args:
+        file: JSONL or CSV upload
+        
+    Returns:
+        Job status including the job_id
+        
+    Raises:
+        HTTPException: 400 if the upload cannot be parsed
+    """
+    contents = await file.read()
+    try:
+        return await run_in_threadpool(get_batch_service().create_job, contents, file.filename or "")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/compliance/analyze/batch/{job_id}", tags=["Compliance"])
+async def get_batch_analysis(job_id: str):
+    """
+    Get a batch job's status, progress and throughput (applications/minute).
+    
+    Args:
+        job_id: Job identifier
+        
+    Returns:
+        Job status dictionary
+        
+    Raises:
+        HTTPException: 404 if the job does not exist
+    """
+    job = get_batch_service().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job
+
+
+@router.get("/compliance/analyze/batch/{job_id}/results", tags=["Compliance"])
+async def get_batch_analysis_results(job_id: str):
+    """
+    Stream a batch job's results as JSONL (complete so far while running).
+    
+    Each line is {"index": i, "status": "ok", "report": {...}} or
+    {"index": i, "status": "error", "error": "..."}; lines are in completion
+    order, index is the position in the upload.
+    
+    Args:
+        job_id: Job identifier
+        
+    Returns:
+        application/x-ndjson stream
+        
+    Raises:
+        HTTPException: 404 if the job does not exist
+    """
+    service = get_batch_service()
+    if service.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    
+    def read_results():
+        with open(service.output_path(job_id), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.endswith("\n"):
+                    yield line
+    
+    return StreamingResponse(read_results(), media_type="application/x-ndjson")
+
+
+@router.post("/compliance/jobs", status_code=202, tags=["Compliance"])
+async def create_analysis_job(job_request: AnalysisJobRequest):
+    """
+    Queue a compliance analysis and return immediately.
+    
+    The analysis runs in the background; poll GET /compliance/jobs/{job_id}
+    or pass a callback_url to receive the finished job as a JSON POST.
+    Queued jobs survive restarts.
+    
+    Args:
+        job_request: Application and optional callback URL
+        
+    Returns:
+        Job status including the job_id
+        
+    Raises:
+        HTTPException: 400 if the callback URL is not an http(s) URL on an allowed host
+    """
+    try:
+        return await run_in_threadpool(
+            get_analysis_job_service().create_job,
+            job_request.application.dict(),
+            job_request.callback_url
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/compliance/jobs/{job_id}", tags=["Compliance"])
+async def get_analysis_job(job_id: str):
+    """
+    Get an async analysis job's status, with the report once completed.
+    
+    Args:
+        job_id: Job identifier
+        
+    Returns:
+        Job status dictionary (status: queued, running, completed or failed)
+        
+    Raises:
+        HTTPException: 404 if the job does not exist
+    """
+    job = get_analysis_job_service().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job
+
+
 @router.post("/chat", response_model=ChatResponse, tags=["Chatbot"])
 async def chat(chat_request: ChatRequest):
     """
@@ -268,7 +464,7 @@ async def extract_document_details(file: UploadFile = File(...)):
             contents = f.read()
             
         text = service.extract_text(contents, file.filename)
-        data = service.parse_application_details(text)
+        data = await run_in_threadpool(service.parse_application_details, text)
         
         # Return local path (or URL path if serving statically)
         document_url = f"/uploads/{safe_filename}"
@@ -277,6 +473,8 @@ async def extract_document_details(file: UploadFile = File(...)):
         data["document_url"] = document_url
         
         return {"filename": file.filename, "extracted_data": data}
+    except LLMOverloadedError as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
 
@@ -294,9 +492,11 @@ async def validate_document(
         
         contents = await file.read()
         text = service.extract_text(contents, file.filename)
-        result = service.validate_document(text, doc_type)
+        result = await run_in_threadpool(service.validate_document, text, doc_type)
         
         return result
+    except LLMOverloadedError as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Validation failed: {str(e)}")
 
@@ -19,6 +19,9 @@ class Settings(BaseSettings):
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     debug: bool = False
+    web_workers: int = 2  # Worker processes when served with gunicorn -c gunicorn.conf.py
+    preload_models: bool = True  # Load the embedding/reranker models at import, before gunicorn forks workers
+    metrics_dir: Optional[str] = None  # Directory where workers share /metrics counters (gunicorn.conf.py sets one); unset = this process only
     
     # CORS Settings (Updated for Next.js)
     cors_origins: list = [
@@ -31,21 +34,106 @@ class Settings(BaseSettings):
     # Vector Store Configuration
     vector_store_path: str = "./data/vector_store"
     collection_name: str = "regulations"
+    vector_query_cache_enabled: bool = True  # LRU of query results, cleared when the corpus generation changes
+    vector_query_cache_max_entries: int = 4096
+    vector_store_sharding: bool = False  # One collection per shard field value (re-ingest after switching)
+    vector_store_shard_field: str = "department"  # Metadata field to shard by (e.g. department, industry_category)
+    vector_store_shard_workers: int = 4  # Shards searched concurrently by unfiltered queries
+    vector_store_index: str = "chroma"  # chroma (HNSW) | ivfpq (compressed mmap index built at ingest, queried without Chroma; see bench_compressed_index.py)
+    compressed_index_nlist: int = 0  # IVF lists (0 = sqrt(number of vectors))
+    compressed_index_pq_subvectors: int = 48  # Bytes per vector; must divide the embedding dimension
+    compressed_index_nprobe: int = 8  # Lists searched per query (recall vs. latency)
+    compressed_index_shortlist: int = 200  # PQ candidates re-scored exactly from the mmap'd float vectors
     
     # Embedding Model Configuration
     embedding_model_name: str = "all-MiniLM-L6-v2"
     
     # LLM Configuration (Phase 3)
     llm_api_url: str = "http://localhost:1234/v1/chat/completions"  # LM Studio default
+    llm_api_urls: list = []  # Several inference hosts to balance across (defaults to [llm_api_url])
+    llm_balancing_strategy: str = "least_outstanding"  # "least_outstanding" or "ewma"
+    llm_endpoint_eject_after_failures: int = 3  # Consecutive failures before an endpoint is ejected
+    llm_endpoint_ejection_seconds: float = 30.0  # Time an ejected endpoint stays out of rotation
     llm_model_name: str = "mistralai-mistral-7b-instruct-v0.2-smashed"  # Must match LM Studio model name
     llm_temperature: float = 0.3  # Lower for compliance analysis
     llm_max_tokens: int = 2000  # Hard limit for safety
+    llm_context_window: int = 4096  # Context length the model is loaded with
+    llm_min_completion_tokens: int = 1024  # Context always reserved for the JSON report
+    llm_tokenizer_name: Optional[str] = None  # HF tokenizer for exact counts, loaded at startup (None = estimate)
+    regulation_chunk_tokens_estimate: int = 520  # ~400-word chunks; sizes retrieval to the budget
+    routing_index_enabled: bool = True  # Rerank ingest-time facet candidates instead of live ANN queries
+    routing_index_candidates: int = 32  # Candidate chunks per facet and department
+    reranker_enabled: bool = False  # Cross-encoder rerank of retrieved chunks (downloads the model on first use)
+    reranker_model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    reranker_backend: str = "torch"  # torch or onnx (onnx needs sentence-transformers>=4 and optimum[onnxruntime])
+    reranker_candidates: int = 20  # Chunks retrieved per scope before reranking
+    reranker_cache_max_entries: int = 20000  # Cached (query, chunk) scores
+    retrieval_mmr_enabled: bool = True  # Pick diverse chunks (skips overlapping neighbours of one section)
+    retrieval_mmr_candidates: int = 12  # Chunks retrieved per scope before the MMR pick
+    retrieval_mmr_lambda: float = 0.5  # Relevance weight vs. diversity (1 = relevance only)
+    llm_structured_output_level: str = "json_schema"  # json_schema | json_object | none (downgraded per backend on HTTP 400)
+    llm_cache_prompt: bool = True  # Send cache_prompt to local servers (llama.cpp KV prefix reuse)
+    llm_prompt_cache_slots: int = 0  # Server slots (--parallel) to pin prompts to via id_slot; 0 = no pinning
+    llm_stream_responses: bool = True  # Stream completions (measures time to first token)
     llm_timeout: int = 90  # 90 second timeout for slower models
+    llm_coalesce_requests: bool = True  # Merge concurrent identical prompts into one call
+    
+    # LLM Admission Control
+    llm_max_concurrency: int = 1  # Per endpoint - LM Studio decodes one sequence at a time
+    llm_max_queue_depth: int = 16  # Waiting requests per priority before rejecting
+    llm_queue_timeout_interactive: float = 20.0  # Max queue wait (s) for chat/extraction
+    llm_queue_timeout_batch: float = 120.0  # Max queue wait (s) for compliance analysis
+    
+    # LLM Circuit Breakers (per backend)
+    llm_circuit_failure_rate: float = 0.5  # Failure ratio that opens the circuit
+    llm_circuit_min_calls: int = 4  # Outcomes needed before the ratio is evaluated
+    llm_circuit_window: int = 20  # Recent outcomes considered
+    llm_circuit_slow_call_seconds: float = 60.0  # Slower successful calls count as failures
+    llm_circuit_open_seconds: float = 30.0  # Cooldown before a half-open probe call
+    llm_health_probe_interval: float = 15.0  # Seconds between background is_available probes
+    
+    # LLM Hedging (interactive calls only; requires the OpenAI fallback)
+    llm_hedging_enabled: bool = False  # Opt-in: race slow local calls against OpenAI
+    llm_hedge_default_delay: float = 10.0  # Delay (s) until enough latency samples exist
+    llm_hedge_min_delay: float = 2.0  # Lower bound for the p95-based delay (s)
+    llm_hedge_max_delay: float = 30.0  # Upper bound for the p95-based delay (s)
+    llm_hedge_percentile: float = 0.95  # Local latency percentile that triggers a hedge
     
     # OpenAI Fallback Configuration (Phase 5)
     use_openai_fallback: bool = False  # Set to True to enable OpenAI fallback
     openai_api_key: Optional[str] = None  # Set via environment variable
+    openai_api_url: str = "https://api.openai.com/v1/chat/completions"
     openai_model: str = "gpt-4o-mini"  # Cost-effective model (~$0.0001-0.0005 per call)
+    openai_cost_per_1k_prompt_tokens: float = 0.00015  # gpt-4o-mini input pricing (USD)
+    openai_cost_per_1k_completion_tokens: float = 0.0006  # gpt-4o-mini output pricing (USD)
+    
+    # Compliance Analysis
+    compliance_department_fanout: bool = True  # One scoped LLM analysis per department, run concurrently
+    compliance_department_workers: int = 3  # Concurrent department analyses (LLM scheduler still gates them)
+    compliance_department_max_tokens: int = 1000  # Completion cap for a department-scoped analysis
+    compliance_department_chunks: int = 4  # Max regulation chunks per department
+    compliance_rules_enabled: bool = True  # Deterministic rule pre-screen before the LLM
+    compliance_rules_short_circuit: bool = True  # Skip the LLM when a blocking rule is violated
+    rules_dir: str = "../data/rules"  # Rule files (JSON), next to ../data/regulations
+    report_cache_enabled: bool = True  # Reuse reports for identical applications (same corpus and prompts)
+    report_cache_max_entries: int = 512
+    report_cache_ttl_seconds: float = 86400.0  # 0 = no expiry
+    partial_cache_enabled: bool = True  # Reuse department results whose fields are unchanged (fan-out only)
+    partial_cache_max_entries: int = 2048
+    
+    # Batch Analysis
+    batch_jobs_dir: str = "./data/batch_jobs"  # Job inputs, status and JSONL outputs
+    batch_analysis_chunk_size: int = 32  # Applications embedded and retrieved together
+    batch_analysis_workers: int = 4  # Concurrent analyses per job (LLM scheduler still gates them)
+    
+    # Async Analysis Jobs
+    analysis_jobs_dir: str = "./data/analysis_jobs"  # One JSON file per job (persistent queue)
+    analysis_job_workers: int = 4  # Concurrent jobs (LLM scheduler still gates them)
+    analysis_job_retention_hours: float = 168.0  # Finished jobs are pruned at startup (0 = keep)
+    analysis_job_callback_timeout: float = 10.0  # Seconds per callback POST
+    analysis_job_callback_retries: int = 3  # Extra callback attempts (exponential backoff)
+    analysis_job_callback_secret: str = ""  # HMAC-SHA256 key for X-Compliance-Signature (empty = unsigned)
+    analysis_job_callback_allowed_hosts: list = []  # Callback hosts allowed even if private (others must resolve to public IPs)
     
     # Demo Mode (Phase 5)
     demo_mode: bool = False  # Set to True for demo hardening
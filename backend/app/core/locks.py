@@ -0,0 +1,34 @@
+"""
+Locks - Cross-Process File Locks
+Serialises read-modify-write sequences on files shared by the worker
+processes of a host (job claiming, the corpus generation, the shard
+manifest).
+
+Uses fcntl.flock, so the lock is released when its holder exits. On
+platforms without fcntl (non-POSIX) the lock is a no-op.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator
+import os
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a lock file for the duration of the block.
+
+    Args:
+        path: Lock file (created if missing; its directory must exist)
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
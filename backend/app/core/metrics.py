@@ -0,0 +1,272 @@
+"""
+Metrics - Minimal Prometheus Instrumentation
+Thread-safe counters and histograms rendered in the Prometheus text
+exposition format (version 0.0.4).
+
+Only what the backend needs is implemented: labelled counters, labelled
+histograms with fixed buckets, and gauges rendered from a snapshot at
+scrape time. No client library is required.
+
+Metrics live in the memory of one process. Under gunicorn every worker has
+its own, so SharedMetrics writes each worker's counters and histograms to a
+file in a shared directory and sums all of them when any worker is scraped.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import glob
+import json
+import math
+import os
+import threading
+import time
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects."""
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a label set ("" if empty)."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        """
+        Initialize the counter.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            label_names: Label names (values are passed to inc())
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the counter for a label set."""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def snapshot(self) -> List[list]:
+        """Current values as JSON-serialisable [label values, value] pairs."""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def merge(self, snapshot: List[list]) -> None:
+        """Add the values of a snapshot (from another process) to this counter."""
+        with self._lock:
+            for key, value in snapshot:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def empty_copy(self) -> "Counter":
+        """A counter with the same definition and no values."""
+        return Counter(self.name, self.documentation, self.label_names)
+
+    def render(self) -> List[str]:
+        """Render the counter in text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets and optional labels."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        label_names: Sequence[str] = ()
+    ):
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            buckets: Upper bounds in increasing order (+Inf is added)
+            label_names: Label names (values are passed to observe())
+        """
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        # label values -> [bucket counts, sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation for a label set."""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * len(self.buckets), 0.0, 0]
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> List[list]:
+        """Current series as JSON-serialisable [label values, bucket counts, sum, count] lists."""
+        with self._lock:
+            return [[list(key), list(counts), total, count] for key, (counts, total, count) in self._series.items()]
+
+    def merge(self, snapshot: List[list]) -> None:
+        """Add the series of a snapshot (from another process) to this histogram."""
+        with self._lock:
+            for key, counts, total, count in snapshot:
+                series = self._series.setdefault(tuple(key), [[0] * len(self.buckets), 0.0, 0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+
+    def empty_copy(self) -> "Histogram":
+        """A histogram with the same definition and no observations."""
+        return Histogram(self.name, self.documentation, self.buckets[:-1], self.label_names)
+
+    def render(self) -> List[str]:
+        """Render the histogram in text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+def gauge_lines(
+    name: str,
+    documentation: str,
+    samples: Iterable[Tuple[Dict[str, str], float]]
+) -> List[str]:
+    """
+    Render a gauge from a snapshot taken at scrape time.
+
+    Args:
+        name: Metric name
+        documentation: HELP text
+        samples: (labels, value) pairs
+
+    Returns:
+        Text format lines
+    """
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        names = list(labels.keys())
+        lines.append(f"{name}{_labels(names, [labels[n] for n in names])} {_format_value(value)}")
+    return lines
+
+
+class SharedMetrics:
+    """
+    Counters and histograms summed across the worker processes of a host.
+
+    Each process writes a snapshot of its metrics to its own file in a
+    directory shared by the workers (replaced atomically after every
+    update). Rendering sums the files of every process, including exited
+    ones, so counters keep growing when a worker is restarted. The directory
+    is emptied when the server starts (see gunicorn.conf.py).
+
+    Without a directory, the metrics of this process are rendered as they are.
+    """
+
+    def __init__(self, name: str, metrics: Sequence[Any], directory: Optional[str] = None):
+        """
+        Initialize the group.
+
+        Args:
+            name: File name prefix of this group of metrics
+            metrics: Counters and histograms in rendering order
+            directory: Shared metrics directory (None = this process only)
+        """
+        self.name = name
+        self.metrics = list(metrics)
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._path: Optional[str] = None
+
+    def flush(self) -> None:
+        """Write this process's snapshot (no-op without a directory)."""
+        if not self.directory:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # First write in this process (or after a fork): a new file,
+                # so a reused pid never overwrites an exited worker's totals
+                self._pid = os.getpid()
+                self._path = os.path.join(self.directory, f"{self.name}_{self._pid}_{time.time_ns()}.json")
+                os.makedirs(self.directory, exist_ok=True)
+            data = {metric.name: metric.snapshot() for metric in self.metrics}
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._path)
+
+    def render(self) -> List[str]:
+        """Render the metrics, summed over every process's file when shared."""
+        if not self.directory:
+            lines: List[str] = []
+            for metric in self.metrics:
+                lines.extend(metric.render())
+            return lines
+
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, f"{self.name}_*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        lines = []
+        for metric in self.metrics:
+            total = metric.empty_copy()
+            for snapshot in snapshots:
+                total.merge(snapshot.get(metric.name, []))
+            lines.extend(total.render())
+        return lines
+
+
+def clear_shared_metrics(directory: Optional[str]) -> None:
+    """Remove every process's metric files (call once, before workers start)."""
+    if not directory:
+        return
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
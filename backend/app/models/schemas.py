@@ -60,6 +60,7 @@ class ComplianceReport(BaseModel):
     recommendations: List[str] = Field(default_factory=list)
     regulation_coverage: float = Field(..., ge=0.0, le=1.0, description="% of regulations reviewed")
     generated_at: datetime = Field(default_factory=datetime.utcnow)
+    cache_status: Optional[str] = Field(None, description="Report cache status: cached or fresh")
     
     class Config:
         json_schema_extra = {
@@ -82,6 +83,12 @@ class ComplianceReport(BaseModel):
         }
 
 
+class AnalysisJobRequest(BaseModel):
+    """Schema for submitting an asynchronous compliance analysis."""
+    application: IndustrialApplication
+    callback_url: Optional[str] = Field(None, description="http(s) URL that receives the finished job as a JSON POST")
+
+
 class ChatMessage(BaseModel):
     """Single chat message in a conversation."""
     role: str = Field(..., description="Message role: system, user, or assistant")
@@ -0,0 +1,311 @@
+"""
+Analysis Job Service - Asynchronous Compliance Analysis
+Runs single compliance analyses in the background so HTTP requests do not
+wait for the LLM.
+
+Responsibilities:
+- Persist each submitted analysis as a job file under data/analysis_jobs
+  (the queue survives restarts)
+- Analyse queued jobs on a pool of worker threads through the LLM
+  scheduler, waiting out LLM overload instead of failing
+- Deliver the finished job to an optional callback URL (JSON POST,
+  optionally HMAC-signed), retrying with exponential backoff; callback
+  hosts must resolve to public addresses or be explicitly allowed
+- Resume unfinished jobs and undelivered callbacks whose owning process
+  has died (restart, crash, or a replaced worker process)
+- Prune finished jobs after the retention period
+
+Job file layout:
+    <job_id>.json  status, application, report or error, callback state
+"""
+
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+
+import requests
+
+from app.core.config import settings
+from app.services.compliance_service import get_compliance_service
+from app.services.job_queue import (
+    JOB_QUEUED, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED,
+    JobQueue, analyze_with_retries, claim_lock, current_owner, load_json, owner_alive, save_json
+)
+
+logger = logging.getLogger(__name__)
+
+# Callback states
+CALLBACK_PENDING = "pending"
+CALLBACK_DELIVERED = "delivered"
+CALLBACK_FAILED = "failed"
+
+# Header carrying the HMAC-SHA256 of the callback body (if a secret is set)
+SIGNATURE_HEADER = "X-Compliance-Signature"
+
+
+def validate_callback_url(url: str) -> None:
+    """
+    Check that a callback URL is an absolute http(s) URL on a public host.
+
+    Hosts in settings.analysis_job_callback_allowed_hosts are accepted as
+    they are. Any other host must resolve only to public addresses, so
+    clients cannot make the server POST to loopback, private, link-local
+    (e.g. cloud metadata) or reserved addresses.
+
+    Args:
+        url: Callback URL
+
+    Raises:
+        ValueError: If the URL is not usable or not allowed
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("callback_url must be an absolute http(s) URL")
+    host = parsed.hostname.lower()
+    if host in {h.lower() for h in settings.analysis_job_callback_allowed_hosts}:
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or None, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise ValueError(f"callback_url host cannot be resolved: {host}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"callback_url host is not a public address: {host}")
+
+
+class AnalysisJobService:
+    """
+    File-backed queue of single compliance analyses.
+
+    Unlike batch jobs (one upload, processed in chunks by one worker),
+    every job here is one application and several jobs run concurrently;
+    the LLM scheduler still decides which analysis gets an inference slot.
+    """
+
+    def __init__(self, jobs_dir: str = None, workers: int = None):
+        """
+        Initialize the service (workers start on the first job).
+
+        Args:
+            jobs_dir: Directory holding job files (defaults to settings.analysis_jobs_dir)
+            workers: Concurrent analyses (defaults to settings.analysis_job_workers)
+        """
+        self.jobs_dir = jobs_dir or settings.analysis_jobs_dir
+        self.workers = max(1, workers or settings.analysis_job_workers)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._queue = JobQueue(self._run_job, workers=self.workers, name="analysis-job")
+
+    # --- Job files ---
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return load_json(self._job_path(job_id))
+
+    def _save_job(self, job: Dict[str, Any]) -> None:
+        save_json(self._job_path(job["job_id"]), job)
+
+    def _job_ids(self) -> List[str]:
+        return [name[:-5] for name in os.listdir(self.jobs_dir) if name.endswith(".json")]
+
+    # --- Public API ---
+
+    def create_job(self, application: Dict[str, Any], callback_url: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Persist and enqueue an analysis.
+
+        Args:
+            application: Validated application details
+            callback_url: URL that receives the finished job (optional)
+
+        Returns:
+            Job status dictionary
+
+        Raises:
+            ValueError: If the callback URL is not usable or not allowed
+        """
+        if callback_url:
+            validate_callback_url(callback_url)
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": JOB_QUEUED,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "application": application,
+            "report": None,
+            "error": None,
+            "callback_url": callback_url or None,
+            "callback_status": CALLBACK_PENDING if callback_url else None,
+            "callback_attempts": 0,
+            "callback_error": None,
+            "owner": current_owner()
+        }
+        self._save_job(job)
+        self._queue.enqueue(job["job_id"])
+        logger.info(f"Queued analysis job {job['job_id']} ({self._queue.qsize()} waiting)")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job's status, with the report once completed.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Job status dictionary, or None if unknown
+        """
+        if not job_id.isalnum():
+            return None
+        return self._load_job(job_id)
+
+    def resume_jobs(self) -> int:
+        """
+        Prune expired jobs, then claim and re-enqueue unfinished jobs and
+        undelivered callbacks whose owning process has died.
+
+        Jobs owned by another live process (e.g. another worker) are left
+        alone, so each job is run and delivered once.
+
+        Returns:
+            Number of jobs resumed
+        """
+        resumed = 0
+        with claim_lock(self.jobs_dir):
+            self.prune_jobs()
+            jobs = [job for job in map(self._load_job, self._job_ids()) if job]
+            for job in sorted(jobs, key=lambda j: j["created_at"]):
+                unfinished = job["status"] in (JOB_QUEUED, JOB_RUNNING)
+                pending = unfinished or job.get("callback_status") == CALLBACK_PENDING
+                if pending and not owner_alive(job.get("owner")):
+                    job["owner"] = current_owner()
+                    self._save_job(job)
+                    self._queue.enqueue(job["job_id"])
+                    resumed += 1
+        if resumed:
+            logger.info(f"Resuming {resumed} analysis jobs")
+        return resumed
+
+    def prune_jobs(self) -> int:
+        """
+        Delete finished jobs older than settings.analysis_job_retention_hours.
+
+        Returns:
+            Number of jobs deleted
+        """
+        if settings.analysis_job_retention_hours <= 0:
+            return 0
+        cutoff = (datetime.utcnow() - timedelta(hours=settings.analysis_job_retention_hours)).isoformat()
+        pruned = 0
+        for job_id in self._job_ids():
+            job = self._load_job(job_id)
+            if (
+                job is not None
+                and job["status"] in (JOB_COMPLETED, JOB_FAILED)
+                and job.get("callback_status") != CALLBACK_PENDING
+                and (job["finished_at"] or "") < cutoff
+            ):
+                os.remove(self._job_path(job_id))
+                pruned += 1
+        if pruned:
+            logger.info(f"Pruned {pruned} expired analysis jobs")
+        return pruned
+
+    # --- Workers ---
+
+    def _run_job(self, job_id: str) -> None:
+        """Analyse a job (unless already finished) and deliver its callback."""
+        job = self._load_job(job_id)
+        if job is None:
+            return
+
+        if job["status"] in (JOB_QUEUED, JOB_RUNNING):
+            job["status"] = JOB_RUNNING
+            job["started_at"] = job["started_at"] or datetime.utcnow().isoformat()
+            self._save_job(job)
+            try:
+                report = analyze_with_retries(get_compliance_service(), job["application"])
+                job.update({"status": JOB_COMPLETED, "report": json.loads(report.json())})
+            except Exception as e:
+                logger.error(f"Analysis job {job_id} failed: {e}")
+                job.update({"status": JOB_FAILED, "error": str(e)})
+            job["finished_at"] = datetime.utcnow().isoformat()
+            self._save_job(job)
+            logger.info(f"Analysis job {job_id} {job['status']}")
+
+        if job.get("callback_status") == CALLBACK_PENDING:
+            self._deliver_callback(job)
+
+    def _deliver_callback(self, job: Dict[str, Any]) -> None:
+        """
+        POST the finished job to its callback URL.
+
+        Retries with exponential backoff; any 2xx response counts as
+        delivered. The outcome is persisted so a restart does not re-send
+        delivered callbacks. The host is checked again before sending (its
+        DNS may have changed since submission) and redirects are not
+        followed.
+        """
+        try:
+            validate_callback_url(job["callback_url"])
+        except ValueError as e:
+            job.update({"callback_status": CALLBACK_FAILED, "callback_error": str(e)})
+            logger.warning(f"Callback for analysis job {job['job_id']} refused: {e}")
+            self._save_job(job)
+            return
+
+        body = json.dumps({k: v for k, v in job.items() if k != "application"}, default=str).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if settings.analysis_job_callback_secret:
+            digest = hmac.new(settings.analysis_job_callback_secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+            headers[SIGNATURE_HEADER] = f"sha256={digest}"
+
+        retries = max(0, settings.analysis_job_callback_retries)
+        for attempt in range(retries + 1):
+            job["callback_attempts"] += 1
+            try:
+                response = requests.post(
+                    job["callback_url"], data=body, headers=headers,
+                    timeout=settings.analysis_job_callback_timeout, allow_redirects=False
+                )
+                if 200 <= response.status_code < 300:
+                    job.update({"callback_status": CALLBACK_DELIVERED, "callback_error": None})
+                    break
+                job["callback_error"] = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                job["callback_error"] = str(e)
+            if attempt < retries:
+                time.sleep(2 ** attempt)
+        else:
+            job["callback_status"] = CALLBACK_FAILED
+            logger.warning(f"Callback for analysis job {job['job_id']} failed: {job['callback_error']}")
+        self._save_job(job)
+
+
+# Singleton instance
+_analysis_job_service: Optional[AnalysisJobService] = None
+
+
+def get_analysis_job_service() -> AnalysisJobService:
+    """
+    Get or create the singleton AnalysisJobService instance.
+
+    Returns:
+        AnalysisJobService instance
+    """
+    global _analysis_job_service
+    if _analysis_job_service is None:
+        _analysis_job_service = AnalysisJobService()
+    return _analysis_job_service
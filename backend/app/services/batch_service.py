@@ -0,0 +1,390 @@
+"""
+Batch Analysis Service - Bulk Compliance Analysis Jobs
+Runs compliance analysis over uploaded backlogs of applications.
+
+Responsibilities:
+- Parse JSONL or CSV uploads into validated applications
+- Persist each job (input, status, JSONL output) under data/batch_jobs
+- Embed and retrieve a whole chunk of applications at once, skipping
+  applications whose report is already cached
+- Analyse applications concurrently through the LLM scheduler
+- Stream results to the job's JSONL output as they complete
+- Resume unfinished jobs whose owning process has died (restart, crash,
+  or a replaced worker process)
+- Report throughput in applications per minute
+
+Job directory layout:
+    <job_id>/job.json      status and counters
+    <job_id>/input.jsonl   {"index": i, "application": {...}} per line
+    <job_id>/output.jsonl  {"index": i, "status": "ok" | "error", ...} per line
+"""
+
+from typing import Any, Dict, List, Optional, Set
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import csv
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.schemas import IndustrialApplication
+from app.services.compliance_service import get_compliance_service
+from app.services.job_queue import (
+    JOB_QUEUED, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED,
+    JobQueue, analyze_with_retries, claim_lock, current_owner, load_json, owner_alive, save_json
+)
+from app.services.llm_scheduler import LLMOverloadedError
+
+logger = logging.getLogger(__name__)
+
+
+def parse_applications(content: bytes, filename: str = "") -> List[Dict[str, Any]]:
+    """
+    Parse an upload into application records.
+
+    JSONL is one application object per line; CSV has a header row with the
+    IndustrialApplication field names. The format is taken from the file
+    extension, or sniffed from the first character.
+
+    Args:
+        content: Uploaded file bytes
+        filename: Uploaded file name
+
+    Returns:
+        List of {"application": {...}} or {"error": "..."} records, in input order
+
+    Raises:
+        ValueError: If the upload is empty or not valid UTF-8
+    """
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("Batch upload must be UTF-8 encoded JSONL or CSV")
+    if not text.strip():
+        raise ValueError("Batch upload is empty")
+
+    name = filename.lower()
+    is_jsonl = name.endswith((".jsonl", ".ndjson", ".json")) or (
+        not name.endswith(".csv") and text.lstrip().startswith("{")
+    )
+
+    raw_records: List[Any] = []
+    if is_jsonl:
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                raw_records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raw_records.append(ValueError(f"Line {line_number}: invalid JSON ({e.msg})"))
+    else:
+        raw_records.extend(csv.DictReader(io.StringIO(text)))
+
+    records = []
+    for raw in raw_records:
+        if isinstance(raw, Exception):
+            records.append({"error": str(raw)})
+            continue
+        if not isinstance(raw, dict):
+            records.append({"error": "Record is not an object"})
+            continue
+        try:
+            application = IndustrialApplication(**{k: v for k, v in raw.items() if k})
+            records.append({"application": application.dict()})
+        except ValidationError as e:
+            missing = ", ".join(str(err["loc"][0]) for err in e.errors())
+            records.append({"error": f"Invalid application (fields: {missing})"})
+    return records
+
+
+class BatchAnalysisService:
+    """
+    File-backed job queue for bulk compliance analysis.
+
+    Jobs run one at a time on a background worker thread; within a job,
+    applications are processed in chunks (one embedding batch and one
+    vector query per retrieval scope per chunk) and analysed concurrently.
+    """
+
+    def __init__(self, jobs_dir: str = None):
+        """
+        Initialize the service.
+
+        Args:
+            jobs_dir: Directory holding job directories (defaults to settings.batch_jobs_dir)
+        """
+        self.jobs_dir = jobs_dir or settings.batch_jobs_dir
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._queue = JobQueue(self._run_job, workers=1, name="batch-analysis", on_error=self._fail_job)
+
+    # --- Job files ---
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return load_json(os.path.join(self._job_dir(job_id), "job.json"))
+
+    def _save_job(self, job: Dict[str, Any]) -> None:
+        save_json(os.path.join(self._job_dir(job["job_id"]), "job.json"), job)
+
+    def output_path(self, job_id: str) -> str:
+        """Path of a job's JSONL output."""
+        return os.path.join(self._job_dir(job_id), "output.jsonl")
+
+    def _scan_output(self, job_id: str) -> Dict[str, Any]:
+        """
+        Recount a job's output: indices done, failures, cache hits.
+
+        A line torn by a crash is cut off so that appending resumes cleanly.
+        """
+        path = self.output_path(job_id)
+        done: Set[int] = set()
+        counts = {"done": done, "failed": 0, "cached": 0}
+        if not os.path.exists(path):
+            return counts
+        with open(path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                f.truncate(end)
+        for line in data[:end].splitlines():
+            try:
+                result = json.loads(line)
+                done.add(result["index"])
+            except (ValueError, KeyError):
+                continue
+            if result.get("status") == "error":
+                counts["failed"] += 1
+            elif (result.get("report") or {}).get("cache_status") == "cached":
+                counts["cached"] += 1
+        return counts
+
+    # --- Public API ---
+
+    def create_job(self, content: bytes, filename: str = "") -> Dict[str, Any]:
+        """
+        Create and enqueue a batch job.
+
+        Args:
+            content: Uploaded JSONL or CSV bytes
+            filename: Uploaded file name
+
+        Returns:
+            Job status dictionary
+
+        Raises:
+            ValueError: If the upload cannot be parsed
+        """
+        records = parse_applications(content, filename)
+        job_id = uuid.uuid4().hex
+        os.makedirs(self._job_dir(job_id))
+
+        invalid = 0
+        with open(os.path.join(self._job_dir(job_id), "input.jsonl"), "w", encoding="utf-8") as inputs, \
+                open(self.output_path(job_id), "w", encoding="utf-8") as outputs:
+            for index, record in enumerate(records):
+                if "error" in record:
+                    # Invalid rows are answered immediately
+                    outputs.write(json.dumps({"index": index, "status": "error", "error": record["error"]}) + "\n")
+                    invalid += 1
+                else:
+                    inputs.write(json.dumps({"index": index, "application": record["application"]}) + "\n")
+
+        job = {
+            "job_id": job_id,
+            "filename": filename,
+            "status": JOB_QUEUED,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "total": len(records),
+            "completed": invalid,
+            "failed": invalid,
+            "invalid": invalid,
+            "cached": 0,
+            "elapsed_seconds": 0.0,
+            "applications_per_minute": None,
+            "error": None,
+            "owner": current_owner()
+        }
+        self._save_job(job)
+        self._queue.enqueue(job_id)
+        logger.info(f"Created batch job {job_id}: {len(records)} applications ({invalid} invalid)")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job's status.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Job status dictionary, or None if unknown
+        """
+        if not job_id.isalnum():
+            return None
+        return self._load_job(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """All jobs, newest first."""
+        jobs = [self._load_job(job_id) for job_id in os.listdir(self.jobs_dir)]
+        return sorted((j for j in jobs if j), key=lambda j: j["created_at"], reverse=True)
+
+    def resume_jobs(self) -> int:
+        """
+        Claim and re-enqueue unfinished jobs whose owning process has died.
+
+        Jobs owned by another live process (e.g. another worker) are left
+        alone, so each job has exactly one writer.
+
+        Returns:
+            Number of jobs resumed
+        """
+        resumed = 0
+        with claim_lock(self.jobs_dir):
+            for job in reversed(self.list_jobs()):
+                if job["status"] in (JOB_QUEUED, JOB_RUNNING) and not owner_alive(job.get("owner")):
+                    job["owner"] = current_owner()
+                    self._save_job(job)
+                    self._queue.enqueue(job["job_id"])
+                    resumed += 1
+        if resumed:
+            logger.info(f"Resuming {resumed} unfinished batch jobs")
+        return resumed
+
+    # --- Worker ---
+
+    def _fail_job(self, job_id: str, error: Exception) -> None:
+        job = self._load_job(job_id)
+        if job is not None:
+            job.update({"status": JOB_FAILED, "error": str(error), "finished_at": datetime.utcnow().isoformat()})
+            self._save_job(job)
+
+    def _run_job(self, job_id: str) -> None:
+        """Process every application not yet in the job's output."""
+        job = self._load_job(job_id)
+        if job is None:
+            return
+
+        scan = self._scan_output(job_id)
+        done = scan["done"]
+        pending = []
+        with open(os.path.join(self._job_dir(job_id), "input.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["index"] not in done:
+                    pending.append(record)
+
+        job["status"] = JOB_RUNNING
+        job["started_at"] = job["started_at"] or datetime.utcnow().isoformat()
+        job.update({"completed": len(done), "failed": scan["failed"], "cached": scan["cached"]})
+        self._save_job(job)
+        logger.info(f"Batch job {job_id}: {len(pending)} of {job['total']} applications left")
+
+        compliance_service = get_compliance_service()
+        output_lock = threading.Lock()
+        run_started = time.monotonic()
+        elapsed_before = job.get("elapsed_seconds", 0.0)
+        chunk_size = max(1, settings.batch_analysis_chunk_size)
+
+        with open(self.output_path(job_id), "a", encoding="utf-8") as output, \
+                ThreadPoolExecutor(max_workers=max(1, settings.batch_analysis_workers),
+                                   thread_name_prefix=f"batch-{job_id[:8]}") as executor:
+            def write_result(record: Dict[str, Any], result: Dict[str, Any]) -> None:
+                result["index"] = record["index"]
+                with output_lock:
+                    output.write(json.dumps(result, default=str) + "\n")
+                    output.flush()
+                job["completed"] += 1
+                if result["status"] == "error":
+                    job["failed"] += 1
+                elif result["report"].get("cache_status") == "cached":
+                    job["cached"] += 1
+
+            for start in range(0, len(pending), chunk_size):
+                # Cached reports are written straight away; only the misses
+                # are retrieved for and analysed
+                misses = []
+                for record in pending[start:start + chunk_size]:
+                    cached = compliance_service.cached_report(record["application"])
+                    if cached is None:
+                        misses.append(record)
+                    else:
+                        write_result(record, {"status": "ok", "report": json.loads(cached.json())})
+
+                retrieved = compliance_service.retrieve_regulations_batch([r["application"] for r in misses])
+                futures = {
+                    executor.submit(self._analyze_one, compliance_service, record["application"], scope): record
+                    for record, scope in zip(misses, retrieved)
+                }
+                for future in as_completed(futures):
+                    write_result(futures[future], future.result())
+
+                # Progress and throughput after every chunk
+                os.fsync(output.fileno())
+                self._update_throughput(job, elapsed_before, run_started)
+                self._save_job(job)
+
+        self._update_throughput(job, elapsed_before, run_started)
+        job["status"] = JOB_COMPLETED
+        job["finished_at"] = datetime.utcnow().isoformat()
+        self._save_job(job)
+        logger.info(
+            f"Batch job {job_id} complete: {job['completed']} applications, "
+            f"{job['failed']} failed, {job['applications_per_minute']} applications/minute"
+        )
+
+    @staticmethod
+    def _update_throughput(job: Dict[str, Any], elapsed_before: float, run_started: float) -> None:
+        """Accumulate job run time and recompute applications per minute."""
+        elapsed = elapsed_before + (time.monotonic() - run_started)
+        job["elapsed_seconds"] = round(elapsed, 1)
+        # Analysed applications (invalid rows are answered at upload), across runs
+        processed = job["completed"] - job.get("invalid", 0)
+        job["applications_per_minute"] = round(processed * 60.0 / elapsed, 2) if elapsed > 0 else None
+
+    @staticmethod
+    def _analyze_one(
+        compliance_service: Any,
+        application: Dict[str, Any],
+        retrieved: Dict[str, List[str]]
+    ) -> Dict[str, Any]:
+        """
+        Analyse one application, waiting out LLM overload.
+
+        Returns:
+            Output record (without the index)
+        """
+        try:
+            report = analyze_with_retries(compliance_service, application, retrieved)
+            return {"status": "ok", "report": json.loads(report.json())}
+        except LLMOverloadedError as e:
+            return {"status": "error", "error": f"LLM overloaded: {e}"}
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+
+
+# Singleton instance
+_batch_service: Optional[BatchAnalysisService] = None
+
+
+def get_batch_service() -> BatchAnalysisService:
+    """
+    Get or create the singleton BatchAnalysisService instance.
+
+    Returns:
+        BatchAnalysisService instance
+    """
+    global _batch_service
+    if _batch_service is None:
+        _batch_service = BatchAnalysisService()
+    return _batch_service
@@ -0,0 +1,170 @@
+"""
+Compliance Facets - Retrieval Scopes and Facets
+Shared definitions of how applications are split for retrieval.
+
+Responsibilities:
+- Department scopes (metadata filters) for fan-out analysis
+- The application fields each department's analysis depends on
+- Compliance facets (field groups with a focus line), one query each
+- Facet query construction, for application queries and for the
+  application-independent queries of the ingest-time routing index
+- Scope query construction for the cross-encoder reranker
+"""
+
+from typing import Any, Dict, List, Optional
+
+# Retrieval scope key of the single-prompt (non fan-out) analysis
+ALL_DEPARTMENTS = "all"
+
+# Department scopes for fan-out analysis: "department" metadata values set
+# at ingest (subdirectories of data/regulations)
+DEPARTMENT_SCOPES = {
+    "environment": {"metadata": ["environment", "Environment", "pollution_control", "General"]},
+    "fire": {"metadata": ["fire", "Fire", "fire_safety", "Fire Safety", "General"]},
+    "local_body": {"metadata": ["local_body", "Local Body", "building", "General"]}
+}
+
+# Compliance facets: one retrieval query each, so that a single blurry
+# embedding of the whole application does not miss fire or groundwater
+# clauses.
+# - fields: application fields quoted in the facet query
+# - focus: what the facet's regulations are about
+# - departments: fan-out scopes the facet is retrieved for
+COMPLIANCE_FACETS = {
+    "water": {
+        "fields": ["water_source", "drainage"],
+        "focus": "Water source approval, effluent discharge and treatment requirements.",
+        "departments": ["environment"]
+    },
+    "groundwater": {
+        "fields": ["water_level_depth", "water_source"],
+        "focus": "Groundwater level depth, extraction limits and rainwater harvesting requirements.",
+        "departments": ["environment"]
+    },
+    "air": {
+        "fields": ["air_pollution"],
+        "focus": "Air pollution control equipment and emission monitoring requirements.",
+        "departments": ["environment"]
+    },
+    "waste": {
+        "fields": ["waste_management"],
+        "focus": "Hazardous and solid waste segregation, disposal and record keeping requirements.",
+        "departments": ["environment", "fire"]
+    },
+    "fire": {
+        "fields": ["square_feet"],
+        "focus": "Fire extinguishers, emergency exits, fire safety certificate and hazardous material storage.",
+        "departments": ["fire"]
+    },
+    "location": {
+        "fields": ["nearby_homes", "square_feet"],
+        "focus": "Distance from residential areas and water bodies, buffer zones and building requirements.",
+        "departments": ["local_body"]
+    }
+}
+
+
+def scope_facets(scope: str) -> List[str]:
+    """
+    Compliance facets retrieved for a scope.
+
+    Args:
+        scope: "all" or a department name
+
+    Returns:
+        Facet names
+    """
+    if scope == ALL_DEPARTMENTS:
+        return list(COMPLIANCE_FACETS)
+    return [name for name, facet in COMPLIANCE_FACETS.items() if scope in facet["departments"]]
+
+
+def department_fields(department: str) -> List[str]:
+    """
+    Application fields a department-scoped analysis depends on.
+
+    The department prompt and retrieval only see these fields, so a
+    department's result can be reused while they are unchanged.
+
+    Args:
+        department: Department name (see DEPARTMENT_SCOPES)
+
+    Returns:
+        Field names, industry_name first
+    """
+    fields = ["industry_name"]
+    for facet in scope_facets(department):
+        fields.extend(f for f in COMPLIANCE_FACETS[facet]["fields"] if f not in fields)
+    return fields
+
+
+def scope_filter(scope: str) -> Optional[Dict[str, Any]]:
+    """
+    Vector store metadata filter of a scope.
+
+    Args:
+        scope: "all" or a department name
+
+    Returns:
+        Chroma where clause, or None for "all"
+    """
+    if scope == ALL_DEPARTMENTS:
+        return None
+    return {"department": {"$in": DEPARTMENT_SCOPES[scope]["metadata"]}}
+
+
+def facet_query(facet: str, application_data: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build the search query of one compliance facet.
+
+    Args:
+        facet: Facet name (see COMPLIANCE_FACETS)
+        application_data: Application details; None builds the generic
+            query (field names only) used by the routing index
+
+    Returns:
+        Search query string
+    """
+    spec = COMPLIANCE_FACETS[facet]
+    if application_data is None:
+        labels = ". ".join(field.replace("_", " ").capitalize() for field in spec["fields"])
+        return f"{labels}. {spec['focus']}"
+
+    details = " ".join(
+        f"{field.replace('_', ' ').capitalize()}: {application_data.get(field)}."
+        for field in spec["fields"]
+        if application_data.get(field)
+    )
+    return " ".join(
+        part for part in (
+            f"Industrial application for {application_data.get('industry_name', '')}.", details, spec["focus"]
+        ) if part
+    )
+
+
+def scope_query(scope: str, application_data: Dict[str, Any]) -> str:
+    """
+    Build one query covering every facet of a scope (reranker query).
+
+    Args:
+        scope: "all" or a department name
+        application_data: Application details
+
+    Returns:
+        Query string: the application's scope fields, then the facet focus lines
+    """
+    facets = scope_facets(scope)
+    fields: List[str] = []
+    for facet in facets:
+        fields.extend(f for f in COMPLIANCE_FACETS[facet]["fields"] if f not in fields)
+    details = " ".join(
+        f"{field.replace('_', ' ').capitalize()}: {application_data.get(field)}."
+        for field in fields
+        if application_data.get(field)
+    )
+    focus = " ".join(COMPLIANCE_FACETS[facet]["focus"] for facet in facets)
+    return " ".join(
+        part for part in (
+            f"Industrial application for {application_data.get('industry_name', '')}.", details, focus
+        ) if part
+    )
@@ -4,10 +4,13 @@ Orchestrates compliance analysis workflow with human-in-the-loop principles.
 
 Responsibilities:
 - Coordinate document analysis
-- Retrieve relevant regulations from vector store
+- Pre-screen numeric thresholds with the deterministic rules engine
+- Retrieve relevant regulations from vector store (one query per
+  compliance facet, embedded and searched in batches, fused by rank)
 - Generate compliance reports using LLM
 - Calculate confidence scores and risk levels
 - Implement safety fallbacks
+- Cache reports per application, corpus generation and analysis version
 
 Reference: Inspired by OLD/RagBot/server.py generate_industrial_compliance_report 
           function (lines 109-131), redesigned for structured compliance analysis
@@ -15,13 +18,34 @@ Reference: Inspired by OLD/RagBot/server.py generate_industrial_compliance_repor
 Phase 3: IMPLEMENTED - Full compliance analysis with LLM reasoning
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import numpy as np
+import json
 import logging
+import re
 from datetime import datetime
+from app.core.config import settings
 from app.models.schemas import ComplianceReport, ComplianceIssue
 from app.services.embedding_service import get_embedding_service
 from app.services.vector_store_service import get_vector_store_service
 from app.services.llm_service import get_llm_service
+from app.services.llm_scheduler import LLMOverloadedError
+from app.services.rules_engine import get_rules_engine, RuleScreen
+from app.services.compliance_facets import (
+    ALL_DEPARTMENTS,
+    DEPARTMENT_SCOPES,
+    department_fields,
+    facet_query,
+    scope_query,
+    scope_facets,
+    scope_filter
+)
+from app.services.prompt_templates import get_prompt_template
+from app.services.report_cache import ReportCache, report_cache_key
+from app.services.routing_index import get_routing_index
+from app.services.reranker_service import get_reranker_service
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +70,71 @@ FALLBACK_RESPONSE = {
     "checklist": ["Submit application for manual review by compliance officer"]
 }
 
+# Reciprocal rank fusion constant (higher = flatter weighting of ranks)
+RRF_K = 60
+
+
+
+def fuse_rankings(rankings: List[List[Tuple[str, str]]], k: int = RRF_K) -> List[Tuple[str, str]]:
+    """
+    Fuse ranked result lists with reciprocal rank fusion.
+    
+    Args:
+        rankings: Per query, (id, text) pairs best match first
+        k: RRF constant
+        
+    Returns:
+        De-duplicated (id, text) pairs, best fused score first
+    """
+    scores: Dict[str, float] = {}
+    texts: Dict[str, str] = {}
+    for ranking in rankings:
+        for rank, (doc_id, text) in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+            texts.setdefault(doc_id, text)
+    return [(doc_id, texts[doc_id]) for doc_id in sorted(scores, key=lambda d: scores[d], reverse=True)]
+
+
+def mmr_select(embeddings: np.ndarray, relevance: np.ndarray, k: int, lambda_mult: float = 0.7) -> List[int]:
+    """
+    Pick k diverse candidates by maximal marginal relevance.
+    
+    Each step takes the candidate maximising
+    lambda * relevance - (1 - lambda) * max similarity to those already picked,
+    so near-duplicate (overlapping) chunks give way to other clauses.
+    
+    Args:
+        embeddings: (n x dimension) candidate embeddings
+        relevance: (n,) relevance scores in [0, 1]
+        k: Number of candidates to pick
+        lambda_mult: Relevance weight (1 = relevance only)
+        
+    Returns:
+        Indices of the picked candidates, in pick order
+    """
+    n = len(relevance)
+    if n <= k:
+        return list(range(n))
+    unit = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    similarity = unit @ unit.T
+    picked = [int(np.argmax(relevance))]
+    max_similarity = similarity[picked[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[picked[0]] = False
+    while len(picked) < k:
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return picked
+
+
+# Most severe status wins when department results are merged
+STATUS_SEVERITY = {"compliant": 0, "partially_compliant": 1, "needs_human_review": 2, "non_compliant": 3}
+RISK_RANK = {"low": 0, "medium": 1, "high": 2}
+
 
 class ComplianceService:
     """
@@ -63,50 +152,197 @@ class ComplianceService:
         self.embedding_service = get_embedding_service()
         self.vector_store = get_vector_store_service()
         self.llm_service = get_llm_service()
+        self.department_fanout = settings.compliance_department_fanout
+        self.rules_engine = get_rules_engine() if settings.compliance_rules_enabled else None
+        self.routing_index = get_routing_index() if settings.routing_index_enabled else None
+        self.reranker = get_reranker_service() if settings.reranker_enabled else None
+        self._department_executor: Optional[ThreadPoolExecutor] = None
+        self.report_cache = ReportCache(
+            settings.report_cache_max_entries, settings.report_cache_ttl_seconds
+        ) if settings.report_cache_enabled else None
+        self.partial_cache = ReportCache(
+            settings.partial_cache_max_entries, settings.report_cache_ttl_seconds
+        ) if settings.partial_cache_enabled else None
+        self._prompt_version = self._compute_prompt_version()
         logger.info("ComplianceService initialized with LLM integration")
     
-    def analyze_application(self, application_data: Dict[str, Any]) -> ComplianceReport:
+    def analyze_application(
+        self,
+        application_data: Dict[str, Any],
+        retrieved: Optional[Dict[str, List[str]]] = None
+    ) -> ComplianceReport:
         """
         Analyze an industrial application for regulatory compliance.
         
+        Reports are cached by the normalised application fields, the vector
+        store generation and the analysis version; re-ingesting regulations
+        or changing prompts, models or rules invalidates them. Degraded
+        (fallback) reports are never cached. The report's cache_status is
+        "cached" or "fresh".
+        
+        Args:
+            application_data: Dictionary containing application details
+            retrieved: Regulations already retrieved for this application by
+                retrieve_regulations_batch() (batch jobs); retrieved here if None
+            
+        Returns:
+            ComplianceReport with analysis results
+            
+        Raises:
+            LLMOverloadedError: If the LLM is saturated (caller should retry later)
+        """
+        if self.report_cache is None:
+            return self._analyze(application_data, retrieved)
+        
+        cached = self.cached_report(application_data)
+        if cached is not None:
+            return cached
+        
+        generation = self.vector_store.get_generation()
+        key = report_cache_key(application_data, generation, self.analysis_version())
+        report = self._analyze(application_data, retrieved)
+        report.cache_status = "fresh"
+        if not self._is_degraded(report):
+            self.report_cache.put(key, report.copy(deep=True))
+        return report
+    
+    def cached_report(self, application_data: Dict[str, Any]) -> Optional[ComplianceReport]:
+        """
+        Cached report for an application, without analysing it.
+        
+        Lets batch jobs skip regulation retrieval for applications that are
+        already cached.
+        
+        Args:
+            application_data: Dictionary containing application details
+            
+        Returns:
+            The cached report (cache_status "cached"), or None on a miss or
+            with the report cache disabled
+        """
+        if self.report_cache is None:
+            return None
+        
+        generation = self.vector_store.get_generation()
+        self.report_cache.sync_generation(generation)
+        cached = self.report_cache.get(report_cache_key(application_data, generation, self.analysis_version()))
+        if cached is None:
+            return None
+        logger.info(f"Report cache hit for: {application_data.get('industry_name', 'Unknown')}")
+        return cached.copy(update={"cache_status": "cached"}, deep=True)
+    
+    def analysis_version(self) -> str:
+        """
+        Fingerprint of everything besides the application and corpus that
+        shapes a report: prompts, models, output settings and rules.
+        
+        Returns:
+            Hex digest
+        """
+        rules = self.rules_engine.fingerprint if self.rules_engine else ""
+        return hashlib.sha1(f"{self._prompt_version}:{rules}".encode("utf-8")).hexdigest()
+    
+    def _compute_prompt_version(self) -> str:
+        """Fingerprint of the analysis prompts, models and analysis settings."""
+        templates = [get_prompt_template(name) for name in ("compliance_analysis", "department_compliance_analysis")]
+        payload = json.dumps({
+            "prompts": [[t.system, t.user] for t in templates],
+            "local_model": settings.llm_model_name,
+            "openai_model": settings.openai_model if settings.use_openai_fallback else None,
+            "structured_output": settings.llm_structured_output_level,
+            "context_window": settings.llm_context_window,
+            "fanout": self.department_fanout,
+            "department_chunks": settings.compliance_department_chunks,
+            "department_max_tokens": settings.compliance_department_max_tokens,
+            "reranker": [settings.reranker_model_name, settings.reranker_candidates] if self.reranker else None,
+            "mmr": [settings.retrieval_mmr_candidates, settings.retrieval_mmr_lambda] if settings.retrieval_mmr_enabled else None
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _is_degraded(report: ComplianceReport) -> bool:
+        """True for fallback reports (analysis failed; must not be cached)."""
+        return any(
+            issue.regulation_reference and issue.regulation_reference.startswith("System Error")
+            for issue in report.issues
+        )
+    
+    @staticmethod
+    def _is_degraded_output(llm_output: Dict[str, Any]) -> bool:
+        """True for safe-default LLM outputs (analysis failed; must not be cached)."""
+        return any(
+            str((issue.get("regulation_reference") or {}).get("name", "")).startswith("System Error")
+            for issue in llm_output.get("issues", [])
+            if isinstance(issue, dict)
+        )
+    
+    def _analyze(
+        self,
+        application_data: Dict[str, Any],
+        retrieved: Optional[Dict[str, List[str]]] = None
+    ) -> ComplianceReport:
+        """
+        Run the compliance analysis (uncached).
+        
         Workflow:
+        0. Pre-screen numeric thresholds with the rules engine (applications
+           violating a blocking rule are answered here, without the LLM)
         1. Extract key details from application
         2. Query vector store for relevant regulations
         3. Use LLM to analyze compliance
         4. Validate and structure output
         5. Return compliance report
         
+        With department fan-out enabled, steps 1-3 run once per department
+        (scoped retrieval, smaller prompt) concurrently and the results are
+        merged before step 4; departments whose fields are unchanged since
+        an earlier analysis reuse their partial result. The LLM sees only
+        the residue of the rule pre-screen; rule issues are merged into its
+        output.
+        
         SAFETY: If any step fails, returns "needs_human_review" status
         
         Args:
             application_data: Dictionary containing application details
+            retrieved: Pre-retrieved regulations per scope (see retrieve_regulations_batch)
             
         Returns:
             ComplianceReport with analysis results
+            
+        Raises:
+            LLMOverloadedError: If the LLM is saturated (caller should retry later)
         """
         try:
             logger.info(f"Starting compliance analysis for: {application_data.get('industry_name', 'Unknown')}")
             
-            # Step 1: Build search query from application
-            query_text = self._build_search_query(application_data)
-            
-            # Step 2: Retrieve relevant regulations
-            relevant_regulations = self._retrieve_regulations(query_text)
-            
-            if not relevant_regulations:
-                logger.warning("No regulations retrieved - using fallback")
-                return self._create_fallback_report("No relevant regulations found in database")
+            # Step 0: Deterministic pre-screen
+            screen = self.rules_engine.screen(application_data) if self.rules_engine else None
+            if screen is not None and screen.blocking and settings.compliance_rules_short_circuit:
+                logger.info("Blocking rule violated - answering without the LLM")
+                return self._validate_and_convert_output(screen.to_report(), application_data)
+            llm_input = screen.residue(application_data) if screen is not None else application_data
             
-            # Step 3: Generate compliance analysis using LLM
+            # Steps 1-3: Retrieve regulations and analyse them with the LLM
             try:
-                llm_output = self.llm_service.generate_compliance_analysis(
-                    application_details=application_data,
-                    relevant_regulations=relevant_regulations
-                )
+                if self.department_fanout:
+                    llm_output = self._analyze_by_department(application_data, llm_input, retrieved)
+                else:
+                    if retrieved is None:
+                        retrieved = self.retrieve_regulations_batch([application_data])[0]
+                    llm_output = self._analyze_combined(llm_input, retrieved)
+            except LLMOverloadedError:
+                raise
             except Exception as e:
                 logger.error(f"LLM analysis failed: {e}")
                 return self._create_fallback_report(f"LLM analysis error: {str(e)}")
             
+            if llm_output is None:
+                logger.warning("No regulations retrieved - using fallback")
+                return self._create_fallback_report("No relevant regulations found in database")
+            
+            if screen is not None:
+                llm_output = self._apply_rule_screen(llm_output, screen)
+            
             # Step 4: Validate and convert to ComplianceReport
             try:
                 report = self._validate_and_convert_output(llm_output, application_data)
@@ -116,65 +352,449 @@ class ComplianceService:
                 logger.error(f"Output validation failed: {e}")
                 return self._create_fallback_report(f"Invalid LLM output: {str(e)}")
                 
+        except LLMOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Compliance analysis failed: {e}")
             return self._create_fallback_report(f"System error: {str(e)}")
     
-    def _build_search_query(self, application_data: Dict[str, Any]) -> str:
+    def retrieve_regulations_batch(
+        self,
+        applications: List[Dict[str, Any]],
+        scopes: Optional[List[str]] = None
+    ) -> List[Dict[str, List[str]]]:
         """
-        Build a search query from application data.
+        Retrieve regulations for several applications at once.
+        
+        Each application gets one query per compliance facet (per
+        department with fan-out). Every query is embedded in a single
+        encode_batch call. When the routing index matches the corpus, each
+        query just reranks its facet's precomputed candidates; otherwise
+        each retrieval scope is searched with one batched vector query.
+        The facet result lists are fused by reciprocal rank and
+        de-duplicated. With the reranker enabled, each scope retrieves
+        reranker_candidates chunks and a cross-encoder keeps the ones that
+        fit the prompt. With MMR enabled, the final chunks are picked for
+        diversity from a deeper candidate list, so overlapping neighbours
+        of one section do not crowd out other clauses.
         
         Args:
-            application_data: Application details
+            applications: Application details
+            scopes: Retrieval scopes (defaults to every department with
+                fan-out, otherwise "all")
             
         Returns:
-            Search query string
-        """
-        # Extract key compliance-relevant fields
-        industry_name = application_data.get("industry_name", "")
-        water_source = application_data.get("water_source", "")
-        waste_management = application_data.get("waste_management", "")
-        air_pollution = application_data.get("air_pollution", "")
-        
-        query = f"""
-        Industrial application for {industry_name}.
-        Water source: {water_source}.
-        Waste management: {waste_management}.
-        Air pollution control: {air_pollution}.
-        Requirements for fire safety, environmental clearance, building standards.
-        """.strip()
-        
-        logger.info(f"Built search query: {query[:100]}...")
-        return query
+            Per application: scope ("all", or department name) -> regulation
+            chunks, best match first, sized to the prompt budget
+        """
+        if scopes is None:
+            scopes = list(DEPARTMENT_SCOPES) if self.department_fanout else [ALL_DEPARTMENTS]
+        retrieved: List[Dict[str, List[str]]] = [{} for _ in applications]
+        if not applications:
+            return retrieved
+        
+        # Step 1: Build and embed every facet query: (application, scope, facet, query)
+        plan: List[Tuple[int, str, str, str]] = [
+            (i, scope, facet, facet_query(facet, application))
+            for i, application in enumerate(applications)
+            for scope in scopes
+            for facet in scope_facets(scope)
+        ]
+        try:
+            embeddings = self.embedding_service.encode_batch([query for *_, query in plan])
+        except Exception as e:
+            logger.error(f"Query embedding failed: {e}")
+            return retrieved
+        
+        generation = self.vector_store.get_generation()
+        routed = self.routing_index is not None and self.routing_index.is_current(generation)
+        
+        # Step 2: Retrieve as many regulations as each prompt budget can hold
+        for scope in scopes:
+            rows = [k for k, (_, row_scope, _, _) in enumerate(plan) if row_scope == scope]
+            where = scope_filter(scope)
+            if scope == ALL_DEPARTMENTS:
+                capacities = [self.llm_service.regulation_chunk_capacity(a) for a in applications]
+            else:
+                capacities = [
+                    self.llm_service.regulation_chunk_capacity(a, settings.compliance_department_chunks, scope)
+                    for a in applications
+                ]
+            # Retrieve broadly when the reranker narrows the prompt afterwards
+            depth = max(capacities)
+            if self.reranker is not None:
+                depth = max(depth, settings.reranker_candidates)
+            if settings.retrieval_mmr_enabled:
+                depth = max(depth, settings.retrieval_mmr_candidates)
+            
+            if routed:
+                # Dictionary lookup plus a (candidates x dimension) dot product
+                results = [
+                    self.routing_index.rank(plan[k][2], scope, embeddings[k], depth)
+                    for k in rows
+                ]
+            else:
+                results = self._query_regulations_batch([embeddings[k] for k in rows], depth, where)
+            rankings: Dict[int, List[List[Tuple[str, str]]]] = {}
+            for k, ranking in zip(rows, results):
+                rankings.setdefault(plan[k][0], []).append(ranking)
+            
+            if where is not None:
+                # Corpus not organised by department: rely on the focused queries
+                empty = [k for k in rows if not any(rankings.get(plan[k][0], []))]
+                if empty:
+                    fallback = self._query_regulations_batch([embeddings[k] for k in empty], depth)
+                    for k, ranking in zip(empty, fallback):
+                        rankings[plan[k][0]] = [r for r in rankings[plan[k][0]] if r] + [ranking]
+            
+            fused = {i: fuse_rankings(facet_rankings)[:depth] for i, facet_rankings in rankings.items()}
+            if self.reranker is not None and fused:
+                # With MMR the reranker orders the candidates, MMR picks them
+                top_k = [depth] * len(capacities) if settings.retrieval_mmr_enabled else capacities
+                fused = self._rerank(applications, scope, fused, top_k, generation)
+            if settings.retrieval_mmr_enabled and fused:
+                fused = self._diversify(fused, capacities, routed)
+            for i, ranking in fused.items():
+                regulations = [text for _, text in ranking[:capacities[i]]]
+                if regulations:
+                    retrieved[i][scope] = regulations
+        return retrieved
     
-    def _retrieve_regulations(self, query: str, n_results: int = 10) -> List[str]:
+    def _rerank(
+        self,
+        applications: List[Dict[str, Any]],
+        scope: str,
+        fused: Dict[int, List[Tuple[str, str]]],
+        capacities: List[int],
+        generation: int
+    ) -> Dict[int, List[Tuple[str, str]]]:
         """
-        Retrieve relevant regulation chunks from vector store.
+        Rerank one scope's fused candidates with the cross-encoder.
+        
+        Falls back to the fused order if the reranker fails.
         
         Args:
-            query: Search query
-            n_results: Number of results to retrieve
+            applications: Application details
+            scope: Retrieval scope
+            fused: Per application index, fused (id, text) candidates
+            capacities: Per application, prompt chunk capacity
+            generation: Vector store generation
             
         Returns:
-            List of regulation text chunks
+            Per application index, the best candidates first
         """
+        indices = [i for i in fused if fused[i]]
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_service.encode(query)
+            reranked = self.reranker.rerank_many(
+                [scope_query(scope, applications[i]) for i in indices],
+                [fused[i] for i in indices],
+                [capacities[i] for i in indices],
+                generation
+            )
+        except Exception as e:
+            logger.error(f"Reranking failed, keeping fused order: {e}")
+            return fused
+        return dict(zip(indices, reranked))
+    
+    def _diversify(
+        self,
+        ranked: Dict[int, List[Tuple[str, str]]],
+        capacities: List[int],
+        routed: bool
+    ) -> Dict[int, List[Tuple[str, str]]]:
+        """
+        Pick each application's chunks by maximal marginal relevance.
+        
+        Relevance falls linearly with the rank from fusion (or the
+        reranker); similarity is the cosine of the chunk embeddings, taken
+        from the routing index or fetched from the vector store in one call.
+        Keeps the ranked order if embeddings are unavailable.
+        
+        Args:
+            ranked: Per application index, (id, text) candidates best first
+            capacities: Per application, prompt chunk capacity
+            routed: True if the routing index serves this corpus
+            
+        Returns:
+            Per application index, the picked candidates
+        """
+        ids = list({chunk_id for ranking in ranked.values() for chunk_id, _ in ranking})
+        vectors: Dict[str, np.ndarray] = self.routing_index.get_embeddings(ids) if routed else {}
+        missing = [chunk_id for chunk_id in ids if chunk_id not in vectors]
+        if missing:
+            try:
+                fetched = self.vector_store.get_by_ids(missing, include=["embeddings"])
+                vectors.update(zip(fetched["ids"], (np.asarray(e, dtype=np.float32) for e in fetched["embeddings"])))
+            except Exception as e:
+                logger.error(f"Embedding lookup for MMR failed, keeping ranked order: {e}")
+                return {i: ranking[:capacities[i]] for i, ranking in ranked.items()}
+        
+        diversified = {}
+        for i, ranking in ranked.items():
+            ranking = [pair for pair in ranking if pair[0] in vectors]
+            if len(ranking) <= capacities[i]:
+                diversified[i] = ranking
+                continue
+            relevance = 1.0 - np.arange(len(ranking), dtype=np.float32) / len(ranking)
+            embeddings = np.stack([vectors[chunk_id] for chunk_id, _ in ranking])
+            picked = mmr_select(embeddings, relevance, capacities[i], settings.retrieval_mmr_lambda)
+            diversified[i] = [ranking[j] for j in picked]
+        return diversified
+    
+    def _analyze_combined(
+        self,
+        application_data: Dict[str, Any],
+        retrieved: Dict[str, List[str]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Analyse all departments in a single LLM call.
+        
+        Args:
+            application_data: Application details (rule pre-screen residue)
+            retrieved: Retrieved regulations per scope
             
-            # Search vector store
-            results = self.vector_store.query(
-                query_embedding=query_embedding,
-                n_results=n_results
+        Returns:
+            LLM analysis dictionary, or None if no regulations were retrieved
+        """
+        relevant_regulations = retrieved.get(ALL_DEPARTMENTS)
+        if not relevant_regulations:
+            return None
+        
+        # Step 3: Generate compliance analysis using LLM
+        return self.llm_service.generate_compliance_analysis(
+            application_details=application_data,
+            relevant_regulations=relevant_regulations
+        )
+    
+    def _analyze_by_department(
+        self,
+        application_data: Dict[str, Any],
+        llm_input: Dict[str, Any],
+        retrieved: Optional[Dict[str, List[str]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Run one department-scoped analysis per department concurrently and
+        merge them.
+        
+        Each department gets its own query, a metadata-filtered retrieval
+        and a smaller prompt holding only its fields (see
+        department_fields). The LLM calls go through the LLM scheduler, so
+        with several slots or endpoints the latency is bounded by the
+        slowest department.
+        
+        Department results are cached by their fields, the corpus
+        generation and the analysis version, so re-analysing an edited
+        application only retrieves and analyses the departments whose
+        fields changed before re-merging.
+        
+        Args:
+            application_data: Application details (used for retrieval)
+            llm_input: Application details shown to the LLM (rule pre-screen residue)
+            retrieved: Pre-retrieved regulations per department (retrieved
+                here for the uncached departments if None)
+            
+        Returns:
+            Merged LLM analysis dictionary, or None if no regulations were retrieved
+            
+        Raises:
+            LLMOverloadedError: If a department analysis could not be admitted
+        """
+        views = {
+            department: {f: llm_input[f] for f in department_fields(department) if f in llm_input}
+            for department in DEPARTMENT_SCOPES
+        }
+        results: Dict[str, Dict[str, Any]] = {}
+        keys: Dict[str, str] = {}
+        if self.partial_cache is not None:
+            generation = self.vector_store.get_generation()
+            self.partial_cache.sync_generation(generation)
+            version = self.analysis_version()
+            for department, view in views.items():
+                keys[department] = report_cache_key(view, generation, f"{version}:{department}")
+                cached = self.partial_cache.get(keys[department])
+                if cached is not None:
+                    results[department] = cached
+        
+        pending = [d for d in DEPARTMENT_SCOPES if d not in results]
+        if pending:
+            if retrieved is None:
+                retrieved = self.retrieve_regulations_batch([application_data], pending)[0]
+            pending = [d for d in pending if retrieved.get(d)]
+        
+        executor = self._get_department_executor()
+        futures = {
+            department: executor.submit(
+                self.llm_service.generate_compliance_analysis,
+                views[department],
+                retrieved[department],
+                department
             )
+            for department in pending
+        }
+        try:
+            for department, future in futures.items():
+                results[department] = future.result()
+        except LLMOverloadedError:
+            for future in futures.values():
+                future.cancel()
+            raise
+        
+        if self.partial_cache is not None:
+            for department in futures:
+                if not self._is_degraded_output(results[department]):
+                    self.partial_cache.put(keys[department], results[department])
+        
+        if not results:
+            return None
+        reused = [d for d in results if d not in futures]
+        logger.info(
+            f"Department analyses complete: {', '.join(futures) or 'none'} analysed"
+            f"{', ' + ', '.join(reused) + ' reused' if reused else ''}"
+        )
+        return self._merge_department_results(results)
+    
+    def _merge_department_results(self, results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge department-scoped analyses into one analysis.
+        
+        The most severe status and the lowest confidence win; issues are
+        de-duplicated by regulation clause (or explanation), keeping the
+        highest risk level; checklist items are de-duplicated in order.
+        
+        Args:
+            results: Department name -> LLM analysis dictionary
             
-            regulations = results.get("documents", [])
-            logger.info(f"Retrieved {len(regulations)} regulation chunks")
-            return regulations
+        Returns:
+            Merged analysis in the compliance report schema
+        """
+        statuses = [r.get("overall_status", "needs_human_review") for r in results.values()]
+        status = max(statuses, key=lambda s: STATUS_SEVERITY.get(s, STATUS_SEVERITY["needs_human_review"]))
+        
+        issues: Dict[tuple, Dict[str, Any]] = {}
+        checklist: List[str] = []
+        seen_items = set()
+        for department, result in results.items():
+            for issue in result.get("issues", []):
+                issue = dict(issue)
+                if issue.get("department") in (None, "", "other"):
+                    issue["department"] = department
+                key = self._issue_key(issue)
+                existing = issues.get(key)
+                if existing is None or RISK_RANK.get(issue.get("risk_level"), 1) > RISK_RANK.get(existing.get("risk_level"), 1):
+                    issues[key] = issue
+            for item in result.get("checklist", []):
+                normalized = self._normalize(item)
+                if normalized and normalized not in seen_items:
+                    seen_items.add(normalized)
+                    checklist.append(item)
+        
+        count = len(results)
+        return {
+            "overall_status": status,
+            "confidence_score": min(r.get("confidence_score", 0) for r in results.values()),
+            "time_saved_minutes": sum(r.get("time_saved_minutes", 0) for r in results.values()),
+            "regulation_coverage_percent": sum(r.get("regulation_coverage_percent", 0) for r in results.values()) / count,
+            "issues": list(issues.values()),
+            "checklist": checklist
+        }
+    
+    def _apply_rule_screen(self, llm_output: Dict[str, Any], screen: RuleScreen) -> Dict[str, Any]:
+        """
+        Merge rule findings into an LLM analysis.
+        
+        Rule issues come first and replace LLM violations cited against a
+        clause the rules decided; a rule violation raises the status to at
+        least partially compliant (non compliant if high risk).
+        
+        Args:
+            llm_output: LLM analysis dictionary
+            screen: Rule pre-screen of the same application
             
+        Returns:
+            Merged analysis dictionary
+        """
+        decided = {(self._normalize(name), self._normalize(clause)) for name, clause in screen.decided_clauses}
+        llm_issues = [
+            issue for issue in llm_output.get("issues", [])
+            if not (
+                issue.get("type") == "violation"
+                and (
+                    self._normalize((issue.get("regulation_reference") or {}).get("name", "")),
+                    self._normalize((issue.get("regulation_reference") or {}).get("clause", ""))
+                ) in decided
+            )
+        ]
+        
+        status = llm_output.get("overall_status", "needs_human_review")
+        for finding in screen.violations:
+            floor = "non_compliant" if finding.rule.risk_level == "high" else "partially_compliant"
+            if STATUS_SEVERITY.get(floor, 0) > STATUS_SEVERITY.get(status, 0):
+                status = floor
+        
+        checklist = screen.checklist()
+        seen = {self._normalize(item) for item in checklist}
+        for item in llm_output.get("checklist", []):
+            if self._normalize(item) not in seen:
+                seen.add(self._normalize(item))
+                checklist.append(item)
+        
+        merged = dict(llm_output)
+        merged.update({"overall_status": status, "issues": screen.issues() + llm_issues, "checklist": checklist})
+        return merged
+    
+    def _issue_key(self, issue: Dict[str, Any]) -> tuple:
+        """De-duplication key: issue type plus regulation clause, or explanation if no clause."""
+        reference = issue.get("regulation_reference") or {}
+        clause = self._normalize(reference.get("clause", ""))
+        if clause and clause != "n a":
+            return (issue.get("type"), self._normalize(reference.get("name", "")), clause)
+        return (issue.get("type"), self._normalize(issue.get("explanation", ""))[:80])
+    
+    @staticmethod
+    def _normalize(text: Any) -> str:
+        """Lowercase and collapse punctuation/whitespace for comparisons."""
+        return re.sub(r"[^a-z0-9]+", " ", str(text).lower()).strip()
+    
+    def _get_department_executor(self) -> ThreadPoolExecutor:
+        """Create the department fan-out thread pool on first use."""
+        if self._department_executor is None:
+            self._department_executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.compliance_department_workers),
+                thread_name_prefix="compliance-dept"
+            )
+        return self._department_executor
+    
+    def _query_regulations_batch(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[str, str]]]:
+        """
+        Search the vector store with several query embeddings at once.
+        
+        Args:
+            query_embeddings: Query embedding vectors
+            n_results: Number of results per query
+            where: Optional metadata filter
+            
+        Returns:
+            (chunk id, regulation text) pairs per query, best match first
+            (empty lists on failure)
+        """
+        try:
+            results = self.vector_store.query_batch(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where
+            )
+            return [
+                list(zip(r.get("ids") or r.get("documents", []), r.get("documents", [])))
+                for r in results
+            ]
         except Exception as e:
             logger.error(f"Regulation retrieval failed: {e}")
-            return []
+            return [[] for _ in query_embeddings]
     
     def _validate_and_convert_output(
         self, 
@@ -0,0 +1,516 @@
+"""
+Compressed Index - IVF-PQ Vector Index with Exact Re-scoring
+NumPy inverted-file, product-quantised index that answers queries without
+Chroma: with VECTOR_STORE_INDEX=ivfpq the vector store serves searches from
+these files alone, so Chroma's HNSW graph and float32 embeddings are never
+loaded into the serving processes (bench_compressed_index.py --store N
+compares process RSS against chroma mode).
+
+Responsibilities:
+- Train coarse centroids (k-means) and PQ codebooks from the store's embeddings
+- Keep every array in its own .npy file opened read-only via mmap, so the
+  page cache is shared by all worker processes on a host (PQ codes, one
+  byte per sub-vector, stay resident; float vectors are paged in on demand)
+- Keep ids, documents and metadata off-heap in a row file read by offset,
+  and filterable metadata fields as mapped per-row value codes
+- Search the nprobe closest inverted lists with asymmetric distance
+  tables, then re-score a shortlist exactly from the mapped vectors
+- Apply simple metadata filters (equality, $eq, $in, $and) to candidates
+- Refuse to serve when the corpus generation or embedding model changed
+
+Files (in <vector_store>/compressed_index):
+    vectors.npy        float32 (n x dimension), unit-normalised
+    centroids.npy, codebooks.npy, codes.npy, list_rows.npy, list_offsets.npy
+    rows.bin           one UTF-8 JSON [id, document, metadata] per row
+    row_offsets.npy    int64 (n + 1) byte offsets into rows.bin
+    filter_<k>.npy     int32 value code per row for one metadata field
+    meta.json          generation, model, count, filter field values (written last)
+
+Files are replaced atomically (write + rename), never rewritten in place, so
+a worker still mapping the previous build keeps a valid view until it reloads.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Training sample cap per k-means run (points)
+MAX_TRAINING_POINTS = 65536
+
+# Index arrays, one memory-mapped .npy file each
+ARRAYS = ["vectors", "centroids", "codebooks", "codes", "list_rows", "list_offsets", "row_offsets"]
+
+# Metadata fields with at most this many distinct values get a filter column
+# (department, regulation_name, ...); filters on other fields use Chroma
+MAX_FILTER_VALUES = 4096
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def _nearest(points: np.ndarray, centroids: np.ndarray, batch: int = 8192) -> np.ndarray:
+    """Index of the nearest centroid (L2) for every point, in batches."""
+    half_norms = 0.5 * (centroids ** 2).sum(axis=1)
+    labels = np.empty(len(points), dtype=np.int32)
+    for start in range(0, len(points), batch):
+        block = points[start:start + batch]
+        labels[start:start + batch] = np.argmax(block @ centroids.T - half_norms, axis=1)
+    return labels
+
+
+def kmeans(points: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    Lloyd's k-means on a sample of the points.
+
+    Args:
+        points: (n x dimension) float32 points
+        k: Number of centroids (capped at n)
+        iterations: Lloyd iterations
+        seed: Random seed (sampling and initialisation)
+
+    Returns:
+        (k x dimension) centroids
+    """
+    rng = np.random.default_rng(seed)
+    if len(points) > MAX_TRAINING_POINTS:
+        points = points[rng.choice(len(points), MAX_TRAINING_POINTS, replace=False)]
+    k = min(k, len(points))
+    centroids = points[rng.choice(len(points), k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _nearest(points, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, points)
+        counts = np.bincount(labels, minlength=k)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            # Re-seed empty clusters on random points
+            centroids[empty] = points[rng.choice(len(points), int(empty.sum()), replace=False)]
+    return centroids
+
+
+def _value_key(value: Any) -> str:
+    """Canonical form of a metadata value, for filter column vocabularies."""
+    return json.dumps(value, sort_keys=True)
+
+
+def filter_mask(where: Dict[str, Any], columns: Dict[str, tuple], rows: np.ndarray) -> np.ndarray:
+    """
+    Evaluate a Chroma-style metadata filter on candidate rows.
+
+    Supports {field: value}, {field: {"$eq": value}}, {field: {"$in": [...]}}
+    and {"$and": [...]} on fields that have a filter column.
+
+    Args:
+        where: Metadata filter
+        columns: Field -> (value code per row, value key -> code)
+        rows: Candidate row numbers
+
+    Returns:
+        Boolean mask over rows
+
+    Raises:
+        ValueError: For any other operator, or a field without a filter
+            column (callers fall back to Chroma)
+    """
+    mask = np.ones(len(rows), dtype=bool)
+    for field, condition in where.items():
+        if field == "$and":
+            for sub_filter in condition:
+                mask &= filter_mask(sub_filter, columns, rows)
+            continue
+        if field.startswith("$"):
+            raise ValueError(f"Unsupported filter operator: {field}")
+        if field not in columns:
+            raise ValueError(f"No filter column for metadata field: {field}")
+        if isinstance(condition, dict):
+            if set(condition) - {"$eq", "$in"}:
+                raise ValueError(f"Unsupported filter: {condition}")
+            allowed = [[condition["$eq"]]] if "$eq" in condition else []
+            if "$in" in condition:
+                allowed.append(condition["$in"])
+        else:
+            allowed = [[condition]]
+        codes, vocabulary = columns[field]
+        field_codes = codes[rows]
+        for values in allowed:
+            wanted = [vocabulary[key] for key in map(_value_key, values) if key in vocabulary]
+            mask &= np.isin(field_codes, wanted)
+    return mask
+
+
+class CompressedIndex:
+    """
+    IVF-PQ index over the vector store's embeddings.
+    """
+
+    def __init__(
+        self,
+        index_dir: str,
+        nlist: int = None,
+        subvectors: int = None,
+        nprobe: int = None,
+        shortlist: int = None
+    ):
+        """
+        Initialize the index (loaded lazily).
+
+        Args:
+            index_dir: Directory for the index files
+            nlist: Inverted lists (defaults to settings.compressed_index_nlist; 0 = sqrt(n))
+            subvectors: PQ sub-vectors, must divide the dimension (defaults to settings)
+            nprobe: Lists searched per query (defaults to settings.compressed_index_nprobe)
+            shortlist: Candidates re-scored exactly (defaults to settings.compressed_index_shortlist)
+        """
+        self.index_dir = index_dir
+        self.nlist = settings.compressed_index_nlist if nlist is None else nlist
+        self.subvectors = subvectors or settings.compressed_index_pq_subvectors
+        self.nprobe = nprobe or settings.compressed_index_nprobe
+        self.shortlist = shortlist or settings.compressed_index_shortlist
+        self.vectors_path = os.path.join(index_dir, "vectors.npy")
+        self.meta_path = os.path.join(index_dir, "meta.json")
+        self._lock = threading.Lock()
+        self._loaded_mtime: Optional[float] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._codebooks: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._list_rows: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+        self._row_offsets: Optional[np.ndarray] = None
+        self._rows: Optional[np.ndarray] = None
+        self._columns: Dict[str, tuple] = {}
+        self._count = 0
+        self._generation: Optional[int] = None
+        self._model: Optional[str] = None
+
+    # --- Build ---
+
+    def build(self, vector_store: Any) -> Dict[str, Any]:
+        """
+        Rebuild the index from every embedding in the vector store.
+
+        Args:
+            vector_store: VectorStoreService
+
+        Returns:
+            Build statistics
+        """
+        generation = vector_store.get_generation()
+        ids: List[str] = []
+        documents: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        blocks: List[np.ndarray] = []
+        for page in vector_store.iter_documents(include=["embeddings", "documents", "metadatas"]):
+            ids.extend(page["ids"])
+            documents.extend(page["documents"])
+            metadatas.extend(m or {} for m in page["metadatas"])
+            blocks.append(np.asarray(page["embeddings"], dtype=np.float32))
+        vectors = np.vstack(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+        return self.build_from_arrays(ids, vectors, metadatas, generation, documents)
+
+    def build_from_arrays(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        metadatas: List[Dict[str, Any]],
+        generation: int,
+        documents: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Train and write the index.
+
+        Args:
+            ids: Chunk ids
+            vectors: (n x dimension) embeddings
+            metadatas: Chunk metadata (returned with hits, and for filters)
+            generation: Corpus generation the vectors belong to
+            documents: Chunk texts returned with hits (None = not stored)
+
+        Returns:
+            Build statistics
+
+        Raises:
+            ValueError: If the dimension is not divisible by the sub-vector count
+        """
+        n = len(ids)
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32)) if n else np.zeros((0, 0), dtype=np.float32)
+        dimension = vectors.shape[1] if n else 0
+        if n and dimension % self.subvectors:
+            raise ValueError(f"Dimension {dimension} is not divisible by {self.subvectors} PQ sub-vectors")
+
+        if n:
+            nlist = min(self.nlist or max(1, int(np.sqrt(n))), n)
+            centroids = kmeans(vectors, nlist)
+            assignments = _nearest(vectors, centroids)
+            sub_dim = dimension // self.subvectors
+            codebooks = np.stack([
+                self._padded_codebook(kmeans(vectors[:, j * sub_dim:(j + 1) * sub_dim], 256, seed=j + 1))
+                for j in range(self.subvectors)
+            ])
+            codes = np.stack([
+                _nearest(vectors[:, j * sub_dim:(j + 1) * sub_dim], codebooks[j]).astype(np.uint8)
+                for j in range(self.subvectors)
+            ], axis=1)
+            list_rows = np.argsort(assignments, kind="stable").astype(np.int32)
+            list_offsets = np.searchsorted(assignments[list_rows], np.arange(len(centroids) + 1)).astype(np.int64)
+        else:
+            centroids = codebooks = np.zeros((0,), dtype=np.float32)
+            codes = np.zeros((0, self.subvectors), dtype=np.uint8)
+            list_rows = np.zeros(0, dtype=np.int32)
+            list_offsets = np.zeros(1, dtype=np.int64)
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        with self._lock:
+            row_offsets = self._write_rows(ids, documents, metadatas)
+            filter_fields = self._write_filter_columns(metadatas)
+            arrays = {
+                "vectors": vectors, "centroids": centroids, "codebooks": codebooks,
+                "codes": codes, "list_rows": list_rows, "list_offsets": list_offsets,
+                "row_offsets": row_offsets
+            }
+            for name in ARRAYS:
+                self._save_array(f"{name}.npy", arrays[name])
+            self._loaded_mtime = None
+            tmp_path = f"{self.meta_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "generation": generation,
+                    "model": settings.embedding_model_name,
+                    "count": n,
+                    "filter_fields": filter_fields
+                }, f)
+            os.replace(tmp_path, self.meta_path)
+            # Filter columns of earlier builds (mapped views stay valid)
+            current = {spec["file"] for spec in filter_fields.values()}
+            for name in os.listdir(self.index_dir):
+                if name.startswith("filter_") and name.endswith(".npy") and name not in current:
+                    os.remove(os.path.join(self.index_dir, name))
+
+        stats = {
+            "generation": generation,
+            "vectors": n,
+            "lists": len(list_offsets) - 1,
+            "code_bytes": int(codes.nbytes),
+            "float_bytes": int(vectors.nbytes)
+        }
+        logger.info(f"Compressed index built: {stats}")
+        return stats
+
+    def _save_array(self, name: str, array: np.ndarray) -> None:
+        path = os.path.join(self.index_dir, name)
+        with open(f"{path}.tmp", "wb") as f:
+            np.save(f, array)
+        os.replace(f"{path}.tmp", path)
+
+    def _write_rows(
+        self,
+        ids: List[str],
+        documents: Optional[List[str]],
+        metadatas: List[Dict[str, Any]]
+    ) -> np.ndarray:
+        """Write rows.bin (one JSON [id, document, metadata] per row); returns the byte offsets."""
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        path = os.path.join(self.index_dir, "rows.bin")
+        with open(f"{path}.tmp", "wb") as f:
+            for i, chunk_id in enumerate(ids):
+                row = [chunk_id, documents[i] if documents is not None else None, metadatas[i] or {}]
+                offsets[i + 1] = offsets[i] + f.write(json.dumps(row, ensure_ascii=False).encode("utf-8"))
+        os.replace(f"{path}.tmp", path)
+        return offsets
+
+    def _write_filter_columns(self, metadatas: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Write one value-code column per filterable metadata field.
+
+        Returns:
+            Field -> {"file": column file, "values": value keys by code}
+        """
+        vocabularies: Dict[str, Dict[str, int]] = {}
+        for metadata in metadatas:
+            for field, value in (metadata or {}).items():
+                vocabulary = vocabularies.setdefault(field, {})
+                if len(vocabulary) <= MAX_FILTER_VALUES:
+                    vocabulary.setdefault(_value_key(value), len(vocabulary))
+
+        filter_fields = {}
+        for k, (field, vocabulary) in enumerate(sorted(vocabularies.items())):
+            if len(vocabulary) > MAX_FILTER_VALUES:
+                continue
+            column = np.full(len(metadatas), -1, dtype=np.int32)
+            for row, metadata in enumerate(metadatas):
+                if metadata and field in metadata:
+                    column[row] = vocabulary[_value_key(metadata[field])]
+            name = f"filter_{k}.npy"
+            self._save_array(name, column)
+            filter_fields[field] = {"file": name, "values": list(vocabulary)}
+        return filter_fields
+
+    @staticmethod
+    def _padded_codebook(centroids: np.ndarray) -> np.ndarray:
+        """Pad a codebook to 256 entries (small corpora) by repeating centroids."""
+        if len(centroids) == 256:
+            return centroids
+        return centroids[np.arange(256) % len(centroids)]
+
+    # --- Load ---
+
+    def _load(self) -> bool:
+        """(Re)load the index files if they changed on disk."""
+        try:
+            mtime = os.path.getmtime(self.meta_path)
+        except OSError:
+            return False
+        if mtime == self._loaded_mtime:
+            return self._codes is not None
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            arrays = {name: np.load(os.path.join(self.index_dir, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+            count = meta["count"]
+            rows_path = os.path.join(self.index_dir, "rows.bin")
+            # np.memmap cannot map an empty file
+            rows = np.memmap(rows_path, dtype=np.uint8, mode="r") if os.path.getsize(rows_path) else np.zeros(0, np.uint8)
+            columns = {}
+            for field, spec in meta["filter_fields"].items():
+                column = np.load(os.path.join(self.index_dir, spec["file"]), mmap_mode="r")
+                if len(column) != count:
+                    raise ValueError("filter columns and meta.json are from different builds")
+                columns[field] = (column, {key: code for code, key in enumerate(spec["values"])})
+            if (
+                len(arrays["codes"]) != count
+                or len(arrays["row_offsets"]) != count + 1
+                or len(rows) != arrays["row_offsets"][-1]
+            ):
+                raise ValueError("index files and meta.json are from different builds")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load compressed index: {e}")
+            self._codes = None
+            self._loaded_mtime = mtime
+            return False
+        self._vectors = arrays["vectors"]
+        self._centroids = arrays["centroids"]
+        self._codebooks = arrays["codebooks"]
+        self._codes = arrays["codes"]
+        self._list_rows = arrays["list_rows"]
+        self._list_offsets = arrays["list_offsets"]
+        self._row_offsets = arrays["row_offsets"]
+        self._rows = rows
+        self._columns = columns
+        self._count = count
+        self._generation = meta.get("generation")
+        self._model = meta.get("model")
+        self._loaded_mtime = mtime
+        logger.info(f"Loaded compressed index: {count} vectors (generation {self._generation})")
+        return True
+
+    def is_current(self, generation: int) -> bool:
+        """
+        True if the index matches the corpus generation and embedding model.
+
+        Args:
+            generation: Current vector store generation
+        """
+        with self._lock:
+            return (
+                self._load()
+                and self._generation == generation
+                and self._model == settings.embedding_model_name
+            )
+
+    # --- Search ---
+
+    def search(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None,
+        nprobe: int = None,
+        shortlist: int = None
+    ) -> List[Dict[str, List[Any]]]:
+        """
+        Approximate nearest neighbours of several queries.
+
+        Args:
+            query_embeddings: Query vectors
+            n_results: Results per query
+            where: Optional metadata filter (see filter_mask)
+            nprobe: Lists searched (defaults to self.nprobe)
+            shortlist: Candidates re-scored exactly (defaults to self.shortlist)
+
+        Returns:
+            Per query: ids, documents, distances (squared L2 of unit
+            vectors, like Chroma's default) and metadatas, best first
+
+        Raises:
+            ValueError: If the filter uses an unsupported operator or a
+                field without a filter column
+        """
+        with self._lock:
+            loaded = self._load()
+            vectors, centroids, codebooks = self._vectors, self._centroids, self._codebooks
+            codes, list_rows, list_offsets = self._codes, self._list_rows, self._list_offsets
+            row_offsets, row_data, columns, count = self._row_offsets, self._rows, self._columns, self._count
+        empty = {"ids": [], "documents": [], "distances": [], "metadatas": []}
+        if not loaded or not count:
+            return [{field: [] for field in empty} for _ in query_embeddings]
+
+        nprobe = min(nprobe or self.nprobe, len(centroids))
+        shortlist = max(shortlist or self.shortlist, n_results)
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+        sub_dim = queries.shape[1] // len(codebooks)
+        results = []
+        for query in queries:
+            # Coarse search: the nprobe closest lists
+            probes = np.argpartition(-(centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.concatenate([list_rows[list_offsets[p]:list_offsets[p + 1]] for p in probes])
+            if where:
+                rows = rows[filter_mask(where, columns, rows)]
+            if not len(rows):
+                results.append({field: [] for field in empty})
+                continue
+
+            # Asymmetric distances: one (sub-vectors x 256) table per query
+            table = ((query.reshape(len(codebooks), 1, sub_dim) - codebooks) ** 2).sum(axis=2)
+            approximate = table[np.arange(len(codebooks)), codes[rows]].sum(axis=1)
+            if len(rows) > shortlist:
+                rows = rows[np.argpartition(approximate, shortlist - 1)[:shortlist]]
+
+            # Exact re-scoring from the memory-mapped vectors
+            rows = np.sort(rows)
+            similarity = np.asarray(vectors[rows]) @ query
+            best = np.argsort(-similarity)[:n_results]
+            hits = [
+                json.loads(bytes(row_data[row_offsets[rows[i]]:row_offsets[rows[i] + 1]]))
+                for i in best
+            ]
+            results.append({
+                "ids": [hit[0] for hit in hits],
+                "documents": [hit[1] for hit in hits],
+                "distances": [float(2.0 - 2.0 * similarity[i]) for i in best],
+                "metadatas": [hit[2] for hit in hits]
+            })
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index summary for monitoring."""
+        with self._lock:
+            loaded = self._load()
+            return {
+                "loaded": loaded,
+                "generation": self._generation,
+                "vectors": self._count if loaded else 0,
+                "lists": len(self._list_offsets) - 1 if loaded else 0,
+                "code_bytes": int(self._codes.nbytes) if loaded else 0,
+                "nprobe": self.nprobe,
+                "shortlist": self.shortlist
+            }
@@ -0,0 +1,204 @@
+"""
+Job Queue - Shared Plumbing for File-Backed Background Jobs
+Common pieces of the batch and async analysis job services.
+
+Responsibilities:
+- Job states shared by both services
+- Atomic JSON job files (write to a temp file, then rename)
+- An in-process queue of job ids served by worker threads, with duplicate
+  enqueues ignored
+- Compliance analysis that waits out LLM overload a bounded number of times
+- Job ownership: each job records the process running it, and recovery
+  only claims jobs whose owner has died, so several worker processes can
+  share one jobs directory without running a job twice
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+from contextlib import contextmanager
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+
+from app.core.locks import file_lock
+from app.services.llm_scheduler import LLMOverloadedError
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Overload retries per analysis before it fails
+MAX_OVERLOAD_RETRIES = 5
+
+
+def load_json(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a job file.
+
+    Returns:
+        The parsed file, or None if it is missing or unreadable
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_json(path: str, data: Dict[str, Any]) -> None:
+    """Write a job file atomically, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """Start time of a process (clock ticks since boot), to tell reused pids apart."""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def current_owner() -> Dict[str, Any]:
+    """Owner record of this process, stored on the jobs it runs."""
+    return {"host": socket.gethostname(), "pid": os.getpid(), "started": _process_start(os.getpid())}
+
+
+def owner_alive(owner: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether the process that owns a job is still running.
+
+    Args:
+        owner: Owner record (None for jobs written before ownership existed)
+
+    Returns:
+        False if the owner is known to be gone; True if it is running or
+        lives on another host (which this process cannot check)
+    """
+    if not owner:
+        return False
+    if owner.get("host") != socket.gethostname():
+        return True
+    try:
+        os.kill(owner["pid"], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return owner.get("started") is None or _process_start(owner["pid"]) == owner["started"]
+
+
+@contextmanager
+def claim_lock(jobs_dir: str) -> Iterator[None]:
+    """
+    Serialise job claiming across the processes sharing a jobs directory.
+
+    Without file locks (non-POSIX platforms) this is a no-op.
+    """
+    with file_lock(os.path.join(jobs_dir, ".claim.lock")):
+        yield
+
+
+def analyze_with_retries(compliance_service: Any, application: Dict[str, Any], retrieved: Any = None) -> Any:
+    """
+    Analyse one application, waiting out LLM overload.
+
+    Overload is the normal state when more work is queued than there are
+    inference slots, so the analysis waits (for the scheduler's retry_after)
+    instead of failing, up to MAX_OVERLOAD_RETRIES times.
+
+    Args:
+        compliance_service: ComplianceService
+        application: Application details
+        retrieved: Pre-retrieved regulations (optional)
+
+    Returns:
+        ComplianceReport
+
+    Raises:
+        LLMOverloadedError: If the LLM is still overloaded after the retries
+    """
+    for attempt in range(MAX_OVERLOAD_RETRIES + 1):
+        try:
+            return compliance_service.analyze_application(application, retrieved)
+        except LLMOverloadedError as e:
+            if attempt == MAX_OVERLOAD_RETRIES:
+                raise
+            time.sleep(e.retry_after)
+
+
+class JobQueue:
+    """
+    Queue of job ids processed by background worker threads.
+
+    Workers start on the first enqueue. A job id already waiting or running
+    is not queued twice.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str], None],
+        workers: int = 1,
+        name: str = "job",
+        on_error: Optional[Callable[[str, Exception], None]] = None
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            handler: Called with each job id on a worker thread
+            workers: Worker threads
+            name: Thread name prefix
+            on_error: Called with the job id and exception if handler raises
+        """
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.name = name
+        self.on_error = on_error
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._queued: Set[str] = set()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def enqueue(self, job_id: str) -> None:
+        """Queue a job (no-op if it is already queued or running)."""
+        with self._lock:
+            if job_id in self._queued:
+                return
+            self._queued.add(job_id)
+            self._queue.put(job_id)
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._run_worker, name=f"{self.name}-{len(self._threads)}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def qsize(self) -> int:
+        """Jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def _run_worker(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            try:
+                self.handler(job_id)
+            except Exception as e:
+                logger.error(f"{self.name} {job_id} failed: {e}")
+                if self.on_error is not None:
+                    self.on_error(job_id, e)
+            finally:
+                with self._lock:
+                    self._queued.discard(job_id)
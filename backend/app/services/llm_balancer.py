@@ -0,0 +1,221 @@
+"""
+LLM Balancer - Client-Side Load Balancing Across Local LLM Endpoints
+Spreads local LLM calls over several OpenAI-compatible inference hosts.
+
+Responsibilities:
+- Pick an endpoint per call (least outstanding requests, or EWMA latency)
+- Track per-endpoint outstanding requests, latency and failures
+- Eject endpoints after repeated failures or failed health checks
+- Re-admit them after a cooldown or a successful health check
+
+Each LM Studio host decodes one sequence at a time, so throughput scales
+with the number of healthy endpoints; LLMService sizes its scheduler
+from available_count().
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+STRATEGY_LEAST_OUTSTANDING = "least_outstanding"
+STRATEGY_EWMA = "ewma"
+
+
+class LLMEndpoint:
+    """Runtime state of a single local LLM endpoint."""
+
+    def __init__(self, url: str):
+        """
+        Initialize endpoint state.
+
+        Args:
+            url: Chat completions URL of the endpoint
+        """
+        self.url = url
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def models_url(self) -> str:
+        """URL of the /models endpoint used for health checks."""
+        return self.url.replace("/chat/completions", "/models")
+
+    def is_ejected(self, now: float) -> bool:
+        """Whether the endpoint is currently out of rotation."""
+        return not self.healthy or now < self.ejected_until
+
+
+class LLMBalancer:
+    """
+    Client-side balancer over a list of local LLM endpoints.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        strategy: str = STRATEGY_LEAST_OUTSTANDING,
+        eject_after_failures: int = 3,
+        ejection_seconds: float = 30.0,
+        ewma_alpha: float = 0.3,
+        on_capacity_change: Optional[Callable[[int], None]] = None
+    ):
+        """
+        Initialize the balancer.
+
+        Args:
+            urls: Chat completions URLs of the endpoints
+            strategy: "least_outstanding" or "ewma"
+            eject_after_failures: Consecutive failures before an endpoint is ejected
+            ejection_seconds: How long an ejected endpoint stays out of rotation
+            ewma_alpha: Smoothing factor for the latency EWMA
+            on_capacity_change: Called with the number of available endpoints
+                whenever it changes
+        """
+        if not urls:
+            raise ValueError("At least one LLM endpoint URL is required")
+        if strategy not in (STRATEGY_LEAST_OUTSTANDING, STRATEGY_EWMA):
+            raise ValueError(f"Unknown balancing strategy: {strategy}")
+
+        self.endpoints = [LLMEndpoint(url) for url in urls]
+        self.strategy = strategy
+        self.eject_after_failures = eject_after_failures
+        self.ejection_seconds = ejection_seconds
+        self.ewma_alpha = ewma_alpha
+        self.on_capacity_change = on_capacity_change
+
+        self._lock = threading.Lock()
+        self._last_available = len(self.endpoints)
+
+    def acquire(self) -> LLMEndpoint:
+        """
+        Pick an endpoint for a call and count it as outstanding.
+
+        Returns:
+            Selected endpoint (must be passed back to release())
+
+        Raises:
+            RuntimeError: If every endpoint is ejected
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if not e.is_ejected(now)]
+            self._check_capacity(len(candidates))
+            if not candidates:
+                raise RuntimeError("No healthy local LLM endpoints")
+
+            if self.strategy == STRATEGY_EWMA:
+                # Unmeasured endpoints are assumed as fast as the median measured
+                # one, so a cold start spreads by load instead of piling onto one
+                measured = sorted(e.ewma_latency for e in candidates if e.ewma_latency is not None)
+                prior = measured[len(measured) // 2] if measured else 1.0
+                endpoint = min(candidates, key=lambda e: (
+                    (e.ewma_latency if e.ewma_latency is not None else prior) * (e.outstanding + 1),
+                    e.outstanding
+                ))
+            else:
+                endpoint = min(candidates, key=lambda e: (e.outstanding, e.ewma_latency or 0.0))
+
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: LLMEndpoint, success: bool = True, latency: Optional[float] = None) -> None:
+        """
+        Finish a call started with acquire().
+
+        Args:
+            endpoint: Endpoint returned by acquire()
+            success: Whether the call succeeded (failures count towards ejection)
+            latency: Call duration in seconds (updates the EWMA)
+        """
+        with self._lock:
+            endpoint.outstanding = max(0, endpoint.outstanding - 1)
+            if success:
+                endpoint.consecutive_failures = 0
+                if latency is not None:
+                    if endpoint.ewma_latency is None:
+                        endpoint.ewma_latency = latency
+                    else:
+                        endpoint.ewma_latency = (
+                            self.ewma_alpha * latency + (1 - self.ewma_alpha) * endpoint.ewma_latency
+                        )
+            else:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.eject_after_failures:
+                    endpoint.ejected_until = time.monotonic() + self.ejection_seconds
+                    endpoint.consecutive_failures = 0
+                    logger.warning(
+                        f"[LLM BALANCER] Ejected {endpoint.url} for {self.ejection_seconds:.0f}s "
+                        f"after {self.eject_after_failures} consecutive failures"
+                    )
+            self._check_capacity()
+
+    def mark_health(self, endpoint: LLMEndpoint, healthy: bool) -> None:
+        """
+        Apply a health check result.
+
+        Args:
+            endpoint: Endpoint that was checked
+            healthy: Whether the health check succeeded
+        """
+        with self._lock:
+            if healthy and not endpoint.healthy:
+                logger.info(f"[LLM BALANCER] Re-admitted {endpoint.url}")
+            elif not healthy and endpoint.healthy:
+                logger.warning(f"[LLM BALANCER] Health check failed - ejected {endpoint.url}")
+            endpoint.healthy = healthy
+            if healthy:
+                endpoint.ejected_until = 0.0
+            self._check_capacity()
+
+    def available_count(self) -> int:
+        """Number of endpoints currently in rotation."""
+        with self._lock:
+            now = time.monotonic()
+            return sum(1 for e in self.endpoints if not e.is_ejected(now))
+
+    def _check_capacity(self, available: Optional[int] = None) -> None:
+        """Notify on_capacity_change if the available count changed (caller holds the lock)."""
+        if available is None:
+            now = time.monotonic()
+            available = sum(1 for e in self.endpoints if not e.is_ejected(now))
+        if available != self._last_available:
+            self._last_available = available
+            if self.on_capacity_change is not None:
+                self.on_capacity_change(available)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get per-endpoint statistics.
+
+        Returns:
+            Dictionary with strategy and endpoint states
+        """
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "strategy": self.strategy,
+                "available": sum(1 for e in self.endpoints if not e.is_ejected(now)),
+                "endpoints": [
+                    {
+                        "url": e.url,
+                        "healthy": e.healthy,
+                        "ejected": e.is_ejected(now),
+                        "outstanding": e.outstanding,
+                        "ewma_latency_seconds": round(e.ewma_latency, 3) if e.ewma_latency is not None else None,
+                        "requests": e.requests,
+                        "failures": e.failures
+                    }
+                    for e in self.endpoints
+                ]
+            }
@@ -0,0 +1,195 @@
+"""
+LLM Hedging Policy - Tail-Latency Control for Interactive Calls
+Decides when a slow local generation should be raced against the
+fallback backend and keeps hedging statistics.
+
+Responsibilities:
+- Track recent local LLM latencies
+- Derive the hedge delay from their p95 (clamped to configured bounds)
+- Count hedged requests, launched hedges, wins per backend and the
+  estimated cost of hedge calls
+
+The race itself is run by LLMService; this module only holds policy
+and bookkeeping so the numbers can be exposed through get_stats().
+"""
+
+from typing import Any, Dict
+from collections import deque
+import math
+import threading
+
+
+class LLMCallCancelled(RuntimeError):
+    """Raised inside a backend call that lost a hedged race."""
+
+
+class HedgingPolicy:
+    """
+    p95-based hedging policy for the local LLM.
+
+    Until enough latency samples exist the configured default delay is
+    used; afterwards the delay is p95 * multiplier, clamped to
+    [min_delay, max_delay].
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        default_delay: float = 10.0,
+        min_delay: float = 2.0,
+        max_delay: float = 30.0,
+        percentile: float = 0.95,
+        multiplier: float = 1.0,
+        min_samples: int = 20,
+        window_size: int = 200
+    ):
+        """
+        Initialize the hedging policy.
+
+        Args:
+            enabled: Whether hedging is allowed at all
+            default_delay: Delay (s) used until min_samples latencies are known
+            min_delay: Lower bound for the computed delay (s)
+            max_delay: Upper bound for the computed delay (s)
+            percentile: Latency percentile that triggers a hedge
+            multiplier: Factor applied to the percentile latency
+            min_samples: Samples required before the percentile is trusted
+            window_size: Number of recent latencies kept
+        """
+        self.enabled = enabled
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window_size)
+
+        # Metrics
+        self.hedged_requests = 0
+        self.hedges_launched = 0
+        self.failovers = 0
+        self.wins = {"local": 0, "openai": 0}
+        self.hedge_tokens = 0
+        self.hedge_cost_usd = 0.0
+
+    def observe_latency(self, seconds: float) -> None:
+        """
+        Record the latency of a successful local LLM call.
+
+        Args:
+            seconds: Call duration in seconds
+        """
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def hedge_delay(self) -> float:
+        """
+        Get the delay after which a hedge request is launched.
+
+        Returns:
+            Delay in seconds
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.default_delay
+            ordered = sorted(self._latencies)
+        index = max(0, math.ceil(self.percentile * len(ordered)) - 1)
+        delay = ordered[index] * self.multiplier
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    def record_request(self) -> None:
+        """Count a request that went through the hedging policy."""
+        with self._lock:
+            self.hedged_requests += 1
+
+    def record_hedge(self, failover: bool = False) -> None:
+        """
+        Count a launched fallback request.
+
+        Args:
+            failover: True if launched because the local call failed or its
+                circuit was open, rather than because the delay elapsed
+        """
+        with self._lock:
+            if failover:
+                self.failovers += 1
+            else:
+                self.hedges_launched += 1
+
+    def record_win(self, backend: str) -> None:
+        """
+        Count which backend produced the returned result.
+
+        Args:
+            backend: "local" or "openai"
+        """
+        with self._lock:
+            self.wins[backend] = self.wins.get(backend, 0) + 1
+
+    def record_cost(self, tokens: int, cost_usd: float) -> None:
+        """
+        Add the token usage and estimated cost of a hedge call.
+
+        Args:
+            tokens: Prompt + completion tokens of the hedge call
+            cost_usd: Estimated cost in USD
+        """
+        with self._lock:
+            self.hedge_tokens += tokens
+            self.hedge_cost_usd += cost_usd
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hedging statistics.
+
+        Returns:
+            Dictionary with hedge rate, wins per backend and cost
+        """
+        delay = self.hedge_delay()
+        with self._lock:
+            requests = self.hedged_requests
+            return {
+                "enabled": self.enabled,
+                "current_delay_seconds": round(delay, 3),
+                "latency_samples": len(self._latencies),
+                "requests": requests,
+                "hedges_launched": self.hedges_launched,
+                "failovers": self.failovers,
+                "hedge_rate": round(self.hedges_launched / requests, 3) if requests else 0.0,
+                "wins": dict(self.wins),
+                "hedge_tokens": self.hedge_tokens,
+                "hedge_cost_usd": round(self.hedge_cost_usd, 6)
+            }
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate (~4 characters per token) for cost accounting
+    when a cancelled call reported no usage.
+
+    Args:
+        text: Text to estimate
+
+    Returns:
+        Estimated token count
+    """
+    return max(1, len(text) // 4) if text else 0
+
+
+def openai_cost(prompt_tokens: int, completion_tokens: int, prompt_price: float, completion_price: float) -> float:
+    """
+    Estimate the USD cost of an OpenAI call.
+
+    Args:
+        prompt_tokens: Prompt tokens
+        completion_tokens: Completion tokens
+        prompt_price: USD per 1K prompt tokens
+        completion_price: USD per 1K completion tokens
+
+    Returns:
+        Estimated cost in USD
+    """
+    return prompt_tokens / 1000.0 * prompt_price + completion_tokens / 1000.0 * completion_price
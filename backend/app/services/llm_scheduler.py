@@ -0,0 +1,238 @@
+"""
+LLM Scheduler - Admission Control for the Local LLM
+Bounds concurrent generations and queues the rest by priority.
+
+Responsibilities:
+- Limit in-flight requests to what the inference server can decode
+- Serve interactive requests (chat, extraction) before batch analysis
+- Fail fast with a Retry-After hint when a queue-wait deadline passes
+- Track queue depth, wait times and rejections
+
+LM Studio generates one sequence at a time; without admission control
+every request queues invisibly on the server until the HTTP timeout.
+"""
+
+from typing import Any, Dict, List, Optional
+from collections import deque
+from contextlib import contextmanager
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Priority classes (lower rank is served first)
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+PRIORITY_RANKS = {
+    PRIORITY_INTERACTIVE: 0,
+    PRIORITY_BATCH: 1
+}
+
+
+class LLMOverloadedError(RuntimeError):
+    """Raised when a request cannot be admitted before its queue deadline."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """
+    Bounded-concurrency, priority-ordered gate in front of the local LLM.
+
+    Requests acquire a slot before calling the LLM. When all slots are
+    busy they wait in a priority queue (FIFO within a priority) until a
+    slot frees up or their queue-wait deadline expires.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        max_queue_depth: int = 16,
+        queue_timeouts: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency: Maximum simultaneous LLM requests
+            max_queue_depth: Maximum waiting requests per priority
+            queue_timeouts: Maximum queue wait in seconds per priority
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeouts = queue_timeouts or {
+            PRIORITY_INTERACTIVE: 20.0,
+            PRIORITY_BATCH: 120.0
+        }
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting: List[tuple] = []  # heap of (rank, seq)
+        self._seq = itertools.count()
+        self._depth = {p: 0 for p in PRIORITY_RANKS}
+
+        # Metrics
+        self._admitted = {p: 0 for p in PRIORITY_RANKS}
+        self._rejected = {p: 0 for p in PRIORITY_RANKS}
+        self._wait_total = {p: 0.0 for p in PRIORITY_RANKS}
+        self._wait_max = {p: 0.0 for p in PRIORITY_RANKS}
+        self._recent_waits = {p: deque(maxlen=200) for p in PRIORITY_RANKS}
+        self._recent_service = deque(maxlen=50)
+
+    def set_max_concurrency(self, max_concurrency: int) -> None:
+        """
+        Change the concurrency limit (e.g. when endpoints are added).
+
+        Args:
+            max_concurrency: New maximum simultaneous LLM requests
+        """
+        with self._cond:
+            self.max_concurrency = max(1, max_concurrency)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: str = PRIORITY_INTERACTIVE):
+        """
+        Hold an LLM slot for the duration of a with-block.
+
+        Args:
+            priority: Priority class of the request
+
+        Yields:
+            Seconds spent waiting in the queue
+
+        Raises:
+            LLMOverloadedError: If no slot frees up before the deadline
+        """
+        waited = self.acquire(priority)
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - started)
+
+    def acquire(self, priority: str = PRIORITY_INTERACTIVE) -> float:
+        """
+        Wait for a free slot.
+
+        Args:
+            priority: Priority class of the request
+
+        Returns:
+            Seconds spent waiting in the queue
+
+        Raises:
+            LLMOverloadedError: If the queue is full or the deadline passes
+        """
+        if priority not in PRIORITY_RANKS:
+            raise ValueError(f"Unknown priority: {priority}")
+
+        enqueued = time.monotonic()
+        deadline = enqueued + self.queue_timeouts.get(priority, 30.0)
+        ticket = (PRIORITY_RANKS[priority], next(self._seq))
+
+        with self._cond:
+            if self._active < self.max_concurrency and not self._waiting:
+                self._active += 1
+                self._record_admission(priority, 0.0)
+                return 0.0
+
+            if self._depth[priority] >= self.max_queue_depth:
+                self._rejected[priority] += 1
+                retry_after = self._estimate_retry_after()
+                logger.warning(f"[LLM SCHEDULER] {priority} queue full ({self.max_queue_depth}) - rejecting")
+                raise LLMOverloadedError(f"LLM queue full for {priority} requests", retry_after)
+
+            heapq.heappush(self._waiting, ticket)
+            self._depth[priority] += 1
+            try:
+                while not (self._waiting[0] == ticket and self._active < self.max_concurrency):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiting.remove(ticket)
+                        heapq.heapify(self._waiting)
+                        self._rejected[priority] += 1
+                        retry_after = self._estimate_retry_after()
+                        logger.warning(
+                            f"[LLM SCHEDULER] {priority} request waited "
+                            f"{time.monotonic() - enqueued:.1f}s - rejecting (retry after {retry_after}s)"
+                        )
+                        # Wake the next waiter in case we were at the head
+                        self._cond.notify_all()
+                        raise LLMOverloadedError(f"LLM busy: queue wait exceeded for {priority} request", retry_after)
+                    self._cond.wait(remaining)
+
+                heapq.heappop(self._waiting)
+                self._active += 1
+            finally:
+                self._depth[priority] -= 1
+
+            waited = time.monotonic() - enqueued
+            self._record_admission(priority, waited)
+            # The new head may also be admissible if more slots are free
+            self._cond.notify_all()
+            return waited
+
+    def release(self, service_time: Optional[float] = None) -> None:
+        """
+        Release a slot acquired with acquire().
+
+        Args:
+            service_time: Seconds the slot was held (feeds Retry-After estimates)
+        """
+        with self._cond:
+            self._active = max(0, self._active - 1)
+            if service_time is not None:
+                self._recent_service.append(service_time)
+            self._cond.notify_all()
+
+    def _record_admission(self, priority: str, waited: float) -> None:
+        """Update wait-time metrics (caller holds the lock)."""
+        self._admitted[priority] += 1
+        self._wait_total[priority] += waited
+        self._wait_max[priority] = max(self._wait_max[priority], waited)
+        self._recent_waits[priority].append(waited)
+
+    def _estimate_retry_after(self) -> int:
+        """Estimate seconds until the current backlog drains (caller holds the lock)."""
+        if self._recent_service:
+            avg_service = sum(self._recent_service) / len(self._recent_service)
+        else:
+            avg_service = 10.0
+        backlog = len(self._waiting) + self._active
+        return max(1, math.ceil(avg_service * backlog / self.max_concurrency))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Dictionary with active slots, queue depths and wait-time metrics
+        """
+        with self._cond:
+            priorities = {}
+            for p in PRIORITY_RANKS:
+                recent = sorted(self._recent_waits[p])
+                p95 = recent[max(0, math.ceil(0.95 * len(recent)) - 1)] if recent else 0.0
+                admitted = self._admitted[p]
+                priorities[p] = {
+                    "queue_depth": self._depth[p],
+                    "admitted": admitted,
+                    "rejected": self._rejected[p],
+                    "wait_seconds_avg": round(self._wait_total[p] / admitted, 3) if admitted else 0.0,
+                    "wait_seconds_p95": round(p95, 3),
+                    "wait_seconds_max": round(self._wait_max[p], 3)
+                }
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "queue_depth": len(self._waiting),
+                "priorities": priorities
+            }
@@ -0,0 +1,310 @@
+"""
+LLM Output Schemas - Structured Output Contracts
+JSON schemas for every task that expects JSON from the LLM, plus the
+helpers that turn them into request payloads and check the responses.
+
+Responsibilities:
+- Define one JSON schema per structured task
+- Build the response_format payload for a backend's capability level
+- Parse model output leniently (code fences, surrounding prose)
+- Normalise parsed output toward the task schema (numeric strings, stray
+  items) and validate what the callers cannot do without
+
+Capability levels, best first:
+- json_schema: constrained decoding against the schema (OpenAI, LM Studio,
+  llama.cpp server - which compiles the schema to a grammar)
+- json_object: JSON mode, valid JSON but no shape guarantee
+- none: plain prompt instructions only
+
+Each schema lists the fields replies must contain (the same set the
+response parser required before structured output existed). Replies from
+every backend are validated leniently, so backends without constrained
+decoding are not rejected for more than the baseline parser rejected:
+only the top-level fields are checked (present if required, of their type,
+in their enum); problems inside nested items such as a single issue are
+left to the callers, which skip or normalise bad items. Only the
+response_format sent to json_schema-capable servers uses the strict-mode
+variant (every property required, additionalProperties false), built by
+strict_schema().
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+import json
+
+# Capability levels (best first)
+FORMAT_JSON_SCHEMA = "json_schema"
+FORMAT_JSON_OBJECT = "json_object"
+FORMAT_NONE = "none"
+FORMAT_LEVELS = [FORMAT_JSON_SCHEMA, FORMAT_JSON_OBJECT, FORMAT_NONE]
+
+
+def _object(properties: Dict[str, Any], required: Sequence[str] = ()) -> Dict[str, Any]:
+    """Object schema with the fields a reply must contain."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(required),
+        "additionalProperties": False
+    }
+
+
+def strict_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Strict-mode copy of a schema: every object property required.
+
+    OpenAI strict mode (and constrained decoding in general) needs this;
+    validation keeps using the original required lists.
+
+    Args:
+        schema: JSON schema
+
+    Returns:
+        New schema with all properties required, recursively
+    """
+    strict = dict(schema)
+    if "properties" in schema:
+        strict["properties"] = {name: strict_schema(sub) for name, sub in schema["properties"].items()}
+        strict["required"] = list(schema["properties"])
+    if "items" in schema:
+        strict["items"] = strict_schema(schema["items"])
+    return strict
+
+
+_STRING = {"type": "string"}
+
+COMPLIANCE_REPORT_SCHEMA = _object({
+    "overall_status": {
+        "type": "string",
+        "enum": ["compliant", "partially_compliant", "non_compliant", "needs_human_review"]
+    },
+    "confidence_score": {"type": "number"},
+    "time_saved_minutes": {"type": "number"},
+    "regulation_coverage_percent": {"type": "number"},
+    "issues": {
+        "type": "array",
+        "items": _object({
+            "type": {"type": "string", "enum": ["missing_document", "violation", "ambiguity"]},
+            "risk_level": {"type": "string", "enum": ["low", "medium", "high"]},
+            "department": {"type": "string", "enum": ["environment", "fire", "local_body", "other"]},
+            "regulation_reference": _object({
+                "name": _STRING,
+                "clause": _STRING
+            }),
+            "document_excerpt": _STRING,
+            "explanation": _STRING
+        })
+    },
+    "checklist": {"type": "array", "items": _STRING}
+}, required=["overall_status", "confidence_score", "issues", "checklist"])
+
+APPLICATION_DETAILS_SCHEMA = _object({
+    "industry_name": _STRING,
+    "square_feet": _STRING,
+    "water_source": _STRING,
+    "drainage": _STRING,
+    "air_pollution": _STRING,
+    "waste_management": _STRING,
+    "nearby_homes": _STRING,
+    "water_level_depth": _STRING
+})
+
+DOCUMENT_VALIDATION_SCHEMA = _object({
+    "is_valid": {"type": "boolean"},
+    "confidence": {"type": "number"},
+    "reason": _STRING
+})
+
+# Registry used by LLMService (schema name -> JSON schema)
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "compliance_report": COMPLIANCE_REPORT_SCHEMA,
+    "application_details": APPLICATION_DETAILS_SCHEMA,
+    "document_validation": DOCUMENT_VALIDATION_SCHEMA
+}
+
+
+def get_schema(name: str) -> Dict[str, Any]:
+    """
+    Look up a registered schema.
+
+    Args:
+        name: Schema name
+
+    Returns:
+        JSON schema
+
+    Raises:
+        ValueError: If the schema is not registered
+    """
+    if name not in SCHEMAS:
+        raise ValueError(f"Unknown output schema: {name}")
+    return SCHEMAS[name]
+
+
+def response_format_payload(schema_name: Optional[str], level: str) -> Optional[Dict[str, Any]]:
+    """
+    Build the response_format request field for a capability level.
+
+    Args:
+        schema_name: Registered schema name (None = any JSON object)
+        level: Backend capability level
+
+    Returns:
+        response_format value, or None if the field should be omitted
+    """
+    if level == FORMAT_JSON_SCHEMA and schema_name:
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": schema_name,
+                "strict": True,
+                "schema": strict_schema(get_schema(schema_name))
+            }
+        }
+    if level in (FORMAT_JSON_SCHEMA, FORMAT_JSON_OBJECT):
+        return {"type": "json_object"}
+    return None
+
+
+def next_format_level(level: str) -> str:
+    """
+    Next weaker capability level after a backend rejected one.
+
+    Args:
+        level: Rejected level
+
+    Returns:
+        Next level (FORMAT_NONE stays FORMAT_NONE)
+    """
+    index = FORMAT_LEVELS.index(level)
+    return FORMAT_LEVELS[min(index + 1, len(FORMAT_LEVELS) - 1)]
+
+
+def parse_json_output(text: str) -> Optional[Any]:
+    """
+    Parse JSON from model output, tolerating code fences and prose around
+    the object.
+
+    Args:
+        text: Raw model output
+
+    Returns:
+        Parsed JSON value, or None if no JSON object could be parsed
+    """
+    if not text:
+        return None
+    cleaned = text.strip()
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+
+    if "```json" in cleaned:
+        cleaned = cleaned.split("```json")[1].split("```")[0].strip()
+    elif "```" in cleaned:
+        cleaned = cleaned.split("```")[1].split("```")[0].strip()
+
+    start, end = cleaned.find("{"), cleaned.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(cleaned[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+
+
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool)
+}
+
+
+def _matches_type(value: Any, schema: Dict[str, Any]) -> bool:
+    """Whether a value has the schema's type (True if the schema has none)."""
+    check = _TYPE_CHECKS.get(schema.get("type"))
+    return check is None or check(value)
+
+
+def _coerce_number(value: Any, schema: Dict[str, Any]) -> Any:
+    """Numeric string ("85", " 0.9 ") -> number for number/integer fields; other values unchanged."""
+    if schema.get("type") not in ("number", "integer") or not isinstance(value, str):
+        return value
+    try:
+        number = float(value.strip())
+    except ValueError:
+        return value
+    if schema["type"] == "integer" and number.is_integer():
+        return int(number)
+    return number
+
+
+def normalize_output(value: Any, schema: Dict[str, Any]) -> Any:
+    """
+    Bring a parsed reply closer to its schema without rejecting it.
+
+    Numeric strings become numbers, array items of the wrong type are
+    dropped, and optional object fields of the wrong type are removed (so
+    callers fall back to their defaults). Required fields of the wrong type
+    are kept for validate_schema to report; enum values are left as they are.
+
+    Args:
+        value: Parsed JSON value
+        schema: JSON schema
+
+    Returns:
+        Normalised copy of the value
+    """
+    value = _coerce_number(value, schema)
+    if schema.get("type") == "object" and isinstance(value, dict):
+        normalized = dict(value)
+        required = schema.get("required", [])
+        for field, field_schema in schema.get("properties", {}).items():
+            if field not in normalized:
+                continue
+            normalized[field] = normalize_output(normalized[field], field_schema)
+            if field not in required and not _matches_type(normalized[field], field_schema):
+                del normalized[field]
+        return normalized
+    if schema.get("type") == "array" and isinstance(value, list) and "items" in schema:
+        items = [normalize_output(item, schema["items"]) for item in value]
+        return [item for item in items if _matches_type(item, schema["items"])]
+    return value
+
+
+def validate_schema(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Validate a (normalised) reply against the fields callers rely on.
+
+    The reply must match the schema's type; for objects, required fields
+    must be present and every top-level field must have its type and be in
+    its enum. Nested items are not checked: a single malformed issue does
+    not invalidate a report, the caller skips or normalises it. Extra
+    properties are tolerated.
+
+    Args:
+        value: Parsed JSON value (see normalize_output)
+        schema: JSON schema
+        path: Location of value (for error messages)
+
+    Returns:
+        List of validation errors (empty if valid)
+    """
+    if not _matches_type(value, schema):
+        return [f"{path}: expected {schema.get('type')}"]
+
+    errors: List[str] = []
+    if schema.get("type") == "object":
+        for field in schema.get("required", []):
+            if field not in value:
+                errors.append(f"{path}.{field}: missing")
+        for field, field_schema in schema.get("properties", {}).items():
+            if field not in value:
+                continue
+            if not _matches_type(value[field], field_schema):
+                errors.append(f"{path}.{field}: expected {field_schema.get('type')}")
+            elif "enum" in field_schema and value[field] not in field_schema["enum"]:
+                errors.append(f"{path}.{field}: {value[field]!r} not in {field_schema['enum']}")
+    return errors
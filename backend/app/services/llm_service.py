@@ -14,11 +14,48 @@ Reference: Inspired by OLD/RagBot/inference.py (lines 43-93)
 Phase 5: HARDENED - Fallback strategy, cost controls, failure detection
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import asyncio
+import hashlib
 import logging
+import threading
+import time
 import requests
 import json
 from app.core.config import settings
+from app.utils.single_flight import SingleFlight, make_key
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.llm_hedging import HedgingPolicy, LLMCallCancelled, estimate_tokens, openai_cost
+from app.services.llm_balancer import LLMBalancer, LLMEndpoint
+from app.services.prompt_builder import PromptBuilder, TokenCounter
+from app.services.prompt_templates import get_prompt_template
+from app.services.llm_telemetry import (
+    LLMCallRecord,
+    LLMTelemetry,
+    OUTCOME_CANCELLED,
+    OUTCOME_ERROR,
+    OUTCOME_REJECTED,
+    OUTCOME_TIMEOUT
+)
+from app.core.metrics import gauge_lines
+from app.services.llm_schemas import (
+    FORMAT_LEVELS,
+    FORMAT_JSON_SCHEMA,
+    FORMAT_NONE,
+    get_schema,
+    next_format_level,
+    normalize_output,
+    parse_json_output,
+    response_format_payload,
+    validate_schema
+)
+from app.services.llm_scheduler import (
+    LLMScheduler,
+    LLMOverloadedError,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BATCH
+)
 
 logger = logging.getLogger(__name__)
 
@@ -54,11 +91,16 @@ class LLMService:
     3. Final: Safe default response
     
     Safety Controls:
-    - Hard token limits (2000 max)
+    - Hard token limits (2000 max), sized to the context left after the prompt
     - Timeout handling (30s)
     - JSON validation
     - Cost logging for OpenAI
     - No retries (fail fast)
+    - Concurrent identical prompts coalesced onto one upstream call
+    - Admission control: bounded concurrency with interactive > batch priority
+    - Circuit breaker per backend: open circuits are skipped immediately
+    - Opt-in hedging: slow interactive local calls are raced against OpenAI
+    - Client-side load balancing across several local LLM endpoints
     """
     
     def __init__(
@@ -73,13 +115,14 @@ class LLMService:
         Initialize the LLM service.
         
         Args:
-            api_url: URL of the LLM API endpoint
+            api_url: URL of the LLM API endpoint (overrides settings.llm_api_urls)
             model_name: Name of the model to use
             temperature: Sampling temperature (0-1, lower = more deterministic)
             max_tokens: Maximum tokens to generate
             timeout: Request timeout in seconds
         """
-        self.api_url = api_url or settings.llm_api_url
+        self.api_urls = [api_url] if api_url else (list(settings.llm_api_urls) or [settings.llm_api_url])
+        self.api_url = self.api_urls[0]
         self.model_name = model_name or settings.llm_model_name
         self.temperature = temperature
         self.max_tokens = max_tokens
@@ -88,14 +131,96 @@ class LLMService:
         # OpenAI fallback settings
         self.use_openai_fallback = settings.use_openai_fallback
         self.openai_api_key = settings.openai_api_key
+        self.openai_api_url = settings.openai_api_url
         self.openai_model = settings.openai_model
         
+        # Request coalescing (identical concurrent prompts share one call)
+        self.coalesce_requests = settings.llm_coalesce_requests
+        self._single_flight = SingleFlight()
+        
+        # Admission control in front of the local LLM
+        # (llm_max_concurrency slots per available endpoint)
+        self.scheduler = LLMScheduler(
+            max_concurrency=settings.llm_max_concurrency * len(self.api_urls),
+            max_queue_depth=settings.llm_max_queue_depth,
+            queue_timeouts={
+                PRIORITY_INTERACTIVE: settings.llm_queue_timeout_interactive,
+                PRIORITY_BATCH: settings.llm_queue_timeout_batch
+            }
+        )
+        
+        # Load balancing across local endpoints; the scheduler follows capacity
+        self.balancer = LLMBalancer(
+            urls=self.api_urls,
+            strategy=settings.llm_balancing_strategy,
+            eject_after_failures=settings.llm_endpoint_eject_after_failures,
+            ejection_seconds=settings.llm_endpoint_ejection_seconds,
+            on_capacity_change=lambda available: self.scheduler.set_max_concurrency(
+                settings.llm_max_concurrency * max(1, available)
+            )
+        )
+        
+        # Circuit breakers (one per backend) and cached local availability
+        self.breakers = {
+            name: CircuitBreaker(
+                name=name,
+                failure_rate_threshold=settings.llm_circuit_failure_rate,
+                min_calls=settings.llm_circuit_min_calls,
+                window_size=settings.llm_circuit_window,
+                slow_call_seconds=settings.llm_circuit_slow_call_seconds,
+                open_seconds=settings.llm_circuit_open_seconds
+            )
+            for name in ("local", "openai")
+        }
+        self.local_available: Optional[bool] = None
+        self.local_available_checked_at: Optional[float] = None
+        self._probe_stop = threading.Event()
+        self._probe_thread: Optional[threading.Thread] = None
+        
+        # Hedging policy for interactive calls (opt-in, needs OpenAI fallback)
+        self.hedging = HedgingPolicy(
+            enabled=settings.llm_hedging_enabled,
+            default_delay=settings.llm_hedge_default_delay,
+            min_delay=settings.llm_hedge_min_delay,
+            max_delay=settings.llm_hedge_max_delay,
+            percentile=settings.llm_hedge_percentile
+        )
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        
+        # Token-budgeted prompt assembly
+        self.prompt_builder = PromptBuilder(
+            token_counter=TokenCounter(settings.llm_tokenizer_name),
+            context_window=settings.llm_context_window,
+            max_completion_tokens=settings.llm_max_tokens,
+            min_completion_tokens=settings.llm_min_completion_tokens,
+            chunk_tokens_estimate=settings.regulation_chunk_tokens_estimate
+        )
+        
+        # Structured output: capability level per backend URL, downgraded
+        # when a backend rejects a response_format with HTTP 400
+        if settings.llm_structured_output_level not in FORMAT_LEVELS:
+            raise ValueError(f"Unknown structured output level: {settings.llm_structured_output_level}")
+        self.structured_output_level = settings.llm_structured_output_level
+        self._format_levels: Dict[str, str] = {}
+        self._format_lock = threading.Lock()
+        self.structured_outputs: Dict[str, Dict[str, int]] = {}
+        
+        # Prompt-cache hints for llama.cpp-style servers (dropped per
+        # backend if it rejects them)
+        self.cache_prompt = settings.llm_cache_prompt
+        self.prompt_cache_slots = settings.llm_prompt_cache_slots
+        self._cache_hints_rejected: set = set()
+        
+        # Per-call telemetry (streamed responses also give time to first token)
+        self.stream_responses = settings.llm_stream_responses
+        self.telemetry = LLMTelemetry(metrics_dir=settings.metrics_dir)
+        
         # Call tracking
         self.local_llm_calls = 0
         self.openai_calls = 0
         self.fallback_calls = 0
         
-        logger.info(f"LLMService initialized with model: {self.model_name} at {self.api_url}")
+        logger.info(f"LLMService initialized with model: {self.model_name} at {', '.join(self.api_urls)}")
         if self.use_openai_fallback:
             logger.info(f"OpenAI fallback ENABLED with model: {self.openai_model}")
         else:
@@ -106,23 +231,539 @@ class LLMService:
         messages: List[Dict[str, str]], 
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        response_format: Optional[str] = None
+        response_format: Optional[str] = None,
+        priority: str = PRIORITY_INTERACTIVE,
+        hedge: bool = False,
+        schema: Optional[str] = None
     ) -> str:
         """
         Generate a chat completion using the local LLM.
         
+        Concurrent calls with an identical payload are coalesced: only the
+        first one reaches the LLM and the others receive its response.
+        The upstream call waits for a scheduler slot first. If the local
+        circuit is open the call fails immediately without queueing.
+        
+        With hedge=True (and hedging plus the OpenAI fallback enabled), a
+        local call that has not returned within the hedge delay is raced
+        against OpenAI and the first valid result is returned.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Override default temperature
+            max_tokens: Override default max tokens
+            response_format: Expected format (e.g., "json")
+            priority: Scheduling priority ("interactive" or "batch")
+            hedge: Allow hedging this call against the fallback backend
+            schema: Registered output schema name (implies JSON); sent as a
+                json_schema response_format to backends that support it
+            
+        Returns:
+            Generated text response from the LLM
+            
+        Raises:
+            CircuitOpenError: If the local LLM circuit is open
+            LLMOverloadedError: If no LLM slot frees up before the queue deadline
+            RuntimeError: If LLM call fails
+        """
+        payload = self._build_payload(messages, temperature, max_tokens, response_format, schema)
+        
+        if hedge and self.hedging.enabled and self._openai_enabled():
+            key = "hedged:" + make_key(payload)
+            call = lambda: self._hedged_completion(
+                payload, messages, temperature, max_tokens, response_format, priority, schema
+            )
+        else:
+            if not self.breakers["local"].can_attempt():
+                raise CircuitOpenError("Local LLM circuit open")
+            key = make_key(payload)
+            call = lambda: self._local_call(payload, priority)
+        
+        if not self.coalesce_requests:
+            return call()
+        
+        content, shared = self._single_flight.do(key, call)
+        if shared:
+            logger.info("[LOCAL LLM] Coalesced with identical in-flight request")
+        return content
+    
+    async def chat_completion_async(
+        self, 
+        messages: List[Dict[str, str]], 
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        response_format: Optional[str] = None,
+        priority: str = PRIORITY_INTERACTIVE,
+        hedge: bool = False,
+        schema: Optional[str] = None
+    ) -> str:
+        """
+        Async variant of chat_completion for callers on the event loop.
+        
+        Identical concurrent requests are coalesced on the loop before a
+        worker thread is used, so waiters do not each hold a thread.
+        
         Args:
             messages: List of message dictionaries with 'role' and 'content'
             temperature: Override default temperature
             max_tokens: Override default max tokens
             response_format: Expected format (e.g., "json")
+            priority: Scheduling priority ("interactive" or "batch")
+            hedge: Allow hedging this call against the fallback backend
+            schema: Registered output schema name (implies JSON); sent as a
+                json_schema response_format to backends that support it
             
         Returns:
             Generated text response from the LLM
             
         Raises:
+            CircuitOpenError: If the local LLM circuit is open
+            LLMOverloadedError: If no LLM slot frees up before the queue deadline
             RuntimeError: If LLM call fails
         """
+        call = lambda: asyncio.to_thread(
+            self.chat_completion, messages, temperature, max_tokens, response_format, priority, hedge, schema
+        )
+        
+        if not self.coalesce_requests:
+            return await call()
+        
+        payload = self._build_payload(messages, temperature, max_tokens, response_format, schema)
+        key = ("hedged:" if hedge else "") + make_key(payload)
+        content, shared = await self._single_flight.do_async(key, call)
+        if shared:
+            logger.info("[LOCAL LLM] Coalesced with identical in-flight request (async)")
+        return content
+    
+    def _local_call(
+        self,
+        payload: Dict[str, Any],
+        priority: str,
+        cancel_event: Optional[threading.Event] = None
+    ) -> str:
+        """
+        Run one local LLM call: scheduler slot, circuit breaker, HTTP request.
+        
+        Args:
+            payload: Request payload from _build_payload
+            priority: Scheduling priority
+            cancel_event: Set to abandon the call (hedged race lost)
+            
+        Returns:
+            Generated text response from the LLM
+        """
+        started = time.monotonic()
+        try:
+            with self.scheduler.slot(priority) as queue_wait:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise LLMCallCancelled("Local LLM call cancelled before start")
+                content = self._call_with_breaker(
+                    self.breakers["local"],
+                    lambda: self._post_chat_completion(payload, cancel_event, queue_wait)
+                )
+        except LLMOverloadedError:
+            record = LLMCallRecord("local", "", self._task_of(payload))
+            record.outcome = OUTCOME_REJECTED
+            record.queue_wait = time.monotonic() - started
+            self.telemetry.record(record)
+            raise
+        self.hedging.observe_latency(time.monotonic() - started)
+        return content
+    
+    def _hedged_completion(
+        self,
+        payload: Dict[str, Any],
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        response_format: Optional[str],
+        priority: str,
+        schema: Optional[str] = None
+    ) -> str:
+        """
+        Race the local LLM against OpenAI once the hedge delay has passed.
+        
+        The local call starts immediately. If it has not produced a valid
+        result within the policy's p95-based delay (or fails, is overloaded,
+        or its circuit is open), the same request goes to OpenAI. The first valid result
+        wins and the other call is cancelled: a queued call never starts and
+        a streaming call is closed at its next chunk.
+        
+        Args:
+            payload: Local LLM payload
+            messages: Chat messages (for the OpenAI request)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens
+            response_format: Expected format (e.g., "json")
+            priority: Scheduling priority of the local call
+            schema: Registered output schema name
+            
+        Returns:
+            Generated text response from the winning backend
+            
+        Raises:
+            LLMOverloadedError: If the local LLM was overloaded and OpenAI failed
+            RuntimeError: If both backends fail
+        """
+        policy = self.hedging
+        policy.record_request()
+        executor = self._get_hedge_executor()
+        cancel_events = {"local": threading.Event(), "openai": threading.Event()}
+        pending = {}
+        failover = True
+        overload: Optional[LLMOverloadedError] = None
+        
+        if self.breakers["local"].can_attempt():
+            local_future = executor.submit(self._local_call, payload, priority, cancel_events["local"])
+            delay = policy.hedge_delay()
+            done, _ = wait([local_future], timeout=delay)
+            if not done:
+                failover = False
+                pending[local_future] = "local"
+                logger.info(f"[HEDGE] Local LLM slower than {delay:.1f}s - hedging to OpenAI")
+            else:
+                try:
+                    content = local_future.result()
+                    if self._is_valid_output(content, response_format, schema):
+                        policy.record_win("local")
+                        return content
+                    logger.warning("[HEDGE] Local LLM returned invalid output - failing over to OpenAI")
+                except Exception as e:
+                    if isinstance(e, LLMOverloadedError):
+                        overload = e
+                    logger.warning(f"[HEDGE] Local LLM failed ({e}) - failing over to OpenAI")
+        
+        policy.record_hedge(failover=failover)
+        openai_future = executor.submit(
+            self._openai_hedge_call, messages, temperature, max_tokens, cancel_events["openai"], schema
+        )
+        pending[openai_future] = "openai"
+        
+        try:
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    backend = pending.pop(future)
+                    try:
+                        content = future.result()
+                    except Exception as e:
+                        if isinstance(e, LLMOverloadedError):
+                            overload = e
+                        logger.warning(f"[HEDGE] {backend} call failed: {e}")
+                        continue
+                    if self._is_valid_output(content, response_format, schema):
+                        policy.record_win(backend)
+                        logger.info(f"[HEDGE] {backend} won the race")
+                        return content
+                    logger.warning(f"[HEDGE] {backend} returned invalid output")
+            # A local overload is still reported as overload, so the caller
+            # retries later instead of treating it as a failure
+            if overload is not None:
+                raise overload
+            raise RuntimeError("Hedged LLM request failed on all backends")
+        finally:
+            for event in cancel_events.values():
+                event.set()
+    
+    def _openai_hedge_call(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        cancel_event: threading.Event,
+        schema: Optional[str] = None
+    ) -> str:
+        """
+        OpenAI leg of a hedged request, with its token usage and cost recorded.
+        
+        Cost is only recorded once OpenAI has answered (with the reported
+        usage, or the partial content of a stream cancelled mid-way); a call
+        cancelled before its request went out costs nothing.
+        
+        Args:
+            messages: Chat messages
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens
+            cancel_event: Set when the local call won the race
+            schema: Registered output schema name
+            
+        Returns:
+            Generated text response
+            
+        Raises:
+            LLMCallCancelled: If the local call won before the request was sent
+        """
+        if cancel_event.is_set():
+            raise LLMCallCancelled("OpenAI hedge cancelled before start")
+        usage: Dict[str, Any] = {}
+        try:
+            content = self.chat_completion_openai(
+                messages, temperature, max_tokens,
+                cancel_event=cancel_event, usage_sink=usage, schema=schema
+            )
+        except Exception:
+            # Usage (or partial content) is only present if OpenAI answered
+            if usage:
+                self._record_hedge_cost(messages, usage, "")
+            raise
+        self._record_hedge_cost(messages, usage, content)
+        return content
+    
+    def _record_hedge_cost(self, messages: List[Dict[str, str]], usage: Dict[str, Any], content: str) -> None:
+        """Record the tokens and cost of an answered OpenAI hedge call."""
+        prompt_tokens = usage.get("prompt_tokens") or estimate_tokens(json.dumps(messages))
+        completion_tokens = usage.get("completion_tokens") or estimate_tokens(
+            content or usage.get("partial_content", "")
+        )
+        self.hedging.record_cost(
+            prompt_tokens + completion_tokens,
+            openai_cost(
+                prompt_tokens,
+                completion_tokens,
+                settings.openai_cost_per_1k_prompt_tokens,
+                settings.openai_cost_per_1k_completion_tokens
+            )
+        )
+    
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        """Create the hedging thread pool on first use."""
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+        return self._hedge_executor
+    
+    def _openai_enabled(self) -> bool:
+        """Whether the OpenAI fallback is enabled and configured."""
+        return bool(self.use_openai_fallback and self.openai_api_key)
+    
+    def _is_valid_output(self, content: str, response_format: Optional[str], schema: Optional[str] = None) -> bool:
+        """
+        Check that a response is usable (non-empty, a JSON object when JSON
+        output was requested, and matching the schema if one was given).
+        
+        Args:
+            content: Response text
+            response_format: Expected format (e.g., "json")
+            schema: Registered output schema name
+            
+        Returns:
+            True if the response can be returned to the caller
+        """
+        if not content or not content.strip():
+            return False
+        if response_format != "json" and schema is None:
+            return True
+        data = parse_json_output(content)
+        if not isinstance(data, dict):
+            return False
+        if schema is None:
+            return True
+        schema_def = get_schema(schema)
+        return not validate_schema(normalize_output(data, schema_def), schema_def)
+    
+    def parse_structured_output(self, content: str, schema: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse and validate a response produced for an output schema.
+        
+        Outcomes are counted per schema so the invalid-output rate shows
+        up in get_stats().
+        
+        Args:
+            content: Response text
+            schema: Registered output schema name
+            
+        Returns:
+            Parsed JSON object (normalised, see normalize_output), or None if
+            it lacks what the schema's callers need
+        """
+        data = parse_json_output(content)
+        if not isinstance(data, dict):
+            errors = ["$: not a JSON object"]
+        else:
+            data = normalize_output(data, get_schema(schema))
+            errors = validate_schema(data, get_schema(schema))
+        
+        with self._format_lock:
+            counts = self.structured_outputs.setdefault(schema, {"valid": 0, "invalid": 0})
+            counts["invalid" if errors else "valid"] += 1
+        
+        if errors:
+            logger.error(f"[STRUCTURED OUTPUT] {schema} response invalid: {'; '.join(errors[:5])}")
+            logger.error(f"Response was: {(content or '')[:500]}")
+            return None
+        return data
+    
+    def _format_level(self, url: str) -> str:
+        """Structured output capability level currently used for a backend."""
+        with self._format_lock:
+            return self._format_levels.get(url, self.structured_output_level)
+    
+    def _downgrade_format_level(self, url: str, rejected: str) -> None:
+        """Move a backend to the next weaker level after it rejected one."""
+        with self._format_lock:
+            if self._format_levels.get(url, self.structured_output_level) == rejected:
+                self._format_levels[url] = next_format_level(rejected)
+                logger.warning(
+                    f"[STRUCTURED OUTPUT] {url} rejected {rejected} - using {self._format_levels[url]}"
+                )
+    
+    def _apply_format_level(self, payload: Dict[str, Any], level: str) -> Dict[str, Any]:
+        """
+        Rewrite a payload's response_format for a backend capability level.
+        
+        Args:
+            payload: Payload built with the strongest response_format
+            level: Capability level of the target backend
+            
+        Returns:
+            Payload to send (the input is not modified)
+        """
+        requested = payload.get("response_format")
+        if requested is None:
+            return payload
+        schema = requested.get("json_schema", {}).get("name")
+        adapted = {k: v for k, v in payload.items() if k != "response_format"}
+        response_format = response_format_payload(schema, level)
+        if response_format is not None:
+            adapted["response_format"] = response_format
+        return adapted
+    
+    def _cache_hints(self, url: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Prompt-cache hints for a local backend.
+        
+        cache_prompt asks the server to keep the KV cache of the prompt.
+        With prompt_cache_slots set, id_slot pins each system prompt to one
+        server slot so its prefix is still cached on the next call.
+        
+        Args:
+            url: Backend chat completions URL
+            messages: Chat messages of the request
+            
+        Returns:
+            Extra payload fields (empty if disabled or rejected)
+        """
+        if not self.cache_prompt:
+            return {}
+        with self._format_lock:
+            if url in self._cache_hints_rejected:
+                return {}
+        hints: Dict[str, Any] = {"cache_prompt": True}
+        if self.prompt_cache_slots > 0 and messages and messages[0].get("role") == "system":
+            digest = hashlib.sha1(messages[0]["content"].encode("utf-8")).hexdigest()
+            hints["id_slot"] = int(digest[:8], 16) % self.prompt_cache_slots
+        return hints
+    
+    def _post_with_capability_fallback(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        stream: bool,
+        cache_hints: bool = False
+    ) -> requests.Response:
+        """
+        POST a chat completion, adapting to what the backend accepts.
+        
+        The structured output level is downgraded when the backend rejects
+        the response_format, and prompt-cache hints are dropped when it
+        rejects those; the request is then retried.
+        
+        Args:
+            url: Backend chat completions URL
+            headers: Request headers
+            payload: Payload built with the strongest response_format
+            stream: Whether to stream the response
+            cache_hints: Add prompt-cache hints (local backends only)
+            
+        Returns:
+            HTTP response of the first request the backend accepted (or of
+            the final attempt)
+        """
+        while True:
+            level = self._format_level(url)
+            request_payload = self._apply_format_level(payload, level)
+            if cache_hints:
+                request_payload = {**request_payload, **self._cache_hints(url, payload.get("messages", []))}
+            response = requests.post(
+                url,
+                headers=headers,
+                json=request_payload,
+                timeout=self.timeout,
+                stream=stream
+            )
+            if response.status_code != 400:
+                return response
+            
+            error_text = (response.text or "").lower()
+            if "cache_prompt" in request_payload and ("cache_prompt" in error_text or "id_slot" in error_text):
+                with self._format_lock:
+                    self._cache_hints_rejected.add(url)
+                logger.warning(f"[LOCAL LLM] {url} rejected prompt-cache hints - disabling them")
+                continue
+            if "response_format" in request_payload and level != FORMAT_NONE and self._is_format_rejection(error_text):
+                self._downgrade_format_level(url, level)
+                continue
+            return response
+    
+    @staticmethod
+    def _is_format_rejection(error_text: str) -> bool:
+        """Whether an HTTP 400 body complains about the response_format."""
+        text = (error_text or "").lower()
+        return any(marker in text for marker in ("response_format", "json_schema", "json_object", "grammar", "schema"))
+    
+    def _call_with_breaker(self, breaker: CircuitBreaker, fn):
+        """
+        Run a backend call and feed its outcome to the circuit breaker.
+        
+        Args:
+            breaker: Circuit breaker of the backend being called
+            fn: Zero-argument callable performing the call
+            
+        Returns:
+            Result of fn
+            
+        Raises:
+            CircuitOpenError: If the breaker rejects the call
+        """
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"{breaker.name} circuit open")
+        
+        started = time.monotonic()
+        try:
+            result = fn()
+        except LLMCallCancelled:
+            breaker.record_ignored()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success(time.monotonic() - started)
+        return result
+    
+    def _build_payload(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        response_format: Optional[str] = None,
+        schema: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the request payload for the local LLM.
+        
+        The response_format is built at the strongest level; it is adapted
+        to each backend's capability when the request is sent.
+        
+        Args:
+            messages: Chat messages
+            temperature: Override default temperature
+            max_tokens: Override default max tokens
+            response_format: Expected format (e.g., "json")
+            schema: Registered output schema name
+            
+        Returns:
+            OpenAI-compatible chat completion payload
+        """
         payload = {
             "model": self.model_name,
             "messages": messages,
@@ -131,53 +772,154 @@ class LLMService:
             "stream": False
         }
         
-        # Add JSON mode if supported (DISABLED for LM Studio compatibility)
-        # if response_format == "json":
-        #     payload["response_format"] = {"type": "json_object"}
+        if response_format == "json" or schema is not None:
+            payload["response_format"] = response_format_payload(schema, FORMAT_JSON_SCHEMA)
         
+        return payload
+    
+    def _post_chat_completion(
+        self,
+        payload: Dict[str, Any],
+        cancel_event: Optional[threading.Event] = None,
+        queue_wait: Optional[float] = None
+    ) -> str:
+        """
+        Send a chat completion payload to the local LLM.
+        
+        When a cancel event is given (or streaming is enabled) the response
+        is streamed, so the call can be abandoned mid-generation and its
+        time to first token is measured.
+        
+        Args:
+            payload: Request payload from _build_payload
+            cancel_event: Set to abandon the call
+            queue_wait: Seconds the call waited for a scheduler slot (telemetry)
+            
+        Returns:
+            Generated text response from the LLM
+            
+        Raises:
+            LLMCallCancelled: If the cancel event was set
+            RuntimeError: If LLM call fails
+        """
         headers = {"Content-Type": "application/json"}
+        stream = cancel_event is not None or self.stream_responses
+        if stream:
+            payload = {**payload, "stream": True}
+        
+        endpoint = self.balancer.acquire()
+        started = time.monotonic()
+        endpoint_ok = False
+        record = LLMCallRecord("local", endpoint.url, self._task_of(payload))
+        record.queue_wait = queue_wait
+        timing: Dict[str, Any] = {}
         
         try:
             self.local_llm_calls += 1
-            logger.info(f"[LOCAL LLM] Call #{self.local_llm_calls} to {self.api_url}")
+            logger.info(f"[LOCAL LLM] Call #{self.local_llm_calls} to {endpoint.url}")
             logger.debug(f"[LOCAL LLM] Payload: {json.dumps(payload, indent=2)}")
             
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self._post_with_capability_fallback(endpoint.url, headers, payload, stream, cache_hints=True)
             
             if response.status_code != 200:
                 logger.error(f"[LOCAL LLM] API returned status {response.status_code}: {response.text}")
                 raise RuntimeError(f"LLM API error: {response.status_code}")
             
-            result = response.json()
-            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+            if stream:
+                content, usage = self._read_stream(response, cancel_event, timing_sink=timing)
+            else:
+                result = response.json()
+                content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+                usage = result.get("usage")
             
             if not content:
                 logger.error("[LOCAL LLM] Returned empty response")
                 raise RuntimeError("Empty LLM response")
             
-            logger.info(f"[LOCAL LLM] Response received ({len(content)} characters)")
+            latency = time.monotonic() - started
+            self._finish_record(record, payload, content, usage, started, latency, timing)
+            logger.info(
+                f"[LOCAL LLM] Response received ({len(content)} characters, "
+                f"{record.completion_tokens} tokens, {latency:.1f}s)"
+            )
+            endpoint_ok = True
+            self.balancer.release(endpoint, success=True, latency=latency)
             return content
             
+        except LLMCallCancelled:
+            logger.info("[LOCAL LLM] Call cancelled (hedged race lost)")
+            record.outcome = OUTCOME_CANCELLED
+            endpoint_ok = True
+            self.balancer.release(endpoint, success=True)
+            raise
         except requests.Timeout:
             logger.error(f"[LOCAL LLM] Request timed out after {self.timeout}s")
+            record.outcome = OUTCOME_TIMEOUT
             raise RuntimeError("LLM request timeout")
         except requests.RequestException as e:
             logger.error(f"[LOCAL LLM] Request failed: {e}")
+            record.outcome = OUTCOME_ERROR
             raise RuntimeError(f"LLM request failed: {str(e)}")
         except Exception as e:
             logger.error(f"[LOCAL LLM] Unexpected error: {e}")
+            record.outcome = OUTCOME_ERROR
             raise RuntimeError(f"LLM error: {str(e)}")
+        finally:
+            if not endpoint_ok:
+                self.balancer.release(endpoint, success=False)
+            if record.latency is None:
+                record.latency = time.monotonic() - started
+            self.telemetry.record(record)
+    
+    def _task_of(self, payload: Dict[str, Any]) -> str:
+        """Telemetry task label: the output schema name, or "chat"."""
+        response_format = payload.get("response_format") or {}
+        return response_format.get("json_schema", {}).get("name") or "chat"
+    
+    def _finish_record(
+        self,
+        record: LLMCallRecord,
+        payload: Dict[str, Any],
+        content: str,
+        usage: Optional[Dict[str, Any]],
+        started: float,
+        latency: float,
+        timing: Dict[str, Any]
+    ) -> None:
+        """
+        Fill in latency and token counts of a successful call.
+        
+        Token counts come from the reported usage; backends that do not
+        report it (e.g. when streaming) get tokenizer estimates.
+        
+        Args:
+            record: Record to complete
+            payload: Request payload
+            content: Generated text
+            usage: Reported token usage (or None)
+            started: Monotonic start time of the call
+            latency: Call duration in seconds
+            timing: Stream timing ("first_token_at")
+        """
+        record.latency = latency
+        if "first_token_at" in timing:
+            record.ttft = timing["first_token_at"] - started
+        if usage and usage.get("completion_tokens") is not None:
+            record.prompt_tokens = usage.get("prompt_tokens")
+            record.completion_tokens = usage["completion_tokens"]
+        else:
+            record.prompt_tokens = self.prompt_builder.count_messages(payload.get("messages", []))
+            record.completion_tokens = self.prompt_builder.counter.count(content)
+            record.tokens_estimated = True
     
     def chat_completion_openai(
         self,
         messages: List[Dict[str, str]],
         temperature: Optional[float] = None,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None,
+        usage_sink: Optional[Dict[str, Any]] = None,
+        schema: Optional[str] = None
     ) -> str:
         """
         Generate a chat completion using OpenAI API (fallback).
@@ -188,6 +930,9 @@ class LLMService:
             messages: List of message dictionaries
             temperature: Sampling temperature
             max_tokens: Maximum tokens
+            cancel_event: Set to abandon the call (streams the response)
+            usage_sink: Optional dict that receives the reported token usage
+            schema: Registered output schema name (JSON mode is used without one)
             
         Returns:
             Generated text response
@@ -198,53 +943,152 @@ class LLMService:
         if not self.openai_api_key:
             raise RuntimeError("OpenAI API key not configured")
         
+        breaker = self.breakers["openai"]
+        if not breaker.can_attempt():
+            raise CircuitOpenError("OpenAI circuit open")
+        
         payload = {
             "model": self.openai_model,
             "messages": messages,
             "temperature": temperature if temperature is not None else self.temperature,
             "max_tokens": max_tokens if max_tokens is not None else self.max_tokens,
-            "response_format": {"type": "json_object"}
+            "response_format": response_format_payload(schema, FORMAT_JSON_SCHEMA)
         }
         
+        return self._call_with_breaker(
+            breaker,
+            lambda: self._post_openai_completion(payload, cancel_event, usage_sink)
+        )
+    
+    def _post_openai_completion(
+        self,
+        payload: Dict[str, Any],
+        cancel_event: Optional[threading.Event] = None,
+        usage_sink: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Send a chat completion payload to the OpenAI API.
+        
+        Args:
+            payload: OpenAI chat completion payload
+            cancel_event: Set to abandon the call (streams the response)
+            usage_sink: Optional dict that receives the reported token usage
+            
+        Returns:
+            Generated text response
+            
+        Raises:
+            LLMCallCancelled: If the cancel event was set
+            RuntimeError: If OpenAI call fails
+        """
+        stream = cancel_event is not None or self.stream_responses
+        if stream:
+            payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+        
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.openai_api_key}"
         }
+        started = time.monotonic()
+        record = LLMCallRecord("openai", self.openai_api_url, self._task_of(payload))
+        timing: Dict[str, Any] = {}
         
         try:
             self.openai_calls += 1
             logger.warning(f"[OPENAI FALLBACK] Call #{self.openai_calls} - COST INCURRED")
             logger.warning(f"[OPENAI FALLBACK] Estimated cost: $0.0001-0.0005 per call")
             
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self._post_with_capability_fallback(self.openai_api_url, headers, payload, stream)
             
             if response.status_code != 200:
                 logger.error(f"[OPENAI FALLBACK] API returned status {response.status_code}")
                 raise RuntimeError(f"OpenAI API error: {response.status_code}")
             
-            result = response.json()
-            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+            if stream:
+                content, usage = self._read_stream(response, cancel_event, usage_sink, timing_sink=timing)
+            else:
+                result = response.json()
+                content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+                usage = result.get("usage")
+            if usage_sink is not None and usage:
+                usage_sink.update(usage)
             
             if not content:
                 logger.error("[OPENAI FALLBACK] Returned empty response")
                 raise RuntimeError("Empty OpenAI response")
             
+            self._finish_record(record, payload, content, usage, started, time.monotonic() - started, timing)
             logger.info(f"[OPENAI FALLBACK] Response received ({len(content)} characters)")
             return content
             
+        except LLMCallCancelled:
+            logger.info("[OPENAI FALLBACK] Call cancelled (hedged race lost)")
+            record.outcome = OUTCOME_CANCELLED
+            raise
         except Exception as e:
             logger.error(f"[OPENAI FALLBACK] Failed: {e}")
+            record.outcome = OUTCOME_TIMEOUT if isinstance(e, requests.Timeout) else OUTCOME_ERROR
             raise RuntimeError(f"OpenAI error: {str(e)}")
+        finally:
+            if record.latency is None:
+                record.latency = time.monotonic() - started
+            self.telemetry.record(record)
+    
+    def _read_stream(
+        self,
+        response: requests.Response,
+        cancel_event: Optional[threading.Event],
+        partial_sink: Optional[Dict[str, Any]] = None,
+        timing_sink: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Read an OpenAI-compatible SSE stream, checking for cancellation
+        between chunks.
+        
+        Args:
+            response: Streaming HTTP response
+            cancel_event: Closes the stream when set
+            partial_sink: Optional dict that receives the partial content on cancel
+            timing_sink: Optional dict that receives the monotonic time of the
+                first content chunk ("first_token_at")
+            
+        Returns:
+            Tuple of (content, usage or None)
+            
+        Raises:
+            LLMCallCancelled: If the cancel event was set
+        """
+        parts: List[str] = []
+        usage = None
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if cancel_event is not None and cancel_event.is_set():
+                    if partial_sink is not None:
+                        partial_sink["partial_content"] = "".join(parts)
+                    raise LLMCallCancelled("Streaming call cancelled")
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                for choice in chunk.get("choices") or []:
+                    delta = choice.get("delta") or {}
+                    if delta.get("content"):
+                        if not parts and timing_sink is not None:
+                            timing_sink["first_token_at"] = time.monotonic()
+                        parts.append(delta["content"])
+        finally:
+            response.close()
+        return "".join(parts), usage
     
     def generate_compliance_analysis(
         self, 
         application_details: Dict[str, Any], 
-        relevant_regulations: List[str]
+        relevant_regulations: List[str],
+        department: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate a structured compliance analysis report with fallback strategy.
@@ -256,65 +1100,15 @@ class LLMService:
         
         Args:
             application_details: Dictionary of application information
-            relevant_regulations: List of relevant regulation texts
+            relevant_regulations: Relevant regulation texts, best match first
+                (packed into the context budget; see regulation_chunk_capacity)
+            department: Restrict the analysis to one department (smaller
+                prompt and completion; see ComplianceService fan-out)
             
         Returns:
             Structured compliance analysis as dictionary
         """
-        # Build the analysis prompt
-        system_prompt = """You are an expert compliance analyst for industrial regulations in Kerala, India.
-
-Your task is to analyze industrial applications against regulations and produce a structured JSON report.
-
-CRITICAL RULES:
-1. You MUST respond with valid JSON only
-2. Be objective and cite specific regulations
-3. Flag ambiguities - do not make assumptions
-4. Categorize issues by risk level (low/medium/high)
-5. Provide actionable checklist items
-
-Output ONLY valid JSON matching this exact structure:
-{
-  "overall_status": "compliant" | "partially_compliant" | "non_compliant",
-  "confidence_score": 0-100,
-  "time_saved_minutes": number,
-  "regulation_coverage_percent": number,
-  "issues": [
-    {
-      "type": "missing_document" | "violation" | "ambiguity",
-      "risk_level": "low" | "medium" | "high",
-      "department": "environment" | "fire" | "local_body" | "other",
-      "regulation_reference": {
-        "name": "regulation name",
-        "clause": "clause reference"
-      },
-      "document_excerpt": "relevant excerpt from regulation",
-      "explanation": "clear explanation of the issue"
-    }
-  ],
-  "checklist": ["actionable item 1", "actionable item 2"]
-}"""
-
-        # Format application details
-        app_summary = "\n".join([f"- {k}: {v}" for k, v in application_details.items()])
-        
-        # Format regulations
-        reg_summary = "\n\n".join([f"REGULATION {i+1}:\n{reg}" for i, reg in enumerate(relevant_regulations[:5])])
-        
-        user_prompt = f"""Analyze this industrial application for compliance:
-
-APPLICATION DETAILS:
-{app_summary}
-
-RELEVANT REGULATIONS:
-{reg_summary}
-
-Provide a comprehensive compliance analysis in JSON format."""
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
+        messages, max_tokens = self._build_compliance_messages(application_details, relevant_regulations, department)
         
         # STRATEGY 1: Try Local LLM
         try:
@@ -322,8 +1116,10 @@ Provide a comprehensive compliance analysis in JSON format."""
             response_text = self.chat_completion(
                 messages=messages,
                 temperature=0.3,
-                max_tokens=2000,
-                response_format="json"
+                max_tokens=max_tokens,
+                response_format="json",
+                priority=PRIORITY_BATCH,
+                schema="compliance_report"
             )
             
             # Validate JSON
@@ -336,16 +1132,26 @@ Provide a comprehensive compliance analysis in JSON format."""
                 raise RuntimeError("Invalid JSON from local LLM")
                 
         except Exception as e:
-            logger.warning(f"[STRATEGY 1] Local LLM failed: {e}")
+            if isinstance(e, CircuitOpenError):
+                logger.warning("[STRATEGY 1] Local LLM circuit open - skipping")
+            else:
+                logger.warning(f"[STRATEGY 1] Local LLM failed: {e}")
+            
+            # Overload is not a failure: without another backend, tell the
+            # caller to retry later instead of returning a safe default
+            openai_enabled = self.use_openai_fallback and self.openai_api_key
+            if isinstance(e, LLMOverloadedError) and not openai_enabled:
+                raise
             
             # STRATEGY 2: Try OpenAI Fallback (if enabled)
-            if self.use_openai_fallback and self.openai_api_key:
+            if openai_enabled:
                 try:
                     logger.warning("[STRATEGY 2] Attempting OpenAI fallback")
                     response_text = self.chat_completion_openai(
                         messages=messages,
                         temperature=0.3,
-                        max_tokens=2000
+                        max_tokens=max_tokens,
+                        schema="compliance_report"
                     )
                     
                     # Validate JSON
@@ -368,6 +1174,85 @@ Provide a comprehensive compliance analysis in JSON format."""
             logger.error(f"[SAFE DEFAULT] Fallback call #{self.fallback_calls}")
             return SAFE_DEFAULT_RESPONSE.copy()
     
+    def regulation_chunk_capacity(
+        self,
+        application_details: Dict[str, Any],
+        upper_bound: int = 10,
+        department: Optional[str] = None
+    ) -> int:
+        """
+        Number of regulation chunks worth retrieving for an analysis prompt.
+        
+        Args:
+            application_details: Dictionary of application information
+            upper_bound: Maximum chunks to retrieve
+            department: Department of a scoped analysis
+            
+        Returns:
+            Chunks that fit the context budget
+        """
+        fixed_tokens = self.prompt_builder.count_messages(
+            self._compliance_messages(application_details, "", department)
+        )
+        return self.prompt_builder.chunk_capacity(fixed_tokens, upper_bound)
+    
+    def _compliance_messages(
+        self,
+        application_details: Dict[str, Any],
+        reg_summary: str,
+        department: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Format the compliance analysis chat messages.
+        
+        Args:
+            application_details: Dictionary of application information
+            reg_summary: Formatted regulation blocks
+            department: Department of a scoped analysis
+            
+        Returns:
+            System and user messages
+        """
+        app_summary = "\n".join([f"- {k}: {v}" for k, v in application_details.items()])
+        if department:
+            return get_prompt_template("department_compliance_analysis").render(
+                app_summary=app_summary, reg_summary=reg_summary, department=department
+            )
+        return get_prompt_template("compliance_analysis").render(app_summary=app_summary, reg_summary=reg_summary)
+    
+    def _build_compliance_messages(
+        self,
+        application_details: Dict[str, Any],
+        relevant_regulations: List[str],
+        department: Optional[str] = None
+    ) -> Tuple[List[Dict[str, str]], int]:
+        """
+        Build the analysis prompt within the context budget.
+        
+        Regulations are packed best-first into the tokens left after the
+        fixed prompt and the reserved completion; max_tokens is then sized
+        to whatever context remains.
+        
+        Args:
+            application_details: Dictionary of application information
+            relevant_regulations: Regulation texts, best match first
+            department: Department of a scoped analysis (caps max_tokens)
+            
+        Returns:
+            Tuple of (messages, max_tokens)
+        """
+        builder = self.prompt_builder
+        fixed_tokens = builder.count_messages(self._compliance_messages(application_details, "", department))
+        packed = builder.pack(relevant_regulations, builder.regulation_budget(fixed_tokens))
+        
+        messages = self._compliance_messages(application_details, "\n\n".join(packed), department)
+        prompt_tokens = builder.count_messages(messages)
+        max_tokens = builder.completion_budget(prompt_tokens)
+        if department:
+            max_tokens = min(max_tokens, settings.compliance_department_max_tokens)
+        logger.info(f"Compliance prompt: {prompt_tokens} tokens, {len(packed)} regulations, max_tokens={max_tokens}")
+        return messages, max_tokens
+    
     def _validate_json_response(self, response_text: str) -> Optional[Dict[str, Any]]:
         """
         Validate and parse JSON response from LLM.
@@ -376,70 +1261,171 @@ Provide a comprehensive compliance analysis in JSON format."""
             response_text: Raw text response from LLM
             
         Returns:
-            Parsed JSON dict if valid, None otherwise
+            Parsed JSON dict if it matches the compliance report schema, None otherwise
         """
-        try:
-            # Clean markdown code blocks if present
-            cleaned_text = response_text.strip()
-            if "```json" in cleaned_text:
-                cleaned_text = cleaned_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in cleaned_text:
-                cleaned_text = cleaned_text.split("```")[1].split("```")[0].strip()
-            
-            result = json.loads(cleaned_text)
-            
-            # Validate required fields
-            required_fields = ["overall_status", "confidence_score", "issues", "checklist"]
-            for field in required_fields:
-                if field not in result:
-                    logger.error(f"Missing required field: {field}")
-                    return None
-            
-            # Validate status
-            valid_statuses = ["compliant", "partially_compliant", "non_compliant", "needs_human_review"]
-            if result["overall_status"] not in valid_statuses:
-                logger.error(f"Invalid status: {result['overall_status']}")
-                return None
-            
+        result = self.parse_structured_output(response_text, "compliance_report")
+        if result is not None:
             logger.info("JSON response validation successful")
-            return result
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON: {e}")
-            logger.error(f"Response was: {response_text[:500]}")
-            return None
-        except Exception as e:
-            logger.error(f"Validation error: {e}")
-            return None
+        return result
+    
+    def render_metrics(self) -> str:
+        """
+        Render LLM metrics in the Prometheus text exposition format.
+        
+        Returns:
+            Per-call histograms and counters (summed over workers with a
+            shared metrics directory), plus this worker's scheduler, circuit
+            and endpoint gauges sampled now
+        """
+        scheduler = self.scheduler.get_stats()
+        lines = self.telemetry.render()
+        lines += gauge_lines("llm_scheduler_active", "Local LLM slots in use", [({}, scheduler["active"])])
+        lines += gauge_lines(
+            "llm_scheduler_max_concurrency", "Local LLM slots available", [({}, scheduler["max_concurrency"])]
+        )
+        lines += gauge_lines(
+            "llm_scheduler_queue_depth",
+            "Requests waiting for a local LLM slot",
+            [({"priority": p}, stats["queue_depth"]) for p, stats in scheduler["priorities"].items()]
+        )
+        lines += gauge_lines(
+            "llm_circuit_open",
+            "1 if the backend circuit is open or half-open",
+            [({"backend": name}, int(b.state != "closed")) for name, b in self.breakers.items()]
+        )
+        lines += gauge_lines(
+            "llm_endpoint_outstanding",
+            "In-flight requests per local LLM endpoint",
+            [({"endpoint": e.url}, e.outstanding) for e in self.balancer.endpoints]
+        )
+        lines += gauge_lines(
+            "llm_endpoint_available", "Local LLM endpoints in rotation", [({}, self.balancer.available_count())]
+        )
+        return "\n".join(lines) + "\n"
     
     def is_available(self) -> bool:
         """
         Check if the local LLM API is available.
         
+        Checks every configured endpoint and updates the balancer, so
+        unreachable endpoints are ejected and recovered ones re-admitted.
+        
         Returns:
-            True if API is reachable, False otherwise
+            True if at least one endpoint is reachable, False otherwise
+        """
+        available = False
+        for endpoint in self.balancer.endpoints:
+            healthy = self._check_endpoint(endpoint)
+            self.balancer.mark_health(endpoint, healthy)
+            available = available or healthy
+        return available
+    
+    def _check_endpoint(self, endpoint: LLMEndpoint) -> bool:
+        """
+        Health-check a single local LLM endpoint.
+        
+        Args:
+            endpoint: Endpoint to check
+            
+        Returns:
+            True if its /models endpoint responds with 200
         """
         try:
-            response = requests.get(
-                self.api_url.replace("/chat/completions", "/models"),
-                timeout=5
-            )
+            response = requests.get(endpoint.models_url, timeout=5)
             return response.status_code == 200
         except Exception:
             return False
     
-    def get_stats(self) -> Dict[str, int]:
+    def start_health_probe(self, interval: Optional[float] = None) -> None:
+        """
+        Start a background thread that probes the local LLM periodically.
+        
+        The cached result feeds the local circuit breaker: a failed probe
+        opens it, a successful probe lets an open circuit try again.
+        
+        Args:
+            interval: Seconds between probes (defaults to settings)
+        """
+        if self._probe_thread is not None and self._probe_thread.is_alive():
+            return
+        
+        interval = interval or settings.llm_health_probe_interval
+        self._probe_stop.clear()
+        self._probe_thread = threading.Thread(
+            target=self._probe_loop,
+            args=(interval,),
+            name="llm-health-probe",
+            daemon=True
+        )
+        self._probe_thread.start()
+        logger.info(f"[HEALTH PROBE] Started (every {interval:.0f}s)")
+    
+    def stop_health_probe(self) -> None:
+        """Stop the background health probe."""
+        self._probe_stop.set()
+        if self._probe_thread is not None:
+            self._probe_thread.join(timeout=6)
+            self._probe_thread = None
+    
+    def _probe_loop(self, interval: float) -> None:
+        """Probe the local LLM until stopped."""
+        while not self._probe_stop.is_set():
+            available = self.is_available()
+            if available != self.local_available:
+                logger.info(f"[HEALTH PROBE] Local LLM {'available' if available else 'UNAVAILABLE'}")
+            self.local_available = available
+            self.local_available_checked_at = time.time()
+            
+            if available:
+                self.breakers["local"].mark_available()
+            else:
+                self.breakers["local"].mark_unavailable()
+            
+            self._probe_stop.wait(interval)
+    
+    def get_stats(self) -> Dict[str, Any]:
         """
         Get LLM call statistics.
         
         Returns:
-            Dictionary with call counts
+            Dictionary with call counts and scheduler queue metrics
         """
         return {
             "local_llm_calls": self.local_llm_calls,
             "openai_calls": self.openai_calls,
-            "fallback_calls": self.fallback_calls
+            "fallback_calls": self.fallback_calls,
+            "coalesced_calls": self._single_flight.coalesced_calls,
+            "scheduler": self.scheduler.get_stats(),
+            "circuits": {name: breaker.get_stats() for name, breaker in self.breakers.items()},
+            "local_available": self.local_available,
+            "hedging": self.hedging.get_stats(),
+            "endpoints": self.balancer.get_stats(),
+            "prompt": self.prompt_builder.get_stats(),
+            "structured_output": self._structured_output_stats(),
+            "recent_calls": self.telemetry.recent()[-10:],
+            "prompt_cache": {
+                "cache_prompt": self.cache_prompt,
+                "slots": self.prompt_cache_slots,
+                "rejected_by": sorted(self._cache_hints_rejected)
+            }
         }
+    
+    def _structured_output_stats(self) -> Dict[str, Any]:
+        """Capability level per backend and valid/invalid counts per schema."""
+        backends = list(self.api_urls)
+        if self._openai_enabled():
+            backends.append(self.openai_api_url)
+        with self._format_lock:
+            return {
+                "levels": {url: self._format_levels.get(url, self.structured_output_level) for url in backends},
+                "outputs": {
+                    name: {
+                        **counts,
+                        "invalid_rate": round(counts["invalid"] / (counts["valid"] + counts["invalid"]), 3)
+                    }
+                    for name, counts in self.structured_outputs.items()
+                }
+            }
 
 
 # Singleton instance
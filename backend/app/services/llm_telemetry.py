@@ -0,0 +1,160 @@
+"""
+LLM Telemetry - Per-Call Records and Latency Histograms
+Records every LLM call and aggregates the records into Prometheus
+histograms for capacity planning.
+
+Recorded per call:
+- backend (local / openai), endpoint, task, outcome
+- queue wait, time to first token, total latency
+- prompt / completion tokens (from usage, estimated if missing)
+- decode throughput in tokens per second
+
+Exposed through LLMService.render_metrics() at /api/v1/metrics and as a
+summary in LLMService.get_stats(). With a shared metrics directory
+(settings.metrics_dir) the histograms and counters are summed over every
+worker process; recent records stay per process.
+"""
+
+from typing import Any, Dict, List, Optional
+from collections import deque
+import threading
+
+from app.core.metrics import Counter, Histogram, SharedMetrics
+
+# Outcomes
+OUTCOME_SUCCESS = "success"
+OUTCOME_ERROR = "error"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_CANCELLED = "cancelled"
+OUTCOME_REJECTED = "rejected"
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120)
+QUEUE_WAIT_BUCKETS = (0.01, 0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 50, 80, 120, 200)
+
+
+class LLMCallRecord:
+    """Measurements of a single LLM call."""
+
+    def __init__(self, backend: str, endpoint: str, task: str):
+        """
+        Initialize an in-progress record.
+
+        Args:
+            backend: "local" or "openai"
+            endpoint: URL the call was sent to
+            task: Task label (output schema name, or "chat")
+        """
+        self.backend = backend
+        self.endpoint = endpoint
+        self.task = task
+        self.outcome = OUTCOME_SUCCESS
+        self.queue_wait: Optional[float] = None
+        self.ttft: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.tokens_estimated = False
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Decode throughput (completion tokens over time after the first token)."""
+        if not self.completion_tokens or not self.latency:
+            return None
+        decode_time = self.latency - (self.ttft or 0.0)
+        if decode_time <= 0:
+            decode_time = self.latency
+        return self.completion_tokens / decode_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the record for get_stats()."""
+        tps = self.tokens_per_second
+        return {
+            "backend": self.backend,
+            "endpoint": self.endpoint,
+            "task": self.task,
+            "outcome": self.outcome,
+            "queue_wait_seconds": round(self.queue_wait, 3) if self.queue_wait is not None else None,
+            "ttft_seconds": round(self.ttft, 3) if self.ttft is not None else None,
+            "latency_seconds": round(self.latency, 3) if self.latency is not None else None,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "tokens_per_second": round(tps, 2) if tps is not None else None
+        }
+
+
+class LLMTelemetry:
+    """
+    Aggregates LLMCallRecords into Prometheus metrics.
+    """
+
+    def __init__(self, recent_size: int = 50, metrics_dir: Optional[str] = None):
+        """
+        Initialize the metric families.
+
+        Args:
+            recent_size: Number of recent call records kept for get_stats()
+            metrics_dir: Directory shared by the worker processes (None = this process only)
+        """
+        labels = ("backend", "task")
+        self.calls = Counter("llm_calls_total", "LLM calls by outcome", ("backend", "endpoint", "task", "outcome"))
+        self.queue_wait = Histogram(
+            "llm_queue_wait_seconds", "Time waiting for a local LLM slot", QUEUE_WAIT_BUCKETS, ("task",)
+        )
+        self.ttft = Histogram("llm_time_to_first_token_seconds", "Time to first streamed token", LATENCY_BUCKETS, labels)
+        self.latency = Histogram("llm_request_duration_seconds", "Total LLM call latency", LATENCY_BUCKETS, labels)
+        self.prompt_tokens = Histogram("llm_prompt_tokens", "Prompt tokens per call", TOKEN_BUCKETS, labels)
+        self.completion_tokens = Histogram("llm_completion_tokens", "Completion tokens per call", TOKEN_BUCKETS, labels)
+        self.tokens_per_second = Histogram(
+            "llm_tokens_per_second", "Decode throughput per call", TOKENS_PER_SECOND_BUCKETS, labels
+        )
+        self.tokens = Counter("llm_tokens_total", "Tokens processed", ("backend", "task", "kind"))
+        self.shared = SharedMetrics("llm", (
+            self.calls, self.tokens, self.queue_wait, self.ttft,
+            self.latency, self.prompt_tokens, self.completion_tokens, self.tokens_per_second
+        ), metrics_dir)
+
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=recent_size)
+
+    def record(self, record: LLMCallRecord) -> None:
+        """
+        Add a finished call.
+
+        Args:
+            record: Completed call record
+        """
+        labels = {"backend": record.backend, "task": record.task}
+        self.calls.inc(backend=record.backend, endpoint=record.endpoint, task=record.task, outcome=record.outcome)
+        if record.queue_wait is not None:
+            self.queue_wait.observe(record.queue_wait, task=record.task)
+
+        if record.outcome == OUTCOME_SUCCESS:
+            if record.ttft is not None:
+                self.ttft.observe(record.ttft, **labels)
+            if record.latency is not None:
+                self.latency.observe(record.latency, **labels)
+            if record.prompt_tokens is not None:
+                self.prompt_tokens.observe(record.prompt_tokens, **labels)
+                self.tokens.inc(record.prompt_tokens, kind="prompt", **labels)
+            if record.completion_tokens is not None:
+                self.completion_tokens.observe(record.completion_tokens, **labels)
+                self.tokens.inc(record.completion_tokens, kind="completion", **labels)
+            tps = record.tokens_per_second
+            if tps is not None:
+                self.tokens_per_second.observe(tps, **labels)
+        self.shared.flush()
+
+        with self._lock:
+            self._recent.append(record)
+
+    def recent(self) -> List[Dict[str, Any]]:
+        """Most recent call records, oldest first."""
+        with self._lock:
+            return [r.to_dict() for r in self._recent]
+
+    def render(self) -> List[str]:
+        """Render every metric family in Prometheus text format."""
+        return self.shared.render()
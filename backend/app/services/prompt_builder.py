@@ -0,0 +1,301 @@
+"""
+Prompt Builder - Token-Budgeted Prompt Assembly
+Packs retrieved regulation chunks into the LLM context window.
+
+Responsibilities:
+- Count tokens with the model's tokenizer (heuristic fallback)
+- Pack the highest-ranked chunks into the remaining context budget
+- Truncate the last chunk at a clause boundary instead of mid-sentence
+- Size max_tokens to the context left after the prompt
+- Tell retrieval how many chunks can fit, so none are fetched in vain
+
+Tokenizer: uses transformers.AutoTokenizer (installed with
+sentence-transformers) for settings.llm_tokenizer_name, loaded at startup
+(TokenCounter.load) so no request waits on a download. If none is
+configured or it cannot be loaded, a conservative characters-per-token
+estimate is used.
+"""
+
+from typing import Any, Dict, List, Optional
+import logging
+import math
+import re
+import threading
+
+try:
+    from transformers import AutoTokenizer
+    TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    TRANSFORMERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+# Chat template overhead per message (role markers, [INST] tags, BOS/EOS)
+MESSAGE_OVERHEAD_TOKENS = 8
+
+# Clause boundaries: numbered clauses, headings, bullet items, then sentences
+CLAUSE_BOUNDARY = re.compile(
+    r"\n(?=\s*(?:\(?\d+[.)]|\([a-z]\)|#+\s|Section\b|Chapter\b|CHAPTER\b|-\s|\*\s))"
+)
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;:])\s+")
+
+
+class TokenCounter:
+    """
+    Counts tokens with the model's tokenizer.
+
+    The service loads the tokenizer at startup through load() (main.py
+    lifespan, or preload_models before gunicorn forks); without a
+    configured tokenizer, counts use the characters-per-token estimate.
+    """
+
+    def __init__(self, tokenizer_name: Optional[str] = None, chars_per_token: float = 3.5):
+        """
+        Initialize the token counter.
+
+        Args:
+            tokenizer_name: HuggingFace tokenizer id (None = heuristic only)
+            chars_per_token: Characters per token for the heuristic fallback
+        """
+        self.tokenizer_name = tokenizer_name
+        self.chars_per_token = chars_per_token
+        self._tokenizer = None
+        self._load_attempted = False
+        self._lock = threading.Lock()
+
+    def _get_tokenizer(self):
+        """Load the tokenizer once; fall back to the heuristic on failure."""
+        if self._load_attempted:
+            return self._tokenizer
+        with self._lock:
+            if not self._load_attempted:
+                if self.tokenizer_name and TRANSFORMERS_AVAILABLE:
+                    try:
+                        self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+                        logger.info(f"Loaded tokenizer: {self.tokenizer_name}")
+                    except Exception as e:
+                        logger.warning(f"Tokenizer {self.tokenizer_name} unavailable ({e}) - using estimate")
+                self._load_attempted = True
+        return self._tokenizer
+
+    def load(self) -> bool:
+        """
+        Load the tokenizer now (at startup) instead of on the first count.
+
+        Returns:
+            True if the model's tokenizer is in use, False for the estimate
+        """
+        return self._get_tokenizer() is not None
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from the model's tokenizer (once loaded)."""
+        return self._tokenizer is not None
+
+    def count(self, text: str) -> int:
+        """
+        Count the tokens in a text.
+
+        Args:
+            text: Text to count
+
+        Returns:
+            Number of tokens
+        """
+        if not text:
+            return 0
+        tokenizer = self._get_tokenizer()
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+        return math.ceil(len(text) / self.chars_per_token)
+
+
+class PromptBuilder:
+    """
+    Assembles prompts that fit the model's context window.
+    """
+
+    def __init__(
+        self,
+        token_counter: TokenCounter,
+        context_window: int = 4096,
+        max_completion_tokens: int = 2000,
+        min_completion_tokens: int = 1024,
+        chunk_tokens_estimate: int = 520,
+        min_truncated_chunk_tokens: int = 64
+    ):
+        """
+        Initialize the prompt builder.
+
+        Args:
+            token_counter: Token counter for the target model
+            context_window: Model context length in tokens
+            max_completion_tokens: Upper bound for max_tokens
+            min_completion_tokens: Tokens always reserved for the completion
+            chunk_tokens_estimate: Expected tokens per regulation chunk (for retrieval sizing)
+            min_truncated_chunk_tokens: Smallest useful truncated chunk
+        """
+        self.counter = token_counter
+        self.context_window = context_window
+        self.max_completion_tokens = max_completion_tokens
+        self.min_completion_tokens = min_completion_tokens
+        self.chunk_tokens_estimate = chunk_tokens_estimate
+        self.min_truncated_chunk_tokens = min_truncated_chunk_tokens
+
+        # Metrics
+        self._lock = threading.Lock()
+        self.prompts_built = 0
+        self.chunks_offered = 0
+        self.chunks_packed = 0
+        self.chunks_truncated = 0
+        self.prompt_tokens_total = 0
+
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        """
+        Count the prompt tokens of a chat message list.
+
+        Args:
+            messages: Chat messages
+
+        Returns:
+            Token count including per-message template overhead
+        """
+        return sum(self.counter.count(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+    def regulation_budget(self, fixed_prompt_tokens: int) -> int:
+        """
+        Tokens available for regulation text.
+
+        Args:
+            fixed_prompt_tokens: Tokens used by everything except regulations
+
+        Returns:
+            Remaining budget (never negative)
+        """
+        return max(0, self.context_window - self.min_completion_tokens - fixed_prompt_tokens)
+
+    def chunk_capacity(self, fixed_prompt_tokens: int, upper_bound: int = 10) -> int:
+        """
+        Number of regulation chunks worth retrieving for a prompt.
+
+        Args:
+            fixed_prompt_tokens: Tokens used by everything except regulations
+            upper_bound: Maximum chunks to retrieve
+
+        Returns:
+            Chunks that fit the budget (plus one that may be truncated)
+        """
+        budget = self.regulation_budget(fixed_prompt_tokens)
+        return max(1, min(upper_bound, budget // self.chunk_tokens_estimate + 1))
+
+    def pack(self, chunks: List[str], budget_tokens: int, label: str = "REGULATION") -> List[str]:
+        """
+        Pack ranked chunks into a token budget.
+
+        Chunks are taken in rank order. The first chunk that does not fit
+        is truncated at a clause boundary (if a useful part fits) and
+        packing stops there.
+
+        Args:
+            chunks: Regulation chunks, best first
+            budget_tokens: Tokens available for the formatted chunks
+            label: Heading prefix for each chunk
+
+        Returns:
+            Formatted chunk blocks ("LABEL n:\\n<text>")
+        """
+        packed: List[str] = []
+        remaining = budget_tokens
+        truncated = False
+
+        for chunk in chunks:
+            header = f"{label} {len(packed) + 1}:\n"
+            # Blocks are joined with a blank line
+            overhead = self.counter.count(header) + (1 if packed else 0)
+            cost = overhead + self.counter.count(chunk)
+            if cost <= remaining:
+                packed.append(header + chunk)
+                remaining -= cost
+                continue
+
+            available = remaining - overhead
+            if available >= self.min_truncated_chunk_tokens:
+                partial = self.truncate(chunk, available)
+                if partial:
+                    packed.append(header + partial)
+                    truncated = True
+            break
+
+        with self._lock:
+            self.prompts_built += 1
+            self.chunks_offered += len(chunks)
+            self.chunks_packed += len(packed)
+            self.chunks_truncated += int(truncated)
+
+        if len(packed) < len(chunks):
+            logger.info(f"Packed {len(packed)}/{len(chunks)} regulation chunks into {budget_tokens} tokens")
+        return packed
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Cut text to a token budget at the last clause (or sentence) boundary.
+
+        Args:
+            text: Text to truncate
+            max_tokens: Token budget
+
+        Returns:
+            Longest clause-aligned prefix within the budget ("" if none fits)
+        """
+        if self.counter.count(text) <= max_tokens:
+            return text
+
+        for pattern in (CLAUSE_BOUNDARY, SENTENCE_BOUNDARY):
+            units = [u for u in pattern.split(text) if u.strip()]
+            if len(units) < 2:
+                continue
+            separator = "\n" if pattern is CLAUSE_BOUNDARY else " "
+            kept: List[str] = []
+            for unit in units:
+                candidate = separator.join(kept + [unit])
+                if self.counter.count(candidate) > max_tokens:
+                    break
+                kept.append(unit)
+            if kept:
+                return separator.join(kept).rstrip()
+        return ""
+
+    def completion_budget(self, prompt_tokens: int) -> int:
+        """
+        Size max_tokens to the context left after the prompt.
+
+        Args:
+            prompt_tokens: Tokens in the final prompt
+
+        Returns:
+            max_tokens for the request
+        """
+        with self._lock:
+            self.prompt_tokens_total += prompt_tokens
+        remaining = self.context_window - prompt_tokens
+        return max(1, min(self.max_completion_tokens, remaining))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get prompt assembly statistics.
+
+        Returns:
+            Dictionary with packing counters and average prompt size
+        """
+        with self._lock:
+            built = self.prompts_built
+            return {
+                "exact_token_counts": self.counter.exact,
+                "context_window": self.context_window,
+                "prompts_built": built,
+                "chunks_offered": self.chunks_offered,
+                "chunks_packed": self.chunks_packed,
+                "chunks_truncated": self.chunks_truncated,
+                "avg_prompt_tokens": round(self.prompt_tokens_total / built, 1) if built else 0.0
+            }
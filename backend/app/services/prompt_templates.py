@@ -0,0 +1,177 @@
+"""
+Prompt Templates - Cache-Friendly Prompt Layout
+Registry of the fixed prompts sent to the LLM.
+
+Responsibilities:
+- Keep every static instruction in a byte-identical system message
+- Put all variable content (application data, regulations, document
+  text, document type) at the end of the user message
+- Render templates into chat messages
+
+llama.cpp-based servers reuse the KV cache for the longest prefix shared
+with a previous request. Interpolating anything into the system prompt
+changes the prefix and forces the whole prompt to be re-processed, so
+system prompts here are plain strings and are never formatted.
+"""
+
+from typing import Dict, List
+
+
+class PromptTemplate:
+    """
+    A static system prompt plus a user message whose placeholders all
+    come after its static lead-in.
+    """
+
+    def __init__(self, name: str, system: str, user: str):
+        """
+        Initialize the template.
+
+        Args:
+            name: Registry name
+            system: System prompt (static; never formatted)
+            user: User message template (str.format placeholders)
+        """
+        self.name = name
+        self.system = system
+        self.user = user
+
+    def render(self, **variables: str) -> List[Dict[str, str]]:
+        """
+        Render the template into chat messages.
+
+        Args:
+            **variables: Values for the user message placeholders
+
+        Returns:
+            System and user messages
+        """
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.user.format(**variables)}
+        ]
+
+
+COMPLIANCE_ANALYSIS = PromptTemplate(
+    name="compliance_analysis",
+    system="""You are an expert compliance analyst for industrial regulations in Kerala, India.
+
+Your task is to analyze industrial applications against regulations and produce a structured JSON report.
+
+CRITICAL RULES:
+1. You MUST respond with valid JSON only
+2. Be objective and cite specific regulations
+3. Flag ambiguities - do not make assumptions
+4. Categorize issues by risk level (low/medium/high)
+5. Provide actionable checklist items
+
+Output ONLY valid JSON matching this exact structure:
+{
+  "overall_status": "compliant" | "partially_compliant" | "non_compliant",
+  "confidence_score": 0-100,
+  "time_saved_minutes": number,
+  "regulation_coverage_percent": number,
+  "issues": [
+    {
+      "type": "missing_document" | "violation" | "ambiguity",
+      "risk_level": "low" | "medium" | "high",
+      "department": "environment" | "fire" | "local_body" | "other",
+      "regulation_reference": {
+        "name": "regulation name",
+        "clause": "clause reference"
+      },
+      "document_excerpt": "relevant excerpt from regulation",
+      "explanation": "clear explanation of the issue"
+    }
+  ],
+  "checklist": ["actionable item 1", "actionable item 2"]
+}""",
+    user="""Analyze this industrial application for compliance and provide a comprehensive compliance analysis in JSON format.
+
+APPLICATION DETAILS:
+{app_summary}
+
+RELEVANT REGULATIONS:
+{reg_summary}"""
+)
+
+# Department-scoped variant: same system prompt (shared cached prefix),
+# department named last
+DEPARTMENT_COMPLIANCE_ANALYSIS = PromptTemplate(
+    name="department_compliance_analysis",
+    system=COMPLIANCE_ANALYSIS.system,
+    user="""Analyze this industrial application for compliance and provide a comprehensive compliance analysis in JSON format. Report only issues handled by the department named at the end.
+
+APPLICATION DETAILS:
+{app_summary}
+
+RELEVANT REGULATIONS:
+{reg_summary}
+
+DEPARTMENT: {department}"""
+)
+
+APPLICATION_EXTRACTION = PromptTemplate(
+    name="application_extraction",
+    system="""You are a precise data extraction engine.
+Your task is to extract specific industrial application details from the input text and return them as a JSON object.
+
+REQUIRED JSON STRUCTURE:
+{
+    "industry_name": "string (name of the company or unit)",
+    "square_feet": "string (total area)",
+    "water_source": "string (e.g., Municipal supply, Well)",
+    "drainage": "string (effluent treatment details)",
+    "air_pollution": "string (control measures like stacks, scrubbers)",
+    "waste_management": "string (solid/liquid waste disposal plan)",
+    "nearby_homes": "string (distance to nearest residence)",
+    "water_level_depth": "string (groundwater depth)"
+}
+
+RULES:
+1. Output ONLY valid JSON. Do not include markdown formatting like ```json or ```.
+2. If a field is not found, use "Not specified".
+3. Be concise.""",
+    user="""Extract details from this text:
+
+{text}"""
+)
+
+DOCUMENT_VALIDATION = PromptTemplate(
+    name="document_validation",
+    system="""You are a document verification expert.
+Analyze the text to determine if it is a valid document of the type named in the request.
+
+Return JSON:
+{
+    "is_valid": boolean,
+    "confidence": float (0-1),
+    "reason": "explanation"
+}""",
+    user="""Verify whether this document text is a valid '{doc_type}':
+
+{text}"""
+)
+
+PROMPT_TEMPLATES: Dict[str, PromptTemplate] = {
+    template.name: template
+    for template in (COMPLIANCE_ANALYSIS, DEPARTMENT_COMPLIANCE_ANALYSIS, APPLICATION_EXTRACTION, DOCUMENT_VALIDATION)
+}
+
+
+def get_prompt_template(name: str) -> PromptTemplate:
+    """
+    Look up a registered prompt template.
+
+    Args:
+        name: Template name
+
+    Returns:
+        PromptTemplate
+
+    Raises:
+        ValueError: If the template is not registered
+    """
+    if name not in PROMPT_TEMPLATES:
+        raise ValueError(f"Unknown prompt template: {name}")
+    return PROMPT_TEMPLATES[name]
@@ -7,6 +7,9 @@ Responsibilities:
 - Chunk text (300-500 tokens)
 - Generate embeddings using SentenceTransformers
 - Store embeddings in ChromaDB with metadata
+- Re-ingest one department (shard) without touching the others
+- Rebuild the compressed vector index and the facet routing index after
+  a directory ingest
 
 Reference: Inspired by OLD/RagBot/store_documents.py, refactored for service-based ingestion
 
@@ -36,6 +39,8 @@ except ImportError:
 
 from app.services.embedding_service import get_embedding_service
 from app.services.vector_store_service import get_vector_store_service
+from app.services.routing_index import get_routing_index
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -277,17 +282,28 @@ class RegulationIngestionService:
         logger.info(f"Successfully ingested {len(chunks)} chunks from {file_path}")
         return len(chunks)
     
-    def ingest_directory(self, directory: Optional[str] = None) -> Dict[str, Any]:
+    def ingest_directory(self, directory: Optional[str] = None, department: Optional[str] = None) -> Dict[str, Any]:
         """
         Ingest all supported documents from a directory.
         
         Args:
             directory: Directory to scan (defaults to self.regulations_dir)
+            department: Re-ingest only this department: its documents are
+                removed from the vector store (its shard, when sharded) and
+                regulations_dir/<department> is ingested again
             
         Returns:
             Dictionary with ingestion statistics
+            
+        Raises:
+            ValueError: If department is not a plain directory name
+            FileNotFoundError: If the directory does not exist
         """
-        if directory is None:
+        if department is not None:
+            if not department or os.path.basename(department) != department or department in (".", ".."):
+                raise ValueError(f"Invalid department: {department!r}")
+            directory = os.path.join(self.regulations_dir, department)
+        elif directory is None:
             directory = self.regulations_dir
         
         if not os.path.exists(directory):
@@ -309,20 +325,24 @@ class RegulationIngestionService:
         
         logger.info(f"Found {len(files)} documents to ingest")
         
+        if department is not None:
+            self.vector_store.reset_shard(department)
+        
         successful = 0
         failed = 0
         total_chunks = 0
         
         for file_path in files:
             try:
-                # Extract department from subdirectory if present
+                # Extract department from subdirectory if present (files
+                # directly under regulations/ are General)
                 parts = file_path.parts
                 regulations_idx = parts.index("regulations") if "regulations" in parts else -1
-                department = parts[regulations_idx + 1] if regulations_idx >= 0 and regulations_idx + 1 < len(parts) else None
+                file_department = parts[regulations_idx + 1] if regulations_idx >= 0 and regulations_idx + 2 < len(parts) else None
                 
                 chunks = self.ingest_document(
                     str(file_path),
-                    department=department
+                    department=file_department
                 )
                 total_chunks += chunks
                 successful += 1
@@ -337,6 +357,20 @@ class RegulationIngestionService:
             "total_chunks": total_chunks
         }
         
+        # Compress the new corpus before anything queries it
+        if successful and settings.vector_store_index == "ivfpq":
+            try:
+                self.vector_store.build_compressed_index()
+            except Exception as e:
+                logger.error(f"Compressed index build failed (queries fall back to Chroma): {e}")
+        
+        # Precompute facet -> clause candidates for analysis-time routing
+        if successful and settings.routing_index_enabled:
+            try:
+                get_routing_index().build(self.vector_store, self.embedding_service)
+            except Exception as e:
+                logger.error(f"Routing index build failed (analysis falls back to vector queries): {e}")
+        
         logger.info(f"Ingestion complete: {stats}")
         return stats
 
@@ -0,0 +1,168 @@
+"""
+Report Cache - Compliance Report Memoization
+Caches compliance reports so identical applications are not re-analysed.
+
+Responsibilities:
+- Derive a canonical key from the application fields, the corpus
+  generation and the analysis version (prompts, models, rules)
+- Keep recent reports in a bounded LRU with a time-to-live
+- Drop every entry when the corpus generation changes (re-ingest)
+"""
+
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from app.models.schemas import IndustrialApplication
+
+logger = logging.getLogger(__name__)
+
+# Application fields the analysis reads. document_url is excluded: every
+# upload gets a new timestamped path, and the analysis never reads it
+ANALYSED_FIELDS = frozenset(IndustrialApplication.__fields__) - {"document_url"}
+
+
+def canonical_application(application: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Normalise application fields for hashing.
+
+    Only ANALYSED_FIELDS are kept, empty fields are dropped and whitespace
+    is collapsed, so re-uploads, re-submits and edit-then-revert cycles map
+    to the same key.
+
+    Args:
+        application: Application details
+
+    Returns:
+        Normalised field -> value mapping
+    """
+    canonical = {}
+    for field, value in application.items():
+        if field not in ANALYSED_FIELDS or value is None:
+            continue
+        text = " ".join(str(value).split())
+        if text:
+            canonical[field] = text
+    return canonical
+
+
+def report_cache_key(application: Dict[str, Any], generation: int, version: str) -> str:
+    """
+    Cache key for an analysis.
+
+    Args:
+        application: Application details
+        generation: Vector store generation
+        version: Analysis version (prompt, model and rules fingerprint)
+
+    Returns:
+        Hex SHA-256 key
+    """
+    payload = json.dumps(
+        {"application": canonical_application(application), "generation": generation, "version": version},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """
+    Thread-safe LRU cache with a time-to-live, bound to a corpus generation.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 86400.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum cached reports (least recently used evicted first)
+            ttl_seconds: Maximum age of a cached report (0 = no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def sync_generation(self, generation: int) -> None:
+        """
+        Drop every entry if the corpus generation changed.
+
+        Args:
+            generation: Current vector store generation
+        """
+        with self._lock:
+            if self._generation is not None and generation != self._generation and self._entries:
+                logger.info(f"Corpus generation {self._generation} -> {generation}: clearing {len(self._entries)} cached entries")
+                self._entries.clear()
+                self.invalidations += 1
+            self._generation = generation
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None on a miss or expiry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "generation": self._generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
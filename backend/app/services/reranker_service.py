@@ -0,0 +1,140 @@
+"""
+Reranker Service - Cross-Encoder Reranking of Retrieved Regulations
+Rescores retrieval candidates so the analysis prompt holds only the most
+relevant chunks.
+
+Responsibilities:
+- Load a small CPU cross-encoder (torch or ONNX backend) on first use
+- Score (query, chunk) pairs for many queries in one predict call
+- Cache scores by (query hash, chunk id) in a bounded LRU, dropped when
+  the corpus generation changes
+- Keep the best K candidates per query
+
+Retrieval can then fetch broadly (cheap ANN or routing index) while the
+prompt stays narrow, which shortens LLM prefill.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import logging
+import threading
+
+from app.core.config import settings
+from app.services.report_cache import ReportCache
+
+logger = logging.getLogger(__name__)
+
+# Optional: cross-encoders ship with sentence-transformers
+try:
+    from sentence_transformers import CrossEncoder
+    RERANKER_AVAILABLE = True
+except ImportError:
+    RERANKER_AVAILABLE = False
+    logger.warning("sentence-transformers CrossEncoder not available - reranking disabled")
+
+
+class RerankerService:
+    """
+    Cross-encoder reranker with a score cache.
+    """
+
+    def __init__(self, model_name: str = None, backend: str = None, cache_entries: int = None):
+        """
+        Initialize the reranker (the model is loaded lazily).
+
+        Args:
+            model_name: Cross-encoder model (defaults to settings.reranker_model_name)
+            backend: "torch" or "onnx" (defaults to settings.reranker_backend)
+            cache_entries: Cached (query, chunk) scores (defaults to settings.reranker_cache_max_entries)
+        """
+        self.model_name = model_name or settings.reranker_model_name
+        self.backend = backend or settings.reranker_backend
+        self.scores = ReportCache(
+            cache_entries if cache_entries is not None else settings.reranker_cache_max_entries,
+            ttl_seconds=0
+        )
+        self._model: Optional[Any] = None
+        self._load_lock = threading.Lock()
+
+    def _get_model(self) -> Any:
+        """Load the cross-encoder on first use."""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    logger.info(f"Loading reranker model: {self.model_name} ({self.backend})")
+                    if self.backend == "torch":
+                        self._model = CrossEncoder(self.model_name)
+                    else:
+                        # Requires sentence-transformers >= 4 (and optimum/onnxruntime for onnx)
+                        self._model = CrossEncoder(self.model_name, backend=self.backend)
+        return self._model
+
+    def load_model(self) -> None:
+        """Load the cross-encoder now (e.g. before worker processes fork)."""
+        self._get_model()
+
+    def rerank_many(
+        self,
+        queries: Sequence[str],
+        candidates: Sequence[List[Tuple[str, str]]],
+        top_k: Sequence[int],
+        generation: int
+    ) -> List[List[Tuple[str, str]]]:
+        """
+        Rerank several candidate lists, scoring every uncached pair at once.
+
+        Args:
+            queries: One query per candidate list
+            candidates: Per query, (chunk id, text) pairs
+            top_k: Per query, number of candidates to keep
+            generation: Vector store generation (chunk ids are only stable within one)
+
+        Returns:
+            Per query, the best top_k (chunk id, text) pairs, best first
+        """
+        self.scores.sync_generation(generation)
+        keys = [
+            [f"{hashlib.sha1(query.encode('utf-8')).hexdigest()}:{chunk_id}" for chunk_id, _ in pairs]
+            for query, pairs in zip(queries, candidates)
+        ]
+        scores: Dict[str, float] = {}
+        missing: Dict[str, Tuple[str, str]] = {}
+        for query, pairs, pair_keys in zip(queries, candidates, keys):
+            for (_, text), key in zip(pairs, pair_keys):
+                cached = self.scores.get(key)
+                if cached is not None:
+                    scores[key] = cached
+                elif key not in missing:
+                    missing[key] = (query, text)
+
+        if missing:
+            predicted = self._get_model().predict(list(missing.values()), show_progress_bar=False)
+            for key, score in zip(missing, predicted):
+                scores[key] = float(score)
+                self.scores.put(key, float(score))
+            logger.debug(f"Reranker scored {len(missing)} pairs ({len(scores) - len(missing)} cached)")
+
+        reranked = []
+        for pairs, pair_keys, k in zip(candidates, keys, top_k):
+            order = sorted(range(len(pairs)), key=lambda j: scores[pair_keys[j]], reverse=True)
+            reranked.append([pairs[j] for j in order[:k]])
+        return reranked
+
+
+# Singleton instance
+_reranker_service: Optional[RerankerService] = None
+
+
+def get_reranker_service() -> Optional[RerankerService]:
+    """
+    Get or create the singleton RerankerService instance.
+
+    Returns:
+        RerankerService instance, or None if sentence-transformers is missing
+    """
+    global _reranker_service
+    if not RERANKER_AVAILABLE:
+        return None
+    if _reranker_service is None:
+        _reranker_service = RerankerService()
+    return _reranker_service
@@ -0,0 +1,251 @@
+"""
+Routing Index - Precomputed Facet-to-Clause Candidates
+Maps every (compliance facet, retrieval scope) to a ranked list of
+candidate regulation chunks, computed once at ingest time.
+
+Responsibilities:
+- Build the index after ingestion from application-independent facet
+  queries (one batched vector query per scope)
+- Store it compactly next to the vector store: candidate embeddings as a
+  normalised float16 matrix (.npy, memory-mapped read-only so worker
+  processes share it through the page cache) plus ids, texts and per-key
+  row lists (.json)
+- Rerank a key's candidates against an application query with a dot product
+- Refuse to serve when the corpus generation or embedding model changed
+
+At analysis time retrieval becomes a dictionary lookup plus a small
+(candidates x dimension) matrix-vector product instead of an ANN query.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.compliance_facets import ALL_DEPARTMENTS, DEPARTMENT_SCOPES, facet_query, scope_facets, scope_filter
+
+logger = logging.getLogger(__name__)
+
+
+def _key(facet: str, scope: str) -> str:
+    return f"{facet}|{scope}"
+
+
+class RoutingIndex:
+    """
+    Ingest-time candidate lists per facet and scope.
+    """
+
+    def __init__(self, index_dir: str = None, candidates: int = None):
+        """
+        Initialize the index (loaded lazily).
+
+        Args:
+            index_dir: Directory for the index files (defaults to settings.vector_store_path)
+            candidates: Candidates kept per facet and scope (defaults to settings.routing_index_candidates)
+        """
+        self.index_dir = index_dir or settings.vector_store_path
+        self.candidates = candidates or settings.routing_index_candidates
+        self.matrix_path = os.path.join(self.index_dir, "routing_index.npy")
+        self.meta_path = os.path.join(self.index_dir, "routing_index.json")
+        self._lock = threading.Lock()
+        self._loaded_mtime: Optional[float] = None
+        self._embeddings: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._rows_by_id: Dict[str, int] = {}
+        self._documents: List[str] = []
+        self._lists: Dict[str, np.ndarray] = {}
+        self._generation: Optional[int] = None
+        self._model: Optional[str] = None
+
+    def build(self, vector_store: Any, embedding_service: Any) -> Dict[str, Any]:
+        """
+        Rebuild the index from the current vector store contents.
+
+        Args:
+            vector_store: VectorStoreService
+            embedding_service: EmbeddingService
+
+        Returns:
+            Build statistics
+        """
+        generation = vector_store.get_generation()
+        scopes = [ALL_DEPARTMENTS] + list(DEPARTMENT_SCOPES)
+        keys: List[Tuple[str, str]] = [(facet, scope) for scope in scopes for facet in scope_facets(scope)]
+        facets = sorted({facet for facet, _ in keys})
+        query_vectors = dict(zip(facets, embedding_service.encode_batch([facet_query(facet) for facet in facets])))
+
+        rows: Dict[str, int] = {}
+        documents: List[str] = []
+        lists: Dict[str, List[int]] = {}
+        for scope in scopes:
+            scope_keys = [key for key in keys if key[1] == scope]
+            embeddings = [query_vectors[facet] for facet, _ in scope_keys]
+            results = vector_store.query_batch(
+                query_embeddings=embeddings,
+                n_results=self.candidates,
+                where=scope_filter(scope)
+            )
+            if scope != ALL_DEPARTMENTS and not any(r.get("ids") for r in results):
+                # Corpus not organised by department: rely on the facet queries
+                results = vector_store.query_batch(query_embeddings=embeddings, n_results=self.candidates)
+            for (facet, _), result in zip(scope_keys, results):
+                candidate_rows = []
+                for chunk_id, text in zip(result.get("ids", []), result.get("documents", [])):
+                    if chunk_id not in rows:
+                        rows[chunk_id] = len(documents)
+                        documents.append(text)
+                    candidate_rows.append(rows[chunk_id])
+                lists[_key(facet, scope)] = candidate_rows
+
+        ids = list(rows)
+        if ids:
+            fetched = vector_store.get_by_ids(ids, include=["embeddings"])
+            by_id = dict(zip(fetched["ids"], fetched["embeddings"]))
+            matrix = np.asarray([by_id[chunk_id] for chunk_id in ids], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = (matrix / np.maximum(norms, 1e-12)).astype(np.float16)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float16)
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        with self._lock:
+            # Replace, never rewrite: other workers may still map the old file
+            with open(f"{self.matrix_path}.tmp", "wb") as f:
+                np.save(f, matrix)
+            os.replace(f"{self.matrix_path}.tmp", self.matrix_path)
+            tmp_path = f"{self.meta_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "generation": generation,
+                    "model": settings.embedding_model_name,
+                    "ids": ids,
+                    "documents": documents,
+                    "lists": lists
+                }, f)
+            os.replace(tmp_path, self.meta_path)
+            self._loaded_mtime = None
+
+        stats = {"generation": generation, "keys": len(lists), "chunks": len(ids), "candidates": self.candidates}
+        logger.info(f"Routing index built: {stats}")
+        return stats
+
+    def _load(self) -> bool:
+        """(Re)load the index files if they changed on disk."""
+        try:
+            mtime = os.path.getmtime(self.meta_path)
+        except OSError:
+            return False
+        if mtime == self._loaded_mtime:
+            return self._embeddings is not None
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            embeddings = np.load(self.matrix_path, mmap_mode="r")
+            if len(embeddings) != len(meta["ids"]):
+                raise ValueError("routing_index.npy and routing_index.json are from different builds")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load routing index: {e}")
+            self._embeddings = None
+            self._loaded_mtime = mtime
+            return False
+        self._embeddings = embeddings
+        self._ids = meta["ids"]
+        self._rows_by_id = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._documents = meta["documents"]
+        self._lists = {key: np.asarray(rows, dtype=np.int32) for key, rows in meta["lists"].items()}
+        self._generation = meta.get("generation")
+        self._model = meta.get("model")
+        self._loaded_mtime = mtime
+        logger.info(f"Loaded routing index: {len(self._ids)} chunks, {len(self._lists)} keys (generation {self._generation})")
+        return True
+
+    def is_current(self, generation: int) -> bool:
+        """
+        True if the index matches the corpus generation and embedding model.
+
+        Args:
+            generation: Current vector store generation
+        """
+        with self._lock:
+            return (
+                self._load()
+                and self._generation == generation
+                and self._model == settings.embedding_model_name
+            )
+
+    def rank(self, facet: str, scope: str, query_embedding: List[float], n_results: int) -> List[Tuple[str, str]]:
+        """
+        Rerank a facet's candidates against an application query.
+
+        Args:
+            facet: Facet name
+            scope: "all" or a department name
+            query_embedding: Embedding of the application's facet query
+            n_results: Number of results
+
+        Returns:
+            (chunk id, text) pairs, best match first
+        """
+        with self._lock:
+            rows = self._lists.get(_key(facet, scope))
+            embeddings = self._embeddings
+        if rows is None or embeddings is None or not len(rows):
+            return []
+        # Candidates are unit-normalised, so this ranks by cosine similarity
+        scores = embeddings[rows].astype(np.float32) @ np.asarray(query_embedding, dtype=np.float32)
+        order = np.argsort(-scores)[:n_results]
+        return [(self._ids[rows[i]], self._documents[rows[i]]) for i in order]
+
+    def get_embeddings(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Unit-normalised embeddings of indexed chunks.
+
+        Args:
+            ids: Chunk ids
+
+        Returns:
+            Chunk id -> embedding, for the ids present in the index
+        """
+        with self._lock:
+            rows_by_id = self._rows_by_id
+            embeddings = self._embeddings
+        if embeddings is None:
+            return {}
+        return {
+            chunk_id: embeddings[rows_by_id[chunk_id]].astype(np.float32)
+            for chunk_id in ids if chunk_id in rows_by_id
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index summary for monitoring."""
+        with self._lock:
+            loaded = self._load()
+            return {
+                "loaded": loaded,
+                "generation": self._generation,
+                "chunks": len(self._ids) if loaded else 0,
+                "keys": len(self._lists) if loaded else 0,
+                "bytes_on_disk": os.path.getsize(self.matrix_path) + os.path.getsize(self.meta_path) if loaded else 0
+            }
+
+
+# Singleton instance
+_routing_index: Optional[RoutingIndex] = None
+
+
+def get_routing_index() -> RoutingIndex:
+    """
+    Get or create the singleton RoutingIndex instance.
+
+    Returns:
+        RoutingIndex instance
+    """
+    global _routing_index
+    if _routing_index is None:
+        _routing_index = RoutingIndex()
+    return _routing_index
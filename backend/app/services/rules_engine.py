@@ -0,0 +1,389 @@
+"""
+Rules Engine - Deterministic Compliance Pre-screen
+Evaluates numeric regulation thresholds without the LLM.
+
+Responsibilities:
+- Load rule declarations from JSON files in data/rules
+- Parse measurements (distance, depth, area) from free-text application fields
+- Decide threshold rules as violated, satisfied or undetermined
+- Emit issues with exact clause references in the compliance report schema
+- Hand the LLM only the fields the rules could not decide
+
+Rule files look like:
+
+    {
+      "regulation": "Kerala Industrial Safety Regulations 2023",
+      "rules": [
+        {"id": "residential_buffer", "clause": "Section 4.1", "department": "local_body",
+         "field": "nearby_homes", "quantity": "length", "unit": "m",
+         "min": 100, "satisfied_at": 2000, "risk_level": "high", "blocking": true,
+         "excerpt": "...", "violation": "... {value} ...", "satisfied": "...", "checklist": "..."}
+      ]
+    }
+
+Threshold rules use "min" and/or "max" (a violation outside the bound) and
+an optional "satisfied_at" (values between the bound and satisfied_at are
+left to the LLM). Rules with "pattern" search several fields for the
+measurement instead of parsing one field. Rules with "spacing" derive a
+checklist item from an area.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Outcomes
+VIOLATED = "violated"
+SATISFIED = "satisfied"
+UNDETERMINED = "undetermined"
+
+# Unit aliases -> factor to the base unit (meters, square meters)
+UNITS: Dict[str, Dict[str, float]] = {
+    "length": {
+        "m": 1.0, "meter": 1.0, "meters": 1.0, "metre": 1.0, "metres": 1.0, "mtr": 1.0, "mtrs": 1.0,
+        "km": 1000.0, "kilometer": 1000.0, "kilometers": 1000.0, "kilometre": 1000.0, "kilometres": 1000.0,
+        "ft": 0.3048, "feet": 0.3048, "foot": 0.3048, "'": 0.3048
+    },
+    "area": {
+        "sq ft": 0.09290304, "sqft": 0.09290304, "sq. ft": 0.09290304, "square feet": 0.09290304,
+        "square foot": 0.09290304, "ft2": 0.09290304,
+        "sq m": 1.0, "sqm": 1.0, "sq. m": 1.0, "square meters": 1.0, "square metres": 1.0, "m2": 1.0,
+        "cent": 40.468564, "cents": 40.468564,
+        "acre": 4046.8564, "acres": 4046.8564,
+        "hectare": 10000.0, "hectares": 10000.0, "ha": 10000.0
+    }
+}
+
+_NUMBER = re.compile(r"(?<![\w.])(\d[\d,]*(?:\.\d+)?)\s*([a-z.'2 ]{0,14})", re.IGNORECASE)
+_BARE_NUMBER = re.compile(r"\s*(\d[\d,]*(?:\.\d+)?)\s*")
+
+
+def parse_quantity(text: Any, quantity: str, implied_unit: Optional[str] = None) -> Optional[float]:
+    """
+    Parse the measurement in a free-text value.
+
+    Only a number directly followed by a known unit counts, so counts and
+    other numbers in the text ("3 houses within 200 m", "5 minutes walk")
+    are skipped. A value that is nothing but a number takes implied_unit,
+    for fields that name their unit (e.g. square_feet).
+
+    Args:
+        text: Field value, e.g. "500 meters", "50ft", "5,000 sq ft", "1.5 km"
+        quantity: "length" or "area"
+        implied_unit: Unit of a bare number, or None to leave it undetermined
+
+    Returns:
+        Value in the base unit (meters or square meters), or None if there is
+        no measurement or several different ones
+    """
+    if text is None:
+        return None
+    text = str(text)
+    units = UNITS[quantity]
+    bare = _BARE_NUMBER.fullmatch(text)
+    if bare:
+        return float(bare.group(1).replace(",", "")) * units[implied_unit] if implied_unit else None
+
+    values = set()
+    for match in _NUMBER.finditer(text):
+        suffix = " ".join(match.group(2).lower().split())
+        # Longest alias that the suffix starts with as a whole word
+        for alias in sorted(units, key=len, reverse=True):
+            if re.match(re.escape(alias) + r"(?![a-z])", suffix):
+                values.add(float(match.group(1).replace(",", "")) * units[alias])
+                break
+    # Several different measurements (e.g. "150 m to the school, 2 km to the village") are ambiguous
+    return values.pop() if len(values) == 1 else None
+
+
+def format_quantity(value: float, quantity: str, unit: str) -> str:
+    """Format a base-unit value in a rule's unit, e.g. "30 ft"."""
+    converted = value / UNITS[quantity][unit]
+    return f"{converted:,.0f} {unit}" if converted >= 10 else f"{converted:.1f} {unit}"
+
+
+class Rule:
+    """A declared rule bound to its regulation."""
+
+    def __init__(self, regulation: str, spec: Dict[str, Any]):
+        """
+        Initialize from a rule declaration.
+
+        Args:
+            regulation: Regulation name of the rule file
+            spec: Rule declaration
+
+        Raises:
+            ValueError: If the declaration is incomplete
+        """
+        for key in ("id", "clause", "quantity", "unit"):
+            if key not in spec:
+                raise ValueError(f"Rule is missing '{key}'")
+        if spec["quantity"] not in UNITS or spec["unit"] not in UNITS[spec["quantity"]]:
+            raise ValueError(f"Rule {spec['id']}: unknown unit {spec['unit']!r} for {spec['quantity']!r}")
+        if spec.get("implied_unit") and spec["implied_unit"] not in UNITS[spec["quantity"]]:
+            raise ValueError(f"Rule {spec['id']}: unknown implied_unit {spec['implied_unit']!r}")
+
+        self.regulation = regulation
+        self.id = spec["id"]
+        self.clause = spec["clause"]
+        self.department = spec.get("department", "other")
+        self.quantity = spec["quantity"]
+        self.unit = spec["unit"]
+        self.fields: List[str] = spec.get("fields") or [spec["field"]]
+        self.implied_unit: Optional[str] = spec.get("implied_unit")
+        self.pattern = re.compile(spec["pattern"], re.IGNORECASE) if spec.get("pattern") else None
+        self.risk_level = spec.get("risk_level", "medium")
+        self.blocking = bool(spec.get("blocking", False))
+        self.excerpt = spec.get("excerpt", "")
+        self.violation = spec.get("violation", "")
+        self.satisfied = spec.get("satisfied", "")
+        self.checklist = spec.get("checklist", "")
+
+        factor = UNITS[self.quantity][self.unit]
+        self.min = spec["min"] * factor if "min" in spec else None
+        self.max = spec["max"] * factor if "max" in spec else None
+        self.satisfied_at = spec["satisfied_at"] * factor if "satisfied_at" in spec else None
+        self.spacing = spec["spacing"] * UNITS["length"][spec.get("spacing_unit", "m")] if "spacing" in spec else None
+
+    def measure(self, application: Dict[str, Any]) -> Tuple[Optional[float], Optional[str]]:
+        """
+        Find the rule's measurement in an application.
+
+        Returns:
+            (value in base units, field it came from), or (None, None)
+        """
+        for field in self.fields:
+            text = application.get(field)
+            if not text:
+                continue
+            if self.pattern is not None:
+                match = self.pattern.search(str(text))
+                if not match:
+                    continue
+                text = match.group("value")
+            value = parse_quantity(text, self.quantity, self.implied_unit)
+            if value is not None:
+                return value, field
+        return None, None
+
+    def evaluate(self, application: Dict[str, Any]) -> "RuleFinding":
+        """Evaluate the rule against an application."""
+        value, field = self.measure(application)
+        if value is None:
+            return RuleFinding(self, UNDETERMINED)
+        shown = format_quantity(value, self.quantity, self.unit)
+
+        if self.spacing is not None:
+            # One extinguisher (or similar) per spacing x spacing cell
+            count = max(1, math.ceil(value / (self.spacing * self.spacing)))
+            return RuleFinding(self, UNDETERMINED, value, field, checklist=self.checklist.format(count=count, area=shown))
+
+        if (self.min is not None and value < self.min) or (self.max is not None and value > self.max):
+            return RuleFinding(self, VIOLATED, value, field, self.violation.format(value=shown))
+        if self.satisfied_at is not None and value < self.satisfied_at:
+            return RuleFinding(self, UNDETERMINED, value, field)
+        return RuleFinding(self, SATISFIED, value, field, self.satisfied.format(value=shown))
+
+
+class RuleFinding:
+    """Result of one rule on one application."""
+
+    def __init__(
+        self,
+        rule: Rule,
+        outcome: str,
+        value: Optional[float] = None,
+        field: Optional[str] = None,
+        explanation: str = "",
+        checklist: str = ""
+    ):
+        self.rule = rule
+        self.outcome = outcome
+        self.value = value
+        self.field = field
+        self.explanation = explanation
+        self.checklist = checklist or (rule.checklist if outcome == VIOLATED else "")
+
+    def to_issue(self) -> Dict[str, Any]:
+        """Issue in the LLM compliance report schema."""
+        return {
+            "type": "violation",
+            "risk_level": self.rule.risk_level,
+            "department": self.rule.department,
+            "regulation_reference": {"name": self.rule.regulation, "clause": self.rule.clause},
+            "document_excerpt": self.rule.excerpt,
+            "explanation": self.explanation
+        }
+
+
+class RuleScreen:
+    """All rule findings for one application."""
+
+    def __init__(self, findings: List[RuleFinding]):
+        self.findings = findings
+
+    @property
+    def violations(self) -> List[RuleFinding]:
+        return [f for f in self.findings if f.outcome == VIOLATED]
+
+    @property
+    def decided(self) -> List[RuleFinding]:
+        return [f for f in self.findings if f.outcome != UNDETERMINED]
+
+    @property
+    def blocking(self) -> bool:
+        """True if a blocking rule is violated (the application cannot pass)."""
+        return any(f.rule.blocking for f in self.violations)
+
+    @property
+    def decided_clauses(self) -> List[Tuple[str, str]]:
+        """(regulation, clause) pairs the rules have ruled on."""
+        return [(f.rule.regulation, f.rule.clause) for f in self.decided]
+
+    def issues(self) -> List[Dict[str, Any]]:
+        return [f.to_issue() for f in self.violations]
+
+    def checklist(self) -> List[str]:
+        return [f.checklist for f in self.findings if f.checklist]
+
+    def residue(self, application: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Application as sent to the LLM: fields decided by a rule are
+        replaced with the verdict so the LLM does not re-evaluate them.
+
+        Args:
+            application: Original application data
+
+        Returns:
+            Copy of the application
+        """
+        residue = dict(application)
+        for finding in self.decided:
+            verdict = "violated" if finding.outcome == VIOLATED else "satisfied"
+            residue[finding.field] = (
+                f"{application.get(finding.field)} (already checked: "
+                f"{finding.rule.regulation}, {finding.rule.clause} {verdict}; do not re-evaluate)"
+            )
+        return residue
+
+    def to_report(self) -> Dict[str, Any]:
+        """
+        Complete analysis for a blocked application, without the LLM.
+
+        Returns:
+            Analysis dictionary in the compliance report schema
+        """
+        checklist = self.checklist() + [
+            "Other requirements were not assessed; resubmit after correcting the violations above for a full review"
+        ]
+        coverage = 100.0 * len(self.decided) / len(self.findings) if self.findings else 0
+        return {
+            "overall_status": "non_compliant",
+            "confidence_score": 95,
+            "time_saved_minutes": 0,
+            "regulation_coverage_percent": coverage,
+            "issues": self.issues(),
+            "checklist": checklist
+        }
+
+
+class RulesEngine:
+    """
+    Loads rule files and screens applications.
+    """
+
+    def __init__(self, rules_dir: str = None):
+        """
+        Initialize the engine and load the rules.
+
+        Args:
+            rules_dir: Directory containing rule files (defaults to settings.rules_dir)
+        """
+        self.rules_dir = rules_dir or settings.rules_dir
+        self.rules: List[Rule] = []
+        self.fingerprint = ""
+        self.load()
+
+    def load(self) -> int:
+        """
+        (Re)load every *.json rule file in the rules directory.
+
+        Invalid files and rules are logged and skipped.
+
+        Returns:
+            Number of rules loaded
+        """
+        rules: List[Rule] = []
+        digest = hashlib.sha1()
+        if not os.path.isdir(self.rules_dir):
+            logger.warning(f"Rules directory not found: {self.rules_dir}")
+        else:
+            for filename in sorted(os.listdir(self.rules_dir)):
+                if not filename.endswith(".json"):
+                    continue
+                path = os.path.join(self.rules_dir, filename)
+                try:
+                    with open(path, "rb") as f:
+                        raw = f.read()
+                    declaration = json.loads(raw.decode("utf-8"))
+                except (OSError, ValueError) as e:
+                    logger.error(f"Failed to load rule file {filename}: {e}")
+                    continue
+                digest.update(filename.encode("utf-8") + b"\0" + raw)
+                regulation = declaration.get("regulation", os.path.splitext(filename)[0])
+                for spec in declaration.get("rules", []):
+                    try:
+                        rules.append(Rule(regulation, spec))
+                    except (KeyError, ValueError, re.error) as e:
+                        logger.error(f"Skipping invalid rule in {filename}: {e}")
+        self.rules = rules
+        self.fingerprint = digest.hexdigest()
+        logger.info(f"Loaded {len(rules)} compliance rules from {self.rules_dir}")
+        return len(rules)
+
+    def screen(self, application: Dict[str, Any]) -> RuleScreen:
+        """
+        Evaluate every rule against an application.
+
+        Args:
+            application: Application details
+
+        Returns:
+            RuleScreen with one finding per rule
+        """
+        return RuleScreen([rule.evaluate(application) for rule in self.rules])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Loaded rules for monitoring."""
+        return {
+            "rules_dir": self.rules_dir,
+            "rules": len(self.rules),
+            "fingerprint": self.fingerprint,
+            "regulations": sorted({rule.regulation for rule in self.rules})
+        }
+
+
+# Singleton instance
+_rules_engine: RulesEngine = None
+
+
+def get_rules_engine() -> RulesEngine:
+    """
+    Get or create the singleton RulesEngine instance.
+
+    Returns:
+        RulesEngine instance
+    """
+    global _rules_engine
+    if _rules_engine is None:
+        _rules_engine = RulesEngine()
+    return _rules_engine
@@ -0,0 +1,375 @@
+"""
+Snapshot Service - Portable Vector Store Snapshots
+Exports the vector store to a self-describing snapshot directory and
+imports it on another node, without re-extracting or re-embedding the
+regulation documents.
+
+Responsibilities:
+- Export embeddings as a float32 .npy array (memory-mappable) and ids,
+  documents and metadata as Parquet (JSONL when pyarrow is missing)
+- Bundle the derived indexes (compressed IVF-PQ index, facet routing index)
+  so they do not have to be rebuilt
+- Write a manifest (format version, embedding model, dimension, count,
+  file checksums) and verify it on import
+- Import into a fresh store next to the live one, swap it in once it is
+  complete (one generation bump), and re-stamp the bundled indexes with
+  the new corpus generation
+
+Import does not re-embed anything, but Chroma still builds its HNSW graph
+as the documents are added, so import time grows with the corpus; only the
+bundled compressed and routing indexes are used as they are.
+
+Snapshot layout:
+    manifest.json
+    embeddings.npy          float32 (n x dimension)
+    documents.parquet       id, document, metadata (JSON) - or documents.jsonl
+    compressed_index/       optional, see compressed_index
+    routing_index.npy/.json optional, see routing_index
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+from datetime import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Optional: Parquet for documents and metadata
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logger.warning("pyarrow not available - snapshots store documents as JSONL")
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Documents added to the vector store per call on import
+IMPORT_BATCH_SIZE = 1000
+
+# Derived index files bundled with a snapshot: (path relative to the vector
+# store, metadata file whose "generation" is re-stamped on import)
+BUNDLED_INDEXES = [
+    ("compressed_index", os.path.join("compressed_index", "meta.json")),
+    ("routing_index.npy", None),
+    ("routing_index.json", "routing_index.json")
+]
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _files(root: str) -> List[str]:
+    """Files under a snapshot directory, relative, manifest excluded."""
+    paths = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.relpath(os.path.join(directory, name), root)
+            if path != "manifest.json":
+                paths.append(path)
+    return sorted(paths)
+
+
+class _DocumentWriter:
+    """Streams (id, document, metadata) rows to documents.parquet or documents.jsonl."""
+
+    def __init__(self, snapshot_dir: str):
+        if PYARROW_AVAILABLE:
+            self.schema = pa.schema([("id", pa.string()), ("document", pa.string()), ("metadata", pa.string())])
+            self.writer = pq.ParquetWriter(os.path.join(snapshot_dir, "documents.parquet"), self.schema)
+        else:
+            self.writer = open(os.path.join(snapshot_dir, "documents.jsonl"), "w", encoding="utf-8")
+
+    def __enter__(self) -> "_DocumentWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.writer.close()
+
+    def write(self, ids: List[str], documents: List[str], metadatas: List[Optional[Dict[str, Any]]]) -> None:
+        rows = {"id": ids, "document": documents, "metadata": [json.dumps(m or {}, ensure_ascii=False) for m in metadatas]}
+        if PYARROW_AVAILABLE:
+            self.writer.write_table(pa.table(rows, schema=self.schema))
+        else:
+            for i in range(len(ids)):
+                self.writer.write(json.dumps({key: rows[key][i] for key in rows}, ensure_ascii=False) + "\n")
+
+
+class SnapshotService:
+    """
+    Export and import of vector store snapshots.
+    """
+
+    def __init__(self, vector_store: Any = None):
+        """
+        Initialize the service.
+
+        Args:
+            vector_store: VectorStoreService (defaults to the singleton)
+        """
+        if vector_store is None:
+            from app.services.vector_store_service import get_vector_store_service
+            vector_store = get_vector_store_service()
+        self.vector_store = vector_store
+
+    # --- Export ---
+
+    def export_snapshot(self, snapshot_dir: str) -> Dict[str, Any]:
+        """
+        Write a snapshot of the current vector store.
+
+        Args:
+            snapshot_dir: Target directory (created; must be empty if it exists)
+
+        Returns:
+            The snapshot manifest
+
+        Raises:
+            ValueError: If the target directory is not empty or the store
+                changed during the export
+        """
+        if os.path.isdir(snapshot_dir) and os.listdir(snapshot_dir):
+            raise ValueError(f"Snapshot directory is not empty: {snapshot_dir}")
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+        generation = self.vector_store.get_generation()
+        count = self.vector_store.get_collection_count()
+        embeddings: Optional[np.ndarray] = None
+        written = 0
+        with _DocumentWriter(snapshot_dir) as documents:
+            for page in self.vector_store.iter_documents(include=["embeddings", "documents", "metadatas"]):
+                block = np.asarray(page["embeddings"], dtype=np.float32)
+                if embeddings is None:
+                    embeddings = np.lib.format.open_memmap(
+                        os.path.join(snapshot_dir, "embeddings.npy"), mode="w+",
+                        dtype=np.float32, shape=(count, block.shape[1])
+                    )
+                if written + len(block) > count:
+                    raise ValueError("Vector store changed during export")
+                embeddings[written:written + len(block)] = block
+                documents.write(page["ids"], page["documents"], page["metadatas"])
+                written += len(block)
+        if written != count or self.vector_store.get_generation() != generation:
+            raise ValueError("Vector store changed during export")
+        dimension = int(embeddings.shape[1]) if embeddings is not None else 0
+        if embeddings is not None:
+            embeddings.flush()
+            del embeddings
+        else:
+            np.save(os.path.join(snapshot_dir, "embeddings.npy"), np.zeros((0, 0), dtype=np.float32))
+
+        bundled = self._bundle_indexes(snapshot_dir, generation)
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": datetime.utcnow().isoformat(),
+            "embedding_model": settings.embedding_model_name,
+            "dimension": dimension,
+            "count": written,
+            "source_generation": generation,
+            "documents_format": "parquet" if PYARROW_AVAILABLE else "jsonl",
+            "indexes": bundled,
+            "files": {path: _sha256(os.path.join(snapshot_dir, path)) for path in _files(snapshot_dir)}
+        }
+        with open(os.path.join(snapshot_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Exported snapshot of {written} documents to {snapshot_dir}")
+        return manifest
+
+    def _bundle_indexes(self, snapshot_dir: str, generation: int) -> List[str]:
+        """Copy derived index files that were built for this exact corpus."""
+        bundled = []
+        for name, meta_name in BUNDLED_INDEXES:
+            source = os.path.join(self.vector_store.db_path, name)
+            if not os.path.exists(source):
+                continue
+            if meta_name is not None and self._read_generation(os.path.join(self.vector_store.db_path, meta_name)) != generation:
+                logger.info(f"Not bundling stale {name}")
+                continue
+            target = os.path.join(snapshot_dir, name)
+            if os.path.isdir(source):
+                shutil.copytree(source, target)
+            else:
+                shutil.copy2(source, target)
+            bundled.append(name)
+        # The routing index is two files: keep both or neither
+        if ("routing_index.npy" in bundled) != ("routing_index.json" in bundled):
+            for name in ("routing_index.npy", "routing_index.json"):
+                if name in bundled:
+                    os.remove(os.path.join(snapshot_dir, name))
+                    bundled.remove(name)
+        return bundled
+
+    @staticmethod
+    def _read_generation(meta_path: str) -> Optional[int]:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("generation")
+        except (OSError, ValueError):
+            return None
+
+    # --- Import ---
+
+    def import_snapshot(self, snapshot_dir: str, replace: bool = False) -> Dict[str, Any]:
+        """
+        Load a snapshot into the vector store.
+
+        The documents are added (without re-embedding) to a new store in a
+        sibling directory, which replaces the current store only once it is
+        complete; a failed import leaves the current store untouched.
+
+        Args:
+            snapshot_dir: Snapshot directory
+            replace: Replace the current contents (otherwise the store must be empty)
+
+        Returns:
+            Import statistics
+
+        Raises:
+            ValueError: If the snapshot is invalid, was built with another
+                embedding model, or the store is not empty
+        """
+        manifest = self.verify_snapshot(snapshot_dir)
+        if manifest["embedding_model"] != settings.embedding_model_name:
+            raise ValueError(
+                f"Snapshot embeddings are from {manifest['embedding_model']}, "
+                f"this node uses {settings.embedding_model_name}"
+            )
+        if self.vector_store.get_collection_count() and not replace:
+            raise ValueError("Vector store is not empty (use replace to overwrite it)")
+
+        staging_path = f"{os.path.normpath(self.vector_store.db_path)}.import-{os.getpid()}"
+        shutil.rmtree(staging_path, ignore_errors=True)
+        staged = type(self.vector_store)(staging_path, self.vector_store.collection_name)
+        try:
+            embeddings = np.load(os.path.join(snapshot_dir, "embeddings.npy"), mmap_mode="r")
+            imported = 0
+            for ids, documents, metadatas in self._read_documents(snapshot_dir, manifest["documents_format"]):
+                staged.add_documents(
+                    documents=documents,
+                    embeddings=np.asarray(embeddings[imported:imported + len(ids)]).tolist(),
+                    metadatas=metadatas,
+                    ids=ids
+                )
+                imported += len(ids)
+            if imported != manifest["count"]:
+                raise ValueError(f"Snapshot holds {imported} documents, manifest says {manifest['count']}")
+        except Exception:
+            staged.close()
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+
+        generation = self.vector_store.swap_in(staged)
+        installed = self._install_indexes(snapshot_dir, manifest["indexes"])
+        stats = {"documents": imported, "generation": generation, "indexes": installed}
+        logger.info(f"Imported snapshot {snapshot_dir}: {stats}")
+        return stats
+
+    @staticmethod
+    def verify_snapshot(snapshot_dir: str) -> Dict[str, Any]:
+        """
+        Read the manifest and check every file's checksum.
+
+        Args:
+            snapshot_dir: Snapshot directory
+
+        Returns:
+            The manifest
+
+        Raises:
+            ValueError: If the manifest is missing or unsupported, or a file
+                is missing or corrupt
+        """
+        try:
+            with open(os.path.join(snapshot_dir, "manifest.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read snapshot manifest: {e}")
+        if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format: {manifest.get('format_version')}")
+        if manifest["documents_format"] == "parquet" and not PYARROW_AVAILABLE:
+            raise ValueError("Snapshot documents are Parquet; install pyarrow to import it")
+        for path, checksum in manifest["files"].items():
+            full_path = os.path.join(snapshot_dir, path)
+            if not os.path.exists(full_path):
+                raise ValueError(f"Snapshot file missing: {path}")
+            if _sha256(full_path) != checksum:
+                raise ValueError(f"Snapshot file corrupt: {path}")
+        return manifest
+
+    @staticmethod
+    def _read_documents(snapshot_dir: str, documents_format: str) -> Iterator[tuple]:
+        """Yield (ids, documents, metadatas) batches in embedding order."""
+        if documents_format == "parquet":
+            parquet = pq.ParquetFile(os.path.join(snapshot_dir, "documents.parquet"))
+            for batch in parquet.iter_batches(batch_size=IMPORT_BATCH_SIZE):
+                columns = batch.to_pydict()
+                yield columns["id"], columns["document"], [json.loads(m) for m in columns["metadata"]]
+            return
+
+        batch: List[Dict[str, Any]] = []
+        with open(os.path.join(snapshot_dir, "documents.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                batch.append(json.loads(line))
+                if len(batch) == IMPORT_BATCH_SIZE:
+                    yield [r["id"] for r in batch], [r["document"] for r in batch], [json.loads(r["metadata"]) for r in batch]
+                    batch = []
+        if batch:
+            yield [r["id"] for r in batch], [r["document"] for r in batch], [json.loads(r["metadata"]) for r in batch]
+
+    def _install_indexes(self, snapshot_dir: str, bundled: List[str]) -> List[str]:
+        """Copy bundled indexes next to the store, stamped with the new generation."""
+        generation = self.vector_store.get_generation()
+        installed = []
+        for name, meta_name in BUNDLED_INDEXES:
+            if name not in bundled:
+                continue
+            target = os.path.join(self.vector_store.db_path, name)
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            source = os.path.join(snapshot_dir, name)
+            if os.path.isdir(source):
+                shutil.copytree(source, target)
+            else:
+                shutil.copy2(source, target)
+            if meta_name is not None:
+                # Same documents and ids as when the index was built
+                meta_path = os.path.join(self.vector_store.db_path, meta_name)
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                meta["generation"] = generation
+                tmp_path = f"{meta_path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+                os.replace(tmp_path, meta_path)
+            installed.append(name)
+        return installed
+
+
+# Singleton instance
+_snapshot_service: Optional[SnapshotService] = None
+
+
+def get_snapshot_service() -> SnapshotService:
+    """
+    Get or create the singleton SnapshotService instance.
+
+    Returns:
+        SnapshotService instance
+    """
+    global _snapshot_service
+    if _snapshot_service is None:
+        _snapshot_service = SnapshotService()
+    return _snapshot_service
@@ -7,6 +7,17 @@ Responsibilities:
 - Store document embeddings with metadata
 - Query vector store for semantic retrieval
 - Handle collection management
+- Track the corpus generation (bumped on every write) for cache invalidation
+- Cache query results per (embedding, n_results, filter) until the
+  generation changes
+- Optionally shard documents into one collection per department (or
+  another metadata field): filtered queries touch only the matching
+  shards, unfiltered ones search every shard concurrently and merge top-k,
+  and one shard can be rebuilt without re-indexing the others
+- Re-open the collections (and re-read the shard manifest) when the
+  generation changes, so writes by other worker processes are picked up
+- Optionally answer queries from a compressed IVF-PQ index (see
+  compressed_index) instead of Chroma's HNSW graph
 
 Reference: Inspired by OLD/RagBot/store_documents.py (lines 7-9, 91-96) 
           and OLD/RagBot/server.py (lines 16-22)
@@ -15,10 +26,23 @@ Phase 2: IMPLEMENTED - Full ChromaDB integration
 """
 
 from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 import logging
+import re
+import threading
 import chromadb
 from chromadb.config import Settings
+import numpy as np
 import os
+import shutil
+
+from app.core.config import settings
+from app.core.locks import file_lock
+from app.core.metrics import Counter, SharedMetrics, gauge_lines
+from app.services.report_cache import ReportCache
+from app.services.compressed_index import CompressedIndex
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +67,33 @@ class VectorStoreService:
         self.collection_name = collection_name
         self.client: Optional[chromadb.PersistentClient] = None
         self.collection: Optional[chromadb.Collection] = None
+        # Sharded mode: shard key -> collection, listed in shards.json
+        self.sharded = settings.vector_store_sharding
+        self.shard_field = settings.vector_store_shard_field
+        self.shards: Dict[str, Any] = {}
+        self.shards_path = os.path.join(db_path, "shards.json")
+        self.shards_lock_path = os.path.join(db_path, ".shards.lock")
+        self._shard_lock = threading.Lock()
+        self._shard_executor: Optional[ThreadPoolExecutor] = None
+        # Generation the open collection handles belong to
+        self._opened_generation: Optional[int] = None
+        # Compressed index mode: served while it matches the corpus generation
+        self.compressed_index = CompressedIndex(
+            os.path.join(db_path, "compressed_index")
+        ) if settings.vector_store_index == "ivfpq" else None
+        # Stored next to the database so that ingestion in another process
+        # also invalidates this process's caches
+        self.generation_path = os.path.join(db_path, "generation")
+        self.generation_lock_path = os.path.join(db_path, ".generation.lock")
+        # Popular queries (search page, facet queries) skip Chroma; a
+        # generation change clears the cache in one step
+        self.query_cache = ReportCache(
+            settings.vector_query_cache_max_entries, ttl_seconds=0
+        ) if settings.vector_query_cache_enabled else None
+        self.cache_lookups = Counter(
+            "vector_query_cache_lookups_total", "Vector query cache lookups by result", ["result"]
+        )
+        self.shared_metrics = SharedMetrics("vector", [self.cache_lookups], settings.metrics_dir)
         self._initialize_client()
     
     def _initialize_client(self) -> None:
@@ -66,6 +117,10 @@ class VectorStoreService:
                 )
                 logger.info(f"Created new collection: {self.collection_name}")
             
+            if self.sharded:
+                self._load_shards()
+            self._opened_generation = self.get_generation()
+            
             logger.info(f"ChromaDB initialized. Collection count: {self.get_collection_count()}")
         except Exception as e:
             logger.error(f"Failed to initialize ChromaDB: {e}")
@@ -100,23 +155,41 @@ class VectorStoreService:
         if metadatas and len(metadatas) != len(documents):
             raise ValueError("Metadatas must have same length as documents")
         
+        self._refresh_collections()
         try:
             # Generate IDs if not provided
             if ids is None:
                 existing_count = self.get_collection_count()
                 ids = [f"doc_{existing_count + i}" for i in range(len(documents))]
             
-            # Add to collection
-            self.collection.add(
-                documents=documents,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                ids=ids
-            )
-            logger.info(f"Added {len(documents)} documents to collection")
+            if self.sharded:
+                # One add per shard, keyed by each document's shard field
+                groups: Dict[str, List[int]] = {}
+                for i in range(len(documents)):
+                    value = metadatas[i].get(self.shard_field) if metadatas else None
+                    groups.setdefault(self.shard_key(value), []).append(i)
+                for key, rows in groups.items():
+                    self._get_or_create_shard(key).add(
+                        documents=[documents[i] for i in rows],
+                        embeddings=[embeddings[i] for i in rows],
+                        metadatas=[metadatas[i] for i in rows] if metadatas else None,
+                        ids=[ids[i] for i in rows]
+                    )
+                logger.info(f"Added {len(documents)} documents to shards: {', '.join(groups)}")
+            else:
+                # Add to collection
+                self.collection.add(
+                    documents=documents,
+                    embeddings=embeddings,
+                    metadatas=metadatas,
+                    ids=ids
+                )
+                logger.info(f"Added {len(documents)} documents to collection")
         except Exception as e:
             logger.error(f"Error adding documents: {e}")
             raise
+        finally:
+            self._bump_generation()
     
     def query(
         self, 
@@ -145,34 +218,365 @@ class VectorStoreService:
         if self.collection is None:
             raise RuntimeError("Collection not initialized")
         
+        key = self._cache_key(query_embedding, n_results, where)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
         try:
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                where=where
-            )
+            results = self._query_collections([query_embedding], n_results, where)
             
             logger.info(f"Query returned {len(results['documents'][0])} results")
-            return {
+            result = {
                 "documents": results["documents"][0] if results["documents"] else [],
                 "distances": results["distances"][0] if results["distances"] else [],
                 "metadatas": results["metadatas"][0] if results["metadatas"] else [],
                 "ids": results["ids"][0] if results["ids"] else []
             }
+            self._cache_put(key, result)
+            return result
         except Exception as e:
             logger.error(f"Error querying collection: {e}")
             raise
     
+    def query_batch(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Query the vector store for several embeddings in one call.
+        
+        Cached queries are answered from the cache; only the rest go to
+        Chroma (in one call).
+        
+        Args:
+            query_embeddings: Embedding vectors of the queries
+            n_results: Number of results per query
+            where: Optional metadata filter applied to every query
+            
+        Returns:
+            One result dictionary per query (same keys as query())
+            
+        Raises:
+            RuntimeError: If collection is not initialized
+        """
+        if self.collection is None:
+            raise RuntimeError("Collection not initialized")
+        if not query_embeddings:
+            return []
+        
+        keys = [self._cache_key(embedding, n_results, where) for embedding in query_embeddings]
+        batch: List[Optional[Dict[str, Any]]] = [self._cache_get(key) for key in keys]
+        missing = [i for i, result in enumerate(batch) if result is None]
+        if not missing:
+            return batch
+        
+        try:
+            results = self._query_collections([query_embeddings[i] for i in missing], n_results, where)
+            
+            for j, i in enumerate(missing):
+                batch[i] = {
+                    key: results[key][j] if results.get(key) else []
+                    for key in ("documents", "distances", "metadatas", "ids")
+                }
+                self._cache_put(keys[i], batch[i])
+            logger.info(
+                f"Batch query of {len(query_embeddings)} ({len(query_embeddings) - len(missing)} cached) "
+                f"returned {sum(len(r['documents']) for r in batch)} results"
+            )
+            return batch
+        except Exception as e:
+            logger.error(f"Error querying collection: {e}")
+            raise
+    
+    def _query_collections(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int,
+        where: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Run a Chroma query against the collection or the relevant shards.
+        
+        Shards are searched concurrently and each query's hits are merged
+        by distance.
+        
+        Returns:
+            Chroma-shaped results (one list per query for each field)
+        """
+        # Checked first: a query the index serves never touches Chroma, so
+        # its HNSW segments are not loaded into this process
+        if self.compressed_index is not None:
+            if self.compressed_index.is_current(self.get_generation()):
+                try:
+                    return self._query_compressed(query_embeddings, n_results, where)
+                except ValueError as e:
+                    logger.warning(f"Compressed index cannot serve this query, using Chroma: {e}")
+            else:
+                logger.warning("Compressed index is missing or stale, using Chroma (run build_compressed_index)")
+        
+        self._refresh_collections()
+        if not self.sharded:
+            return self.collection.query(query_embeddings=query_embeddings, n_results=n_results, where=where)
+        
+        fields = ("documents", "distances", "metadatas", "ids")
+        merged: Dict[str, List[List[Any]]] = {field: [[] for _ in query_embeddings] for field in fields}
+        targets = self._target_shards(where)
+        if not targets:
+            return merged
+        
+        def search(collection: Any) -> Dict[str, Any]:
+            return collection.query(query_embeddings=query_embeddings, n_results=n_results, where=where)
+        
+        if len(targets) == 1:
+            results = [search(targets[0])]
+        else:
+            results = list(self._get_shard_executor().map(search, targets))
+        for i in range(len(query_embeddings)):
+            hits = []
+            for result in results:
+                if result.get("ids"):
+                    hits.extend(zip(*(result[field][i] for field in fields)))
+            hits.sort(key=lambda hit: hit[1])
+            for j, field in enumerate(fields):
+                merged[field][i] = [hit[j] for hit in hits[:n_results]]
+        return merged
+    
+    def _query_compressed(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int,
+        where: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Answer a query from the compressed index alone (texts and metadata
+        come from its row file).
+        
+        Raises:
+            ValueError: If the filter is not supported by the compressed index
+        """
+        hits = self.compressed_index.search(query_embeddings, n_results, where)
+        fields = ("documents", "distances", "metadatas", "ids")
+        return {field: [hit[field] for hit in hits] for field in fields}
+    
+    def iter_documents(self, include: List[str], batch_size: int = 1000):
+        """
+        Page through every stored document (all shards when sharded).
+        
+        Args:
+            include: Fields to return (e.g. ["embeddings", "metadatas"])
+            batch_size: Documents per page
+            
+        Yields:
+            Chroma get() results with ids plus the included fields
+        """
+        self._refresh_collections()
+        collections = list(self.shards.values()) if self.sharded else [self.collection]
+        for collection in collections:
+            offset = 0
+            while True:
+                page = collection.get(include=include, limit=batch_size, offset=offset)
+                if not page["ids"]:
+                    break
+                yield page
+                offset += len(page["ids"])
+    
+    def build_compressed_index(self) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild the compressed index from the current contents (if enabled).
+        
+        Returns:
+            Build statistics, or None if the compressed index is disabled
+        """
+        if self.compressed_index is None:
+            return None
+        return self.compressed_index.build(self)
+    
+    # --- Shards ---
+    
+    @staticmethod
+    def shard_key(value: Any) -> str:
+        """
+        Shard key of a metadata value ("Fire Safety" -> "fire_safety").
+        
+        Args:
+            value: Shard field value (None -> "general")
+            
+        Returns:
+            Normalised key
+        """
+        return re.sub(r"[^a-z0-9]+", "_", str(value or "general").lower()).strip("_") or "general"
+    
+    def _shard_collection_name(self, key: str) -> str:
+        # Chroma names: 3-63 characters, alphanumeric at both ends
+        return f"{self.collection_name}_{key}"[:63].rstrip("_")
+    
+    def _read_shard_keys(self) -> List[str]:
+        """Shard keys listed in the manifest (which other processes may have changed)."""
+        try:
+            with open(self.shards_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+    
+    def _load_shards(self) -> None:
+        """Open the shards listed in the manifest (replacing any open handles)."""
+        self.shards = {
+            key: self.client.get_or_create_collection(name=self._shard_collection_name(key))
+            for key in self._read_shard_keys()
+        }
+        logger.info(f"Loaded {len(self.shards)} shards: {', '.join(self.shards) or 'none'}")
+    
+    def _save_shards(self, keys: List[str]) -> None:
+        tmp_path = f"{self.shards_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sorted(set(keys)), f)
+        os.replace(tmp_path, self.shards_path)
+    
+    def _refresh_collections(self) -> None:
+        """
+        Re-open the collections if the corpus generation changed.
+        
+        Another worker process may have added or reset a shard, or deleted
+        and recreated the collection; handles opened before that would miss
+        new shards or point at deleted collections.
+        """
+        generation = self.get_generation()
+        if generation == self._opened_generation or self.client is None:
+            return
+        with self._shard_lock:
+            if generation == self._opened_generation:
+                return
+            self.collection = self.client.get_or_create_collection(name=self.collection_name)
+            if self.sharded:
+                self._load_shards()
+            self._opened_generation = generation
+    
+    def _get_or_create_shard(self, key: str) -> Any:
+        with self._shard_lock:
+            if key not in self.shards:
+                self.shards[key] = self.client.get_or_create_collection(
+                    name=self._shard_collection_name(key),
+                    metadata={"description": f"Regulations shard: {self.shard_field} = {key}"}
+                )
+                # Merge with the manifest: other processes may have added shards
+                with file_lock(self.shards_lock_path):
+                    self._save_shards(self._read_shard_keys() + [key])
+                logger.info(f"Created shard: {key}")
+            return self.shards[key]
+    
+    def _target_shards(self, where: Optional[Dict[str, Any]]) -> List[Any]:
+        """Shards a query must search: those named by a shard-field filter, else all."""
+        conditions = (where or {}).get("$and", [where or {}])
+        values = None
+        for condition in conditions:
+            value = condition.get(self.shard_field)
+            if isinstance(value, dict):
+                value = value.get("$in", [value["$eq"]] if "$eq" in value else None)
+            elif value is not None:
+                value = [value]
+            if value is not None:
+                values = value
+                break
+        self._refresh_collections()
+        with self._shard_lock:
+            if values is None:
+                return list(self.shards.values())
+            keys = {self.shard_key(v) for v in values}
+            return [collection for key, collection in self.shards.items() if key in keys]
+    
+    def _get_shard_executor(self) -> ThreadPoolExecutor:
+        """Create the shard fan-out thread pool on first use."""
+        if self._shard_executor is None:
+            self._shard_executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.vector_store_shard_workers), thread_name_prefix="vector-shard"
+            )
+        return self._shard_executor
+    
+    def reset_shard(self, value: str) -> None:
+        """
+        Remove every document of one shard (e.g. before re-ingesting a department).
+        
+        Without sharding, the documents whose shard field equals value are
+        deleted from the collection instead.
+        
+        Args:
+            value: Shard field value (e.g. a department name)
+        """
+        self._refresh_collections()
+        try:
+            if self.sharded:
+                key = self.shard_key(value)
+                with self._shard_lock, file_lock(self.shards_lock_path):
+                    keys = self._read_shard_keys()
+                    if key in self.shards or key in keys:
+                        try:
+                            self.client.delete_collection(name=self._shard_collection_name(key))
+                        except Exception:
+                            pass  # Already deleted by another process
+                        self.shards.pop(key, None)
+                        self._save_shards([k for k in keys if k != key])
+            elif self.collection is not None:
+                self.collection.delete(where={self.shard_field: value})
+            logger.info(f"Reset shard: {self.shard_field} = {value}")
+        finally:
+            self._bump_generation()
+    
+    # --- Query cache ---
+    
+    def _cache_key(self, query_embedding: List[float], n_results: int, where: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Query cache key: hash of the float32 embedding, n_results and filter (None if caching is off)."""
+        if self.query_cache is None:
+            return None
+        digest = hashlib.sha1(np.asarray(query_embedding, dtype=np.float32).tobytes())
+        digest.update(f"|{n_results}|{json.dumps(where, sort_keys=True)}".encode("utf-8"))
+        return digest.hexdigest()
+    
+    def _cache_get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Cached query result (a copy), after dropping results of an older generation."""
+        if key is None:
+            return None
+        self.query_cache.sync_generation(self.get_generation())
+        cached = self.query_cache.get(key)
+        self.cache_lookups.inc(result="hit" if cached is not None else "miss")
+        self.shared_metrics.flush()
+        return {field: list(values) for field, values in cached.items()} if cached is not None else None
+    
+    def _cache_put(self, key: Optional[str], result: Dict[str, Any]) -> None:
+        if key is not None:
+            self.query_cache.put(key, {field: list(values) for field, values in result.items()})
+    
+    def render_metrics(self) -> str:
+        """
+        Render query cache metrics in the Prometheus text exposition format.
+        
+        Returns:
+            Lookup counter by result (summed over workers with a shared
+            metrics directory), plus this worker's entry count and hit ratio gauges
+        """
+        lines = self.shared_metrics.render()
+        stats = self.query_cache.get_stats() if self.query_cache is not None else {"entries": 0, "hit_rate": 0.0}
+        lines += gauge_lines("vector_query_cache_entries", "Cached vector query results", [({}, stats["entries"])])
+        lines += gauge_lines(
+            "vector_query_cache_hit_ratio", "Vector query cache hits / lookups since start", [({}, stats["hit_rate"])]
+        )
+        return "\n".join(lines) + "\n"
+    
     def get_collection_count(self) -> int:
         """
         Get the number of documents in the collection.
         
         Returns:
-            Number of documents stored
+            Number of documents stored (across shards when sharded)
         """
         if self.collection is None:
             return 0
         try:
+            self._refresh_collections()
+            if self.sharded:
+                return sum(collection.count() for collection in list(self.shards.values()))
             return self.collection.count()
         except Exception:
             return 0
@@ -188,6 +592,16 @@ class VectorStoreService:
         
         try:
             self.client.delete_collection(name=self.collection_name)
+            if self.sharded:
+                with self._shard_lock, file_lock(self.shards_lock_path):
+                    for key in set(self.shards) | set(self._read_shard_keys()):
+                        try:
+                            self.client.delete_collection(name=self._shard_collection_name(key))
+                        except Exception:
+                            pass  # Already deleted by another process
+                    self.shards.clear()
+                    self._save_shards([])
+            self._bump_generation()
             logger.warning(f"Deleted collection: {self.collection_name}")
             # Reinitialize
             self._initialize_client()
@@ -195,26 +609,128 @@ class VectorStoreService:
             logger.error(f"Error deleting collection: {e}")
             raise
     
-    def get_by_ids(self, ids: List[str]) -> Dict[str, Any]:
+    def get_generation(self) -> int:
+        """
+        Get the corpus generation.
+        
+        The generation changes whenever documents are added or the
+        collection is deleted; anything derived from query results (cached
+        reports, cached retrievals) should include it in its cache key.
+        
+        Returns:
+            Generation number (0 if the store has never been written)
+        """
+        try:
+            with open(self.generation_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+    
+    def _bump_generation(self) -> None:
+        """
+        Advance the corpus generation.
+        
+        The read and write happen under a file lock shared by every process
+        using this store, so concurrent writes from different workers each
+        produce a distinct generation.
+        """
+        try:
+            with file_lock(self.generation_lock_path):
+                self._write_generation(self.get_generation() + 1)
+        except OSError as e:
+            logger.error(f"Failed to update corpus generation: {e}")
+    
+    def _write_generation(self, generation: int) -> None:
+        tmp_path = f"{self.generation_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(generation))
+        os.replace(tmp_path, self.generation_path)
+    
+    def close(self) -> None:
+        """Drop the Chroma client so the store's directory can be moved."""
+        if self.client is not None:
+            # Chroma keeps one system per path; a new client at this path
+            # must open the files that are there now
+            self.client.clear_system_cache()
+        self.client = None
+        self.collection = None
+        self.shards = {}
+        self._opened_generation = None
+    
+    def swap_in(self, staged: "VectorStoreService") -> int:
+        """
+        Replace this store with one built in another directory.
+        
+        Snapshot imports build the new store in a sibling directory, so the
+        current store stays intact (and queryable) while Chroma indexes the
+        new one, and the generation advances exactly once, at the swap. The
+        swap renames the two directories: other processes with this store
+        open must be restarted, so it is meant for offline imports.
+        
+        Args:
+            staged: Store built in a sibling directory (closed by the swap)
+            
+        Returns:
+            The new corpus generation
+        """
+        generation = max(self.get_generation(), staged.get_generation()) + 1
+        staged._write_generation(generation)
+        staged.close()
+        self.close()
+        
+        replaced_path = f"{self.db_path}.replaced-{os.getpid()}"
+        os.replace(self.db_path, replaced_path)
+        os.replace(staged.db_path, self.db_path)
+        shutil.rmtree(replaced_path, ignore_errors=True)
+        
+        self._initialize_client()
+        logger.info(f"Swapped in store from {staged.db_path} (generation {generation})")
+        return generation
+    
+    def get_by_ids(self, ids: List[str], include: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Retrieve documents by their IDs.
         
         Args:
             ids: List of document IDs
+            include: Fields to return (e.g. ["embeddings"]); Chroma's default if None
             
         Returns:
-            Dictionary with documents, metadatas, and ids
+            Dictionary with documents, metadatas, and ids (plus requested fields)
         """
         if self.collection is None:
             raise RuntimeError("Collection not initialized")
         
+        self._refresh_collections()
         try:
-            results = self.collection.get(ids=ids)
+            if self.sharded:
+                return self._get_from_shards(ids, include)
+            if include is not None:
+                results = self.collection.get(ids=ids, include=include)
+            else:
+                results = self.collection.get(ids=ids)
             return results
         except Exception as e:
             logger.error(f"Error getting documents by IDs: {e}")
             raise
 
+    
+    def _get_from_shards(self, ids: List[str], include: Optional[List[str]]) -> Dict[str, Any]:
+        """Look ids up in every shard; results follow the order of ids."""
+        rows: Dict[str, Dict[str, Any]] = {}
+        fields: List[str] = []
+        for collection in list(self.shards.values()):
+            results = collection.get(ids=ids, include=include) if include is not None else collection.get(ids=ids)
+            present = [f for f in ("documents", "metadatas", "embeddings") if results.get(f) is not None]
+            fields.extend(f for f in present if f not in fields)
+            for j, chunk_id in enumerate(results["ids"]):
+                rows[chunk_id] = {f: results[f][j] for f in present}
+        found = [chunk_id for chunk_id in ids if chunk_id in rows]
+        merged: Dict[str, Any] = {"ids": found}
+        for field in fields:
+            merged[field] = [rows[chunk_id].get(field) for chunk_id in found]
+        return merged
+
 
 # Singleton instance
 _vector_store_service: Optional[VectorStoreService] = None
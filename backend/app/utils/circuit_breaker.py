@@ -0,0 +1,213 @@
+"""
+Circuit Breaker - Fast Failure for Unhealthy Backends
+Tracks recent call outcomes per backend and short-circuits calls while
+the backend is considered down.
+
+States:
+- closed: calls flow normally; outcomes are recorded in a sliding window
+- open: calls are rejected immediately until the cooldown elapses
+- half_open: a limited number of probe calls decide whether to close again
+
+Slow calls (above a latency threshold) count as failures, so a backend
+that hangs until the timeout trips the breaker just like one that refuses
+connections.
+"""
+
+from typing import Any, Dict, Optional
+from collections import deque
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is short-circuited because the breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Failure-rate and latency based circuit breaker for a single backend.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        min_calls: int = 4,
+        window_size: int = 20,
+        slow_call_seconds: Optional[float] = None,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            name: Backend name used in logs and stats
+            failure_rate_threshold: Failure ratio (0-1) that opens the circuit
+            min_calls: Minimum outcomes in the window before the rate is evaluated
+            window_size: Number of recent outcomes kept
+            slow_call_seconds: Latency above which a successful call counts as failed
+            open_seconds: Cooldown before an open circuit allows a probe call
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+        """
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._outcomes = deque(maxlen=window_size)  # True = failure
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+
+        # Metrics
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        """Current state, moving open -> half_open once the cooldown elapsed."""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def can_attempt(self) -> bool:
+        """
+        Check whether a call would currently be allowed, without reserving it.
+        Used to fail fast before queueing; a False result counts as a
+        short-circuited call.
+
+        Returns:
+            False if the circuit is open (or half-open with all probes busy)
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                return True
+            self.short_circuited += 1
+            return False
+
+    def allow_request(self) -> bool:
+        """
+        Reserve permission for a call. Every allowed call must be followed
+        by record_success() or record_failure().
+
+        Returns:
+            True if the call may proceed
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        """
+        Record a successful call.
+
+        Args:
+            latency: Call duration in seconds (slow calls count as failures)
+        """
+        if self.slow_call_seconds is not None and latency is not None and latency > self.slow_call_seconds:
+            logger.warning(f"[CIRCUIT {self.name}] Slow call ({latency:.1f}s) counted as failure")
+            self.record_failure()
+            return
+
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                self._close()
+            else:
+                self._outcomes.append(False)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit if the threshold is crossed."""
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                self._open("probe call failed")
+                return
+
+            self._outcomes.append(True)
+            if self._state == STATE_CLOSED and len(self._outcomes) >= self.min_calls:
+                failure_rate = sum(self._outcomes) / len(self._outcomes)
+                if failure_rate >= self.failure_rate_threshold:
+                    self._open(f"failure rate {failure_rate:.0%}")
+
+    def record_ignored(self) -> None:
+        """Release a reserved call without recording an outcome (e.g. cancelled)."""
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def mark_unavailable(self) -> None:
+        """Force the circuit open (e.g. a health probe found the backend down)."""
+        with self._lock:
+            if self._state != STATE_OPEN:
+                self._open("health probe failed")
+            else:
+                self._opened_at = time.monotonic()
+
+    def mark_available(self) -> None:
+        """Let an open circuit probe immediately (e.g. a health probe succeeded)."""
+        with self._lock:
+            if self._state == STATE_OPEN:
+                self._state = STATE_HALF_OPEN
+                self._half_open_in_flight = 0
+                logger.info(f"[CIRCUIT {self.name}] Health probe succeeded - half-open")
+
+    def _maybe_half_open(self) -> None:
+        """Move open -> half_open after the cooldown (caller holds the lock)."""
+        if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = STATE_HALF_OPEN
+            self._half_open_in_flight = 0
+            logger.info(f"[CIRCUIT {self.name}] Cooldown elapsed - half-open")
+
+    def _open(self, reason: str) -> None:
+        """Open the circuit (caller holds the lock)."""
+        self._state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.times_opened += 1
+        logger.warning(f"[CIRCUIT {self.name}] OPEN ({reason}) for {self.open_seconds:.0f}s")
+
+    def _close(self) -> None:
+        """Close the circuit (caller holds the lock)."""
+        self._state = STATE_CLOSED
+        self._outcomes.clear()
+        logger.info(f"[CIRCUIT {self.name}] Closed - backend healthy")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get circuit breaker statistics.
+
+        Returns:
+            Dictionary with state, recent failure rate and counters
+        """
+        with self._lock:
+            self._maybe_half_open()
+            failure_rate = sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+            return {
+                "state": self._state,
+                "recent_failure_rate": round(failure_rate, 3),
+                "recent_calls": len(self._outcomes),
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited
+            }
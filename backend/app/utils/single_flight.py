@@ -0,0 +1,131 @@
+"""
+Single-Flight - Request Coalescing
+Collapses concurrent calls that share a key onto one execution.
+
+Responsibilities:
+- Run the first caller for a key (the "leader") and park later callers
+- Fan the leader's result (or exception) out to every waiter
+- Provide matching sync (thread) and async (event loop) variants
+- Count how many calls were coalesced
+
+Used by LLMService so that identical prompts submitted concurrently
+(double-submits, two officers opening the same application) only reach
+the local LLM once.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import threading
+
+
+def make_key(payload: Any) -> str:
+    """
+    Build a stable hash key for a JSON-serialisable payload.
+
+    Args:
+        payload: Request payload (dicts are hashed with sorted keys)
+
+    Returns:
+        Hex SHA-256 digest of the canonical JSON encoding
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """An in-flight call shared by a leader and its waiters."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls onto one upstream execution.
+
+    Only calls that overlap in time are merged - once the leader returns,
+    the key is released and the next call executes again (no caching).
+    """
+
+    def __init__(self):
+        """Initialize empty in-flight tables."""
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, "asyncio.Future[Any]"] = {}
+        self.coalesced_calls = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Execute fn once for all concurrent callers using the same key.
+
+        Args:
+            key: Coalescing key (e.g. prompt hash)
+            fn: Zero-argument callable performing the upstream call
+
+        Returns:
+            Tuple of (result, shared) where shared is True if this caller
+            received another caller's result
+
+        Raises:
+            Any exception raised by fn, re-raised in every waiter
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.coalesced_calls += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Async variant of do() for callers running on the event loop.
+
+        The leader's coroutine runs as a task; waiters await it through
+        asyncio.shield so a cancelled waiter does not cancel the shared call.
+
+        Args:
+            key: Coalescing key (e.g. prompt hash)
+            fn: Zero-argument coroutine function performing the upstream call
+
+        Returns:
+            Tuple of (result, shared)
+        """
+        task = self._tasks.get(key)
+        shared = task is not None
+        if shared:
+            with self._lock:
+                self.coalesced_calls += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _t: self._tasks.pop(key, None))
+
+        result = await asyncio.shield(task)
+        return result, shared
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently executing."""
+        return len(self._calls) + len(self._tasks)
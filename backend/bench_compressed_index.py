@@ -0,0 +1,221 @@
+"""
+Compressed (IVF-PQ) index benchmark: recall vs. latency.
+
+Builds a CompressedIndex in a temporary directory and compares its top-k
+against exact (brute-force cosine) search for a grid of nprobe and
+shortlist settings. Reports recall@k, mean and p95 query latency, and how
+much the process RSS grows when the index is opened and searched.
+
+With --store N it instead builds a Chroma store of N synthetic chunks (plus
+its compressed index) in a temporary directory and runs the same queries
+through VectorStoreService in a fresh process per mode, reporting each
+process's RSS with VECTOR_STORE_INDEX=chroma and =ivfpq.
+
+Vectors come from the local vector store, or are synthetic (clustered,
+384-d) with --synthetic N. Queries are stored vectors plus noise.
+
+Usage:
+    python bench_compressed_index.py [--synthetic N] [--queries Q] [--k K]
+    python bench_compressed_index.py --store N [--queries Q] [--k K]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.services.compressed_index import CompressedIndex
+
+NPROBES = [1, 2, 4, 8, 16, 32]
+SHORTLISTS = [50, 100, 200]
+
+
+def rss_mib(field: str = "VmRSS") -> float:
+    """
+    Resident set size of this process (MiB); Linux only (reads /proc).
+
+    Args:
+        field: VmRSS (total), RssAnon (heap, private to the process) or
+            RssFile (mapped files, shareable through the page cache)
+    """
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def load_vectors(synthetic: int) -> np.ndarray:
+    """Embeddings from the vector store, or clustered synthetic vectors."""
+    if synthetic:
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(max(8, synthetic // 200), 384))
+        labels = rng.integers(len(centers), size=synthetic)
+        return (centers[labels] + 0.6 * rng.normal(size=(synthetic, 384))).astype(np.float32)
+
+    from app.services.vector_store_service import get_vector_store_service
+    pages = get_vector_store_service().iter_documents(include=["embeddings"])
+    return np.vstack([np.asarray(page["embeddings"], dtype=np.float32) for page in pages])
+
+
+def synthetic_queries(vectors: np.ndarray, count: int) -> np.ndarray:
+    """Stored vectors plus noise."""
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), min(count, len(vectors)), replace=False)]
+    return queries + 0.1 * np.linalg.norm(queries, axis=1, keepdims=True) / np.sqrt(queries.shape[1]) \
+        * rng.normal(size=queries.shape).astype(np.float32)
+
+
+def serve(store_dir: str, queries: int, k: int) -> None:
+    """Child process: run the queries through VectorStoreService and print RSS as JSON."""
+    from app.services.vector_store_service import VectorStoreService
+
+    rss_start = rss_mib()
+    store = VectorStoreService(os.path.join(store_dir, "db"))
+    rss_opened = rss_mib()
+    anon_opened = rss_mib("RssAnon")
+    embeddings = synthetic_queries(np.load(os.path.join(store_dir, "vectors.npy")), queries)
+    departments = ["fire", "environment", "health", "building"]
+    started = time.perf_counter()
+    for i, embedding in enumerate(embeddings):
+        # Half the queries filter by department, like the compliance checks
+        where = {"department": {"$in": [departments[i % 4]]}} if i % 2 else None
+        store.query(embedding.tolist(), n_results=k, where=where)
+    print(json.dumps({
+        "rss_start": rss_start,
+        "rss_opened": rss_opened,
+        "anon_opened": anon_opened,
+        "rss_queried": rss_mib(),
+        "anon_queried": rss_mib("RssAnon"),
+        "file_queried": rss_mib("RssFile"),
+        "ms_per_query": (time.perf_counter() - started) * 1000 / len(embeddings)
+    }))
+
+
+def compare_store_rss(count: int, queries: int, k: int) -> None:
+    """Build a synthetic store and report serving RSS in chroma and ivfpq mode."""
+    from app.core.config import settings
+    from app.services.vector_store_service import VectorStoreService
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        vectors = load_vectors(count)
+        np.save(os.path.join(store_dir, "vectors.npy"), vectors)
+        settings.vector_store_index = "ivfpq"
+        store = VectorStoreService(os.path.join(store_dir, "db"))
+        departments = ["fire", "environment", "health", "building"]
+        started = time.perf_counter()
+        for start in range(0, count, 2000):
+            end = min(start + 2000, count)
+            store.add_documents(
+                [f"Synthetic regulation chunk {i} " + "lorem ipsum " * 40 for i in range(start, end)],
+                vectors[start:end].tolist(),
+                [{"department": departments[i % 4], "regulation_name": f"Regulation {i // 50}"} for i in range(start, end)],
+                [f"chunk-{i}" for i in range(start, end)]
+            )
+        stats = store.build_compressed_index()
+        store.close()
+        print(f"Store: {count} chunks, built in {time.perf_counter() - started:.1f}s ({stats['lists']} lists)\n")
+
+        print(
+            f"{'mode':>6} {'RSS opened':>11} {'RSS queried':>12} {'of it heap':>11} "
+            f"{'heap added':>11} {'mapped files':>13} {'ms/query':>9}"
+        )
+        measured = {}
+        for mode in ("chroma", "ivfpq"):
+            env = dict(os.environ, VECTOR_STORE_INDEX=mode, VECTOR_QUERY_CACHE_ENABLED="false")
+            output = subprocess.run(
+                [sys.executable, __file__, "--serve", store_dir, "--queries", str(queries), "--k", str(k)],
+                env=env, check=True, capture_output=True, text=True
+            ).stdout
+            measured[mode] = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{mode:>6} {measured[mode]['rss_opened']:>7.1f} MiB {measured[mode]['rss_queried']:>8.1f} MiB "
+                f"{measured[mode]['anon_queried']:>7.1f} MiB "
+                f"{measured[mode]['anon_queried'] - measured[mode]['anon_opened']:>7.1f} MiB "
+                f"{measured[mode]['file_queried']:>9.1f} MiB "
+                f"{measured[mode]['ms_per_query']:>9.2f}"
+            )
+        chroma, ivfpq = measured["chroma"], measured["ivfpq"]
+        print(
+            f"\nWith ivfpq: heap {chroma['anon_queried'] - ivfpq['anon_queried']:.1f} MiB lower per worker, "
+            f"mapped files {ivfpq['file_queried'] - chroma['file_queried']:.1f} MiB higher (page cache, "
+            f"shared by all workers on the host), total RSS {ivfpq['rss_queried'] - chroma['rss_queried']:+.1f} MiB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead of the vector store")
+    parser.add_argument("--store", type=int, default=0, help="Compare serving RSS of chroma and ivfpq mode on N synthetic chunks")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.queries, args.k)
+        return
+    if args.store:
+        compare_store_rss(args.store, args.queries, args.k)
+        return
+
+    vectors = load_vectors(args.synthetic)
+    n = len(vectors)
+    print(f"Vectors: {n} x {vectors.shape[1]}")
+    ids = [str(i) for i in range(n)]
+
+    queries = synthetic_queries(vectors, args.queries)
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit_queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    started = time.perf_counter()
+    truth = [set(np.argsort(-(unit @ q))[:args.k].astype(str)) for q in unit_queries]
+    exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        started = time.perf_counter()
+        stats = CompressedIndex(index_dir).build_from_arrays(ids, vectors, [{} for _ in ids], generation=0)
+        print(f"Build: {time.perf_counter() - started:.1f}s, {stats['lists']} lists")
+        print(f"Exact search: {exact_ms:.2f} ms/query\n")
+
+        # Open the built files the way the service does, and measure what
+        # they add to this process once searched
+        rss_before = rss_mib()
+        index = CompressedIndex(index_dir)
+        index.is_current(0)
+
+        print(f"{'nprobe':>6} {'shortlist':>9} {'recall@' + str(args.k):>10} {'mean ms':>8} {'p95 ms':>7}")
+        for nprobe in NPROBES:
+            if nprobe > stats["lists"]:
+                break
+            for shortlist in SHORTLISTS:
+                latencies, recalls = [], []
+                for query, expected in zip(queries, truth):
+                    started = time.perf_counter()
+                    result = index.search([query], args.k, nprobe=nprobe, shortlist=shortlist)[0]
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    recalls.append(len(expected & set(result["ids"])) / args.k)
+                p95 = sorted(latencies)[int(0.95 * (len(latencies) - 1))]
+                print(
+                    f"{nprobe:>6} {shortlist:>9} {statistics.mean(recalls):>10.3f} "
+                    f"{statistics.mean(latencies):>8.2f} {p95:>7.2f}"
+                )
+
+        print(
+            f"\nRSS: +{rss_mib() - rss_before:.1f} MiB with the index opened and searched "
+            f"(PQ codes {stats['code_bytes'] / 2**20:.2f} MiB, float32 vectors "
+            f"{stats['float_bytes'] / 2**20:.2f} MiB); see --store for the comparison with chroma mode"
+        )
+
+
+if __name__ == "__main__":
+    main()
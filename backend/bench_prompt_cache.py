@@ -0,0 +1,83 @@
+"""
+Prompt-prefix caching benchmark.
+
+Sends repeated document-validation prompts to the local LLM in two layouts:
+- interpolated: doc_type formatted into the system prompt (old layout)
+- templated: static system prompt, doc_type in the user message
+
+With max_tokens=1 the call time is dominated by prompt processing, so the
+difference shows how much of the prompt the server re-uses from its KV
+cache. llama.cpp servers also report prompt_n / prompt_ms in "timings".
+
+Usage:
+    python bench_prompt_cache.py [rounds]
+"""
+
+import os
+import sys
+import statistics
+import time
+
+import requests
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.services.prompt_templates import get_prompt_template
+
+DOC_TYPES = ["Fire NOC", "Pollution Control Consent", "Building Permit", "Land Ownership Certificate"]
+SAMPLE_TEXT = "Certificate issued to ABC Textile Mill, Kochi. " * 40
+
+
+def interpolated_messages(doc_type: str):
+    """Old layout: the variable doc_type sits inside the system prompt."""
+    template = get_prompt_template("document_validation")
+    system = template.system.replace("a valid document of the type named in the request", f"a valid '{doc_type}'")
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": f"Verify this document text:\n\n{SAMPLE_TEXT}"}
+    ]
+
+
+def templated_messages(doc_type: str):
+    """New layout: static system prompt, variable content last."""
+    return get_prompt_template("document_validation").render(doc_type=doc_type, text=SAMPLE_TEXT)
+
+
+def run(layout: str, build, rounds: int):
+    wall, prompt_ms, prompt_n = [], [], []
+    for i in range(rounds):
+        payload = {
+            "model": settings.llm_model_name,
+            "messages": build(DOC_TYPES[i % len(DOC_TYPES)]),
+            "max_tokens": 1,
+            "temperature": 0.0,
+            "cache_prompt": True
+        }
+        started = time.perf_counter()
+        response = requests.post(settings.llm_api_url, json=payload, timeout=settings.llm_timeout)
+        wall.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+        timings = response.json().get("timings") or {}
+        if "prompt_ms" in timings:
+            prompt_ms.append(timings["prompt_ms"])
+            prompt_n.append(timings.get("prompt_n", 0))
+
+    # The first call warms the cache for both layouts
+    steady = wall[1:] or wall
+    print(f"\n{layout}:")
+    print(f"  wall ms      first={wall[0]:.0f}  median(rest)={statistics.median(steady):.0f}")
+    if prompt_ms:
+        print(f"  prompt ms    median(rest)={statistics.median(prompt_ms[1:] or prompt_ms):.0f}")
+        print(f"  prompt_n     median(rest)={statistics.median(prompt_n[1:] or prompt_n):.0f} (tokens re-processed)")
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    print(f"LLM: {settings.llm_api_url} ({settings.llm_model_name}), {rounds} rounds per layout")
+    try:
+        run("interpolated (doc_type in system prompt)", interpolated_messages, rounds)
+        run("templated (static prefix)", templated_messages, rounds)
+    except requests.RequestException as e:
+        print(f"ERROR: {e}")
@@ -0,0 +1,106 @@
+"""
+Per-worker memory benchmark for multi-worker serving.
+
+Starts gunicorn (gunicorn.conf.py) with N workers, warms every worker with
+regulation searches (embedding model + vector store + indexes), then reports
+each worker's RSS, PSS and private memory from /proc/<pid>/smaps_rollup.
+RSS counts shared pages in full; PSS splits them between the processes that
+share them, so the PSS total is the host's real footprint.
+
+Run it twice to compare, e.g. without and with preloading:
+    PRELOAD_MODELS=false python bench_worker_rss.py --workers 4
+    python bench_worker_rss.py --workers 4
+
+Linux only (reads /proc).
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import requests
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+
+QUERIES = [
+    "hazardous waste storage and disposal",
+    "fire safety clearance for factories",
+    "effluent discharge limits",
+    "boiler registration and inspection",
+    "air emission stack height"
+]
+
+
+def memory_kib(pid: int) -> dict:
+    """Rss/Pss/Private (KiB) of one process."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    }
+
+
+def children(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=200, help="Warm-up searches (spread over the workers)")
+    parser.add_argument("--startup-timeout", type=int, default=300)
+    args = parser.parse_args()
+
+    env = dict(os.environ, WEB_WORKERS=str(args.workers), API_HOST="127.0.0.1", API_PORT=str(args.port))
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{args.port}/api/v1"
+    try:
+        started = time.perf_counter()
+        while True:
+            try:
+                if requests.get(f"{base_url}/health", timeout=5).ok and len(children(master.pid)) >= args.workers:
+                    break
+            except requests.RequestException:
+                pass
+            if master.poll() is not None or time.perf_counter() - started > args.startup_timeout:
+                sys.exit("gunicorn did not start")
+            time.sleep(1)
+        print(f"Started {args.workers} workers in {time.perf_counter() - started:.1f}s "
+              f"(preload_models={settings.preload_models})")
+
+        for i in range(args.requests):
+            requests.get(f"{base_url}/regulations/search", params={"query": QUERIES[i % len(QUERIES)]}, timeout=120)
+
+        print(f"\n{'pid':>8} {'RSS MiB':>9} {'PSS MiB':>9} {'private MiB':>12}")
+        rows = [("master", master.pid)] + [("worker", pid) for pid in children(master.pid)]
+        totals = {"rss": 0, "pss": 0, "private": 0}
+        for role, pid in rows:
+            usage = memory_kib(pid)
+            for key in totals:
+                totals[key] += usage[key]
+            print(f"{pid:>8} {usage['rss'] / 1024:>9.1f} {usage['pss'] / 1024:>9.1f} {usage['private'] / 1024:>12.1f}  {role}")
+        print(f"{'total':>8} {totals['rss'] / 1024:>9.1f} {totals['pss'] / 1024:>9.1f} {totals['private'] / 1024:>12.1f}")
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=60)
+
+
+if __name__ == "__main__":
+    main()
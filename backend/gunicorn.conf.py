@@ -0,0 +1,48 @@
+"""
+Gunicorn configuration for multi-worker serving.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master (preload_app), which loads the
+embedding and reranker models before the workers are forked (see
+settings.preload_models), so the workers can share their weights
+copy-on-write instead of each loading a copy (bench_worker_rss.py measures
+it). The routing and compressed index files are
+memory-mapped read-only inside each worker and shared through the page
+cache. The Chroma client is only created lazily inside workers - SQLite
+connections must not cross a fork.
+
+Each worker keeps its own metrics, so the workers share a metrics directory
+(settings.metrics_dir, a temporary directory by default) and a scrape of any
+worker reports the counters and histograms of all of them.
+
+Settings come from app.core.config (WEB_WORKERS, API_HOST, API_PORT).
+"""
+
+import os
+import sys
+import tempfile
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.core.metrics import clear_shared_metrics
+
+# Set before the app is imported (in the master with preload_app, or in
+# each worker), so every worker's services see the same directory
+if settings.metrics_dir is None:
+    settings.metrics_dir = os.path.join(tempfile.gettempdir(), f"civicassist-metrics-{settings.api_port}")
+
+bind = f"{settings.api_host}:{settings.api_port}"
+workers = settings.web_workers
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = settings.preload_models
+# Analyses can wait on the local LLM for minutes
+timeout = 600
+graceful_timeout = 30
+
+
+def on_starting(server):
+    """Start every run with empty metric files, so counters restart at zero."""
+    clear_shared_metrics(settings.metrics_dir)
@@ -0,0 +1,333 @@
+"""
+Local LLM Stand-in Server - Deterministic OpenAI-Compatible Fake
+Replaces LM Studio for load and latency testing, in CI and on laptops.
+
+Serves /v1/models and /v1/chat/completions (plain and SSE streaming) with:
+- Configurable time to first token (fixed, uniform or lognormal) and
+  decode speed in tokens per second
+- A fixed number of decode slots (LM Studio decodes one sequence at a time)
+- Error (HTTP 500), timeout (hang) and invalid-JSON injection rates
+- Canned valid JSON for each prompt type: compliance report, application
+  extraction, document validation; plain text for chat
+
+Every random draw is seeded from --seed plus the request body, so the same
+request always gets the same latency, fault and body regardless of
+concurrency.
+
+Usage:
+    python llm_standin_server.py --port 1234 --ttft-ms 800 --tokens-per-second 20
+    LLM_API_URL=http://localhost:1234/v1/chat/completions uvicorn main:app
+
+Scripts can also start one for their own run with running_standin() (see
+test_llm_connection.py --standin and ../verify_backend.py --standin).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Sequence
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+CANNED_BODIES: Dict[str, Dict[str, Any]] = {
+    "compliance_report": {
+        "overall_status": "partially_compliant",
+        "confidence_score": 78,
+        "time_saved_minutes": 45,
+        "regulation_coverage_percent": 82,
+        "issues": [
+            {
+                "type": "missing_document",
+                "risk_level": "high",
+                "department": "fire",
+                "regulation_reference": {"name": "Kerala Fire and Rescue Services Act", "clause": "Section 13"},
+                "document_excerpt": "No occupancy shall be permitted without a fire safety certificate.",
+                "explanation": "The application does not include a fire NOC."
+            },
+            {
+                "type": "ambiguity",
+                "risk_level": "medium",
+                "department": "environment",
+                "regulation_reference": {"name": "Water (Prevention and Control of Pollution) Act", "clause": "Section 25"},
+                "document_excerpt": "Consent to establish is required before discharge of trade effluent.",
+                "explanation": "Effluent treatment capacity is not stated."
+            }
+        ],
+        "checklist": ["Obtain fire NOC", "State effluent treatment plant capacity"]
+    },
+    "application_details": {
+        "industry_name": "ABC Textile Mill",
+        "square_feet": "5000",
+        "water_source": "Municipal supply",
+        "drainage": "Connected to city drainage",
+        "air_pollution": "Electrostatic precipitators installed",
+        "waste_management": "Segregation and authorised disposal",
+        "nearby_homes": "500 meters",
+        "water_level_depth": "50 feet"
+    },
+    "document_validation": {
+        "is_valid": True,
+        "confidence": 0.92,
+        "reason": "The text contains the issuing authority, reference number and validity period."
+    }
+}
+
+CHAT_REPLY = (
+    "Industrial units in Kerala generally need consent to establish from the "
+    "Pollution Control Board, a fire NOC and a building permit from the local body."
+)
+
+# System prompt markers for clients that do not send a json_schema
+PROMPT_MARKERS = [
+    ("compliance analyst", "compliance_report"),
+    ("data extraction engine", "application_details"),
+    ("document verification", "document_validation")
+]
+
+
+class StandinConfig:
+    """Behaviour of the stand-in server."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.seed = args.seed
+        self.latency_distribution = args.latency_distribution
+        self.ttft_ms = args.ttft_ms
+        self.ttft_spread = args.ttft_spread
+        self.tokens_per_second = args.tokens_per_second
+        self.prefill_tokens_per_second = args.prefill_tokens_per_second
+        self.parallel = args.parallel
+        self.error_rate = args.error_rate
+        self.timeout_rate = args.timeout_rate
+        self.invalid_json_rate = args.invalid_json_rate
+        self.reject_json_schema = args.reject_json_schema
+        self.model = args.model
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return max(1, math.ceil(len(text) / 4)) if text else 0
+
+
+def classify(body: Dict[str, Any]) -> str:
+    """Prompt type of a request: schema name, system prompt marker, or chat."""
+    response_format = body.get("response_format") or {}
+    name = (response_format.get("json_schema") or {}).get("name")
+    if name in CANNED_BODIES:
+        return name
+    messages = body.get("messages") or []
+    system = messages[0].get("content", "").lower() if messages and messages[0].get("role") == "system" else ""
+    for marker, task in PROMPT_MARKERS:
+        if marker in system:
+            return task
+    return "chat"
+
+
+def create_app(config: StandinConfig) -> FastAPI:
+    """Build the stand-in FastAPI app."""
+    app = FastAPI(title="Local LLM Stand-in")
+    slots = asyncio.Semaphore(config.parallel)
+    stats = {"requests": 0, "errors": 0, "timeouts": 0, "invalid": 0}
+
+    def request_rng(raw: bytes) -> random.Random:
+        digest = hashlib.sha256(str(config.seed).encode() + raw).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def draw_ttft(rng: random.Random) -> float:
+        base = config.ttft_ms / 1000.0
+        if config.latency_distribution == "uniform":
+            return max(0.0, rng.uniform(base * (1 - config.ttft_spread), base * (1 + config.ttft_spread)))
+        if config.latency_distribution == "lognormal":
+            # ttft_ms is the median, ttft_spread the sigma of the underlying normal
+            return rng.lognormvariate(math.log(max(base, 1e-6)), config.ttft_spread)
+        return base
+
+    def chunk_text(text: str, size: int = 4) -> List[str]:
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": config.model, "object": "model"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        raw = await request.body()
+        body = json.loads(raw)
+        rng = request_rng(raw)
+        stats["requests"] += 1
+
+        response_format = body.get("response_format") or {}
+        if config.reject_json_schema and response_format.get("type") == "json_schema":
+            return JSONResponse(
+                status_code=400,
+                content={"error": "'response_format.type' json_schema is not supported"}
+            )
+
+        task = classify(body)
+        if task == "chat":
+            content = CHAT_REPLY
+        else:
+            content = json.dumps(CANNED_BODIES[task], indent=2)
+            if rng.random() < config.invalid_json_rate:
+                stats["invalid"] += 1
+                content = "Here is the analysis:\n```json\n" + content[: len(content) // 2]
+
+        max_tokens = body.get("max_tokens") or 2048
+        pieces = chunk_text(content)[:max_tokens]
+        content = "".join(pieces)
+        prompt_tokens = estimate_tokens(json.dumps(body.get("messages") or []))
+        completion_tokens = len(pieces)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+        fault = rng.random()
+        ttft = draw_ttft(rng)
+        if config.prefill_tokens_per_second > 0:
+            ttft += prompt_tokens / config.prefill_tokens_per_second
+        token_delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        completion_id = "chatcmpl-" + hashlib.sha1(raw).hexdigest()[:12]
+
+        async def stream_events():
+            # Holds the decode slot taken by the handler until the stream ends
+            try:
+                for piece in pieces:
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "model": config.model,
+                        "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    if token_delay:
+                        await asyncio.sleep(token_delay)
+                final = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "model": config.model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "usage": usage
+                }
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                slots.release()
+
+        if fault < config.timeout_rate:
+            # Hung connection: never answers (does not hold a decode slot)
+            stats["timeouts"] += 1
+            await asyncio.sleep(3600)
+
+        await slots.acquire()
+        released_by_stream = False
+        try:
+            if fault < config.timeout_rate + config.error_rate:
+                stats["errors"] += 1
+                await asyncio.sleep(ttft)
+                return JSONResponse(status_code=500, content={"error": "Injected server error"})
+
+            if not body.get("stream"):
+                await asyncio.sleep(ttft + token_delay * completion_tokens)
+                return {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": config.model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": usage,
+                    "timings": {"prompt_n": prompt_tokens, "prompt_ms": round(ttft * 1000, 1)}
+                }
+
+            await asyncio.sleep(ttft)
+            released_by_stream = True
+            return StreamingResponse(stream_events(), media_type="text/event-stream")
+        finally:
+            if not released_by_stream:
+                slots.release()
+
+
+    return app
+
+
+@contextlib.contextmanager
+def running_standin(extra_args: Sequence[str] = ("--ttft-ms", "50", "--tokens-per-second", "0")) -> Iterator[str]:
+    """
+    Run a stand-in server in a subprocess for the duration of a block.
+
+    Args:
+        extra_args: Command-line options for the server (default: fast replies)
+
+    Yields:
+        Chat completions URL of the server (for LLM_API_URL / settings.llm_api_url)
+    """
+    import requests
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--port", str(port), *extra_args]
+    )
+    base_url = f"http://127.0.0.1:{port}/v1"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if requests.get(f"{base_url}/models", timeout=1).ok:
+                    break
+            except requests.RequestException:
+                pass
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("LLM stand-in server did not start")
+            time.sleep(0.2)
+        yield f"{base_url}/chat/completions"
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible LLM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default="mistralai-mistral-7b-instruct-v0.2-smashed")
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "lognormal"], default="fixed")
+    parser.add_argument("--ttft-ms", type=float, default=500.0, help="Time to first token (median for lognormal)")
+    parser.add_argument("--ttft-spread", type=float, default=0.3, help="Uniform: +/- fraction; lognormal: sigma")
+    parser.add_argument("--tokens-per-second", type=float, default=25.0, help="Decode speed (0 = instant)")
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=0.0,
+                        help="Add prompt_tokens / rate to the first-token delay (0 = off)")
+    parser.add_argument("--parallel", type=int, default=1, help="Concurrent decode slots")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests that never answer")
+    parser.add_argument("--invalid-json-rate", type=float, default=0.0,
+                        help="Fraction of JSON tasks answered with truncated JSON")
+    parser.add_argument("--reject-json-schema", action="store_true",
+                        help="Answer json_schema response_format with HTTP 400")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    uvicorn.run(create_app(StandinConfig(args)), host=args.host, port=args.port, log_level="warning")
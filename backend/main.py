@@ -7,6 +7,7 @@ Features:
 - CORS middleware configuration
 - API router registration for /api/v1
 - Basic health and version endpoints
+- Model preloading before worker processes fork (see gunicorn.conf.py)
 
 Reference: Inspired by OLD/RagBot/server.py but with cleaner structure
 """
@@ -15,7 +16,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import routes as v1_routes
 from app.core.config import settings
+from app.services.llm_service import get_llm_service
+from app.services.batch_service import get_batch_service
+from app.services.analysis_job_service import get_analysis_job_service
 import logging
+import os
 
 # Configure logging
 logging.basicConfig(
@@ -25,6 +30,30 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def preload_models() -> None:
+    """
+    Load the embedding (and reranker) models and the LLM tokenizer at import time.
+    
+    Under gunicorn with preload_app the app is imported once in the master,
+    so the weights are loaded before fork and the workers can share them
+    copy-on-write (measure with bench_worker_rss.py). Only models are loaded here: the Chroma client, thread pools and
+    index mappings are created lazily inside each worker.
+    """
+    from app.services.embedding_service import get_embedding_service
+    get_embedding_service()
+    if settings.llm_tokenizer_name:
+        get_llm_service().prompt_builder.counter.load()
+    if settings.reranker_enabled:
+        from app.services.reranker_service import get_reranker_service
+        reranker = get_reranker_service()
+        if reranker is not None:
+            reranker.load_model()
+
+
+if settings.preload_models:
+    preload_models()
+
+
 # Lifespan context manager
 from contextlib import asynccontextmanager
 
@@ -38,9 +67,23 @@ async def lifespan(app: FastAPI):
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
     logger.info("Phase 1: Foundation setup - no AI/RAG logic initialized")
     
+    # Keep local LLM availability cached for the circuit breaker
+    llm_service = get_llm_service()
+    llm_service.start_health_probe()
+    
+    # Tokenizer now rather than on the first analysis (no-op if preloaded)
+    if settings.llm_tokenizer_name:
+        llm_service.prompt_builder.counter.load()
+    
+    # Pick up batch and async analysis jobs interrupted by a restart or crash
+    # (every gunicorn worker runs this; only jobs of dead processes are claimed)
+    get_batch_service().resume_jobs()
+    get_analysis_job_service().resume_jobs()
+    
     yield
     
     # Shutdown
+    llm_service.stop_health_probe()
     logger.info(f"Shutting down {settings.app_name}")
 
 
@@ -65,7 +108,6 @@ app.add_middleware(
 
 # Mount static files for document viewing
 from fastapi.staticfiles import StaticFiles
-import os
 
 os.makedirs("data/uploads", exist_ok=True)
 app.mount("/uploads", StaticFiles(directory="data/uploads"), name="uploads")
@@ -1,22 +1,55 @@
-import requests
+"""
+LLM connection test: one short chat completion against the configured LLM.
+
+Uses settings.llm_api_url / llm_model_name (LLM_API_URL, LLM_MODEL_NAME).
+With --standin it starts llm_standin_server.py and tests against that, so
+it runs offline without LM Studio.
+
+Usage:
+    python test_llm_connection.py [--standin]
+"""
+
+import argparse
+import contextlib
 import json
+import os
+import sys
+
+import requests
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+
+
+def test_connection(url: str) -> None:
+    payload = {
+        "model": settings.llm_model_name,
+        "messages": [{"role": "user", "content": "Say hello in one word"}],
+        "max_tokens": 10,
+        "temperature": 0.3
+    }
+    try:
+        print("Testing LLM connection...")
+        print(f"URL: {url}")
+        print(f"Payload: {json.dumps(payload, indent=2)}")
+
+        response = requests.post(url, json=payload, timeout=30)
+        print(f"\nStatus Code: {response.status_code}")
+        print(f"Response: {json.dumps(response.json(), indent=2)}")
+    except Exception as e:
+        print(f"ERROR: {e}")
+
 
-# Test LLM connection
-url = "http://localhost:1234/v1/chat/completions"
-payload = {
-    "model": "mistralai-mistral-7b-instruct-v0.2-smashed",
-    "messages": [{"role": "user", "content": "Say hello in one word"}],
-    "max_tokens": 10,
-    "temperature": 0.3
-}
-
-try:
-    print("Testing LLM connection...")
-    print(f"URL: {url}")
-    print(f"Payload: {json.dumps(payload, indent=2)}")
-    
-    response = requests.post(url, json=payload, timeout=30)
-    print(f"\nStatus Code: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
-except Exception as e:
-    print(f"ERROR: {e}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test the LLM connection")
+    parser.add_argument("--standin", action="store_true", help="Test against a local llm_standin_server.py")
+    args = parser.parse_args()
+    if args.standin:
+        from llm_standin_server import running_standin
+        context = running_standin()
+    else:
+        context = contextlib.nullcontext(settings.llm_api_url)
+    with context as url:
+        test_connection(url)
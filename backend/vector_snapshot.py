@@ -0,0 +1,57 @@
+"""
+Vector store snapshot export / import.
+
+Export writes the current vector store (embeddings, documents, metadata and
+any prebuilt compressed/routing indexes) to a portable snapshot directory.
+Import loads a snapshot into this node's vector store without re-parsing or
+re-embedding the regulations (Chroma still indexes the embeddings, so import
+time grows with the corpus). The new store is built next to the current one
+and swapped in when complete; run imports with the server stopped.
+
+Usage:
+    python vector_snapshot.py export <snapshot_dir>
+    python vector_snapshot.py import <snapshot_dir> [--replace]
+    python vector_snapshot.py verify <snapshot_dir>
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.services.snapshot_service import SnapshotService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("export", help="Write a snapshot of the vector store").add_argument("snapshot_dir")
+    import_parser = commands.add_parser("import", help="Load a snapshot into the vector store")
+    import_parser.add_argument("snapshot_dir")
+    import_parser.add_argument("--replace", action="store_true", help="Replace the current contents")
+    commands.add_parser("verify", help="Check a snapshot's manifest and checksums").add_argument("snapshot_dir")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        if args.command == "verify":
+            result = SnapshotService.verify_snapshot(args.snapshot_dir)
+        elif args.command == "export":
+            result = SnapshotService().export_snapshot(args.snapshot_dir)
+        else:
+            result = SnapshotService().import_snapshot(args.snapshot_dir, replace=args.replace)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if args.command != "import":
+        result = {key: value for key, value in result.items() if key != "files"}
+    print(json.dumps(result, indent=2))
+    print(f"{args.command} finished in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
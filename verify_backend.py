@@ -1,3 +1,15 @@
+"""
+Backend check: embeddings, vector store and LLM endpoint.
+
+Run from the repository root. The LLM check uses settings.llm_api_url
+(LLM_API_URL); with --standin it runs against a local llm_standin_server.py
+instead, so no LM Studio is needed.
+
+Usage:
+    python verify_backend.py [--standin]
+"""
+
+import argparse
 import sys
 import os
 import requests
@@ -81,6 +93,16 @@ def check_vector_store():
         print(f"❌ Vector Store Error: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the backend's embeddings, vector store and LLM")
+    parser.add_argument("--standin", action="store_true", help="Check the LLM path against llm_standin_server.py")
+    args = parser.parse_args()
+
     check_embeddings()
     check_vector_store()
-    check_llm()
+    if args.standin:
+        from llm_standin_server import running_standin
+        with running_standin() as url:
+            settings.llm_api_url = url
+            check_llm()
+    else:
+        check_llm()